@@ -6,15 +6,21 @@ import logging
 logger = logging.getLogger(__name__)
 
 class Cache:
-    def __init__(self, ttl: int = 300):
-        """Initialize cache with TTL in seconds."""
+    def __init__(self, ttl: int = 300, maxsize: Optional[int] = None):
+        """Initialize cache with TTL in seconds.
+
+        With maxsize, each collection keeps at most that many entries; a set
+        beyond it evicts the oldest write, which is also the first to expire.
+        """
         self._cache: Dict[str, Dict[str, Any]] = {
             "users": {},
             "sessions": {},
             "summaries": {},
+            "screenshots": {},
             "last_updated": {}
         }
         self.ttl = ttl
+        self.maxsize = maxsize
 
     def get(self, key: str, collection: str) -> Optional[Any]:
         """Get value from cache if not expired."""
@@ -25,6 +31,9 @@ class Cache:
                 logger.debug(f"Cache hit for {collection}:{key}")
                 return self._cache[collection][key]
             logger.debug(f"Cache miss for {collection}:{key}")
+            # Drop an expired entry on read rather than waiting for a cleanup
+            if key in self._cache[collection]:
+                self.delete(key, collection)
             return None
         except Exception as e:
             logger.error(f"Error getting from cache: {e}")
@@ -33,8 +42,16 @@ class Cache:
     def set(self, key: str, value: Any, collection: str) -> bool:
         """Set value in cache with current timestamp."""
         try:
-            self._cache[collection][key] = value
+            entries = self._cache[collection]
+            # Re-inserting moves the key to the newest position
+            entries.pop(key, None)
+            entries[key] = value
             self._cache["last_updated"][key] = time.time()
+            if self.maxsize is not None:
+                while len(entries) > self.maxsize:
+                    oldest = next(iter(entries))
+                    del entries[oldest]
+                    self._cache["last_updated"].pop(oldest, None)
             return True
         except Exception as e:
             logger.error(f"Error setting cache: {e}")
@@ -78,7 +95,7 @@ class Cache:
             
             # Remove expired keys
             for key in expired_keys:
-                for collection in ["users", "sessions", "summaries"]:
+                for collection in ["users", "sessions", "summaries", "screenshots"]:
                     if key in self._cache[collection]:
                         del self._cache[collection][key]
                 del self._cache["last_updated"][key]
@@ -94,7 +111,9 @@ class Cache:
             "users_cached": len(self._cache["users"]),
             "sessions_cached": len(self._cache["sessions"]),
             "summaries_cached": len(self._cache["summaries"]),
+            "screenshots_cached": len(self._cache["screenshots"]),
             "total_cached_items": len(self._cache["users"]) + 
                                 len(self._cache["sessions"]) + 
-                                len(self._cache["summaries"])
+                                len(self._cache["summaries"]) +
+                                len(self._cache["screenshots"])
         } 
\ No newline at end of file
@@ -1,8 +1,10 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from .core.scheduler import setup_scheduler
 from .services.mongodb import connect_to_mongodb, close_mongodb_connection
+from .services.s3 import S3_POOL
 from .routers import (
     health,
     session,
@@ -13,18 +15,30 @@ from .routers import (
     history,
     users
 )
+import hashlib
 import logging
+import logging.handlers
+import queue
+import ssl
 import time
 from datetime import datetime, timezone
 
 from .core.logging_config import setup_logging, log_request, log_error
 from .core.background_tasks import setup_background_tasks
 
-# Configure logging
+# Configure logging. Records are handed to a queue and written to stdout by
+# the listener's thread, so log I/O never blocks the event loop.
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter(
+    '[%(asctime)s] %(levelname)s: %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+))
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+log_listener.start()
 logging.basicConfig(
     level=logging.INFO,
-    format='[%(asctime)s] %(levelname)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
@@ -35,7 +49,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -130,6 +145,9 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Error starting scheduler: {e}")
     
+    # Screenshot hash verification relies on hashlib's OpenSSL SHA-256
+    logger.info(f"Using {ssl.OPENSSL_VERSION} (sha256 available: {'sha256' in hashlib.algorithms_available})")
+    
     # Store start time for uptime calculation
     app.start_time = time.time()
     
@@ -150,7 +168,13 @@ async def shutdown_event():
     # Close MongoDB connection
     await close_mongodb_connection()
     
+    # Release S3 worker threads
+    S3_POOL.shutdown(wait=False)
+    
     logger.info("Application shutdown complete")
+    
+    # Flush queued log records
+    log_listener.stop()
 
 @app.get("/")
 async def root():
@@ -2,12 +2,14 @@ from fastapi import APIRouter, HTTPException, Request
 from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, ConfigDict, Field
+import logging
 
 from ..services.mongodb import get_database
 from ..models.database import Activity
 from ..utils.helpers import ensure_timezone_aware, normalize_app_names
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class SystemInfo(BaseModel):
     platform: str
@@ -119,7 +121,7 @@ async def track_activity(data: ActivityData):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in track_activity: {str(e)}")
+        logger.error("Error in track_activity: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/activity_history")
@@ -177,7 +179,7 @@ async def get_activity_history(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_activity_history: {str(e)}")
+        logger.error("Error in get_activity_history: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/app_usage")
@@ -241,5 +243,5 @@ async def get_app_usage(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_app_usage: {str(e)}")
+        logger.error("Error in get_app_usage: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -3,11 +3,13 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, ConfigDict
 import asyncio
+import logging
 
 from ..services.mongodb import get_database
-from ..utils.helpers import ensure_timezone_aware, normalize_app_names, serialize_mongodb_doc
+from ..utils.helpers import day_bounds, ensure_timezone_aware, normalize_app_names, serialize_mongodb_doc
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class PaginationInfo(BaseModel):
     total: int
@@ -61,11 +63,10 @@ async def get_user_dashboard_data(user: Dict[str, Any], current_date: datetime)
         )
 
         # Get first join and last leave for today
-        day_start = datetime.combine(current_date, datetime.min.time(), tzinfo=timezone.utc)
-        day_end = datetime.combine(current_date, datetime.max.time(), tzinfo=timezone.utc)
+        day_start, day_end = day_bounds(current_date)
         
-        print(f"🔍 Calculating session time for user {user['username']} on {current_date}")
-        print(f"📅 Day range: {day_start} to {day_end}")
+        logger.debug("Calculating session time for user %s on %s", user['username'], current_date)
+        logger.debug("Day range: %s to %s", day_start, day_end)
         
         # Get first join and last leave for today
         first_join = await db.sessions.find_one({
@@ -86,11 +87,11 @@ async def get_user_dashboard_data(user: Dict[str, Any], current_date: datetime)
             if last_leave_time > first_join_time:
                 total_session_seconds = (last_leave_time - first_join_time).total_seconds()
                 total_session_hours = round(total_session_seconds / 3600, 2)
-                print(f"⏱️ Total session duration: {total_session_hours} hours (from {first_join_time} to {last_leave_time})")
+                logger.debug("Total session duration: %s hours (from %s to %s)", total_session_hours, first_join_time, last_leave_time)
             else:
-                print(f"⚠️ Warning: Last leave time ({last_leave_time}) is before first join time ({first_join_time})")
+                logger.warning("Last leave time (%s) is before first join time (%s)", last_leave_time, first_join_time)
         
-        print(f"📊 Total session hours: {total_session_hours}")
+        logger.debug("Total session hours: %s", total_session_hours)
         total_working_hours = total_session_hours  # Use the same value for both
 
         # Get app usage
@@ -158,7 +159,7 @@ async def get_user_dashboard_data(user: Dict[str, Any], current_date: datetime)
             "most_used_app_time": most_used_app_time
         }
     except Exception as e:
-        print(f"❌ Error in get_user_dashboard_data: {str(e)}")
+        logger.error("Error in get_user_dashboard_data: %s", e, exc_info=True)
         # Return minimal data for the user even if there's an error
         return {
             "username": user.get("username", "unknown"),
@@ -303,7 +304,7 @@ async def get_dashboard_overview():
         }
         
     except Exception as e:
-        print(f"Error in get_dashboard_overview: {str(e)}")  # Add logging
+        logger.error("Error in get_dashboard_overview: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/dashboard/user_stats")
@@ -385,7 +386,7 @@ async def get_user_stats(username: str):
         }
         
     except Exception as e:
-        print(f"Error in get_user_stats: {str(e)}")  # Add logging
+        logger.error("Error in get_user_stats: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/dashboard/active_users")
@@ -440,5 +441,5 @@ async def get_active_users():
         }
         
     except Exception as e:
-        print(f"Error in get_active_users: {str(e)}")  # Add logging
+        logger.error("Error in get_active_users: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -1,21 +1,30 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from datetime import datetime, timezone, timedelta
 import psutil
 import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
 from ..services.mongodb import get_database
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.get("/health")
-async def health_check():
-    """Health check endpoint for monitoring."""
-    health_data = {
-        "status": "healthy",
-        "components": {},
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
-    
-    # Check database connection
+# Each component's result is reused for HEALTH_CHECK_TTL seconds, so
+# frequent load balancer probes don't turn into database traffic
+HEALTH_CHECK_TTL = 5.0
+_health_results: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+async def _cached_check(name: str, check: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Return a component's check result, rerunning the check once the cached one is stale."""
+    entry = _health_results.get(name)
+    now = time.monotonic()
+    if entry is None or now - entry[0] >= HEALTH_CHECK_TTL:
+        entry = (now, await check())
+        _health_results[name] = entry
+    return entry[1]
+
+async def _check_database() -> Dict[str, Any]:
     try:
         start_time = time.time()
         db = await get_database()
@@ -25,65 +34,78 @@ async def health_check():
         await db.command("ping")
         db_response_time = time.time() - start_time
         
-        health_data["components"]["database"] = {
+        return {
             "status": "connected",
             "response_time_ms": round(db_response_time * 1000, 2)
         }
     except Exception as e:
-        print(f"Database health check error: {str(e)}")
-        health_data["status"] = "unhealthy"
-        health_data["components"]["database"] = {
+        logger.error("Database health check error: %s", e, exc_info=True)
+        return {
             "status": "error",
             "error": str(e)
         }
-    
-    # Check memory usage
+
+async def _check_memory() -> Dict[str, Any]:
     try:
         process = psutil.Process()
         memory_info = process.memory_info()
         memory_mb = memory_info.rss / 1024 / 1024
         
-        health_data["components"]["memory"] = {
+        return {
             "status": "ok" if memory_mb < 500 else "warning",
             "usage_mb": round(memory_mb, 2)
         }
     except Exception as e:
-        print(f"Memory health check error: {str(e)}")
-        health_data["components"]["memory"] = {
+        logger.error("Memory health check error: %s", e, exc_info=True)
+        return {
             "status": "unknown",
             "error": str(e)
         }
-    
-    # Check MongoDB connection pool
+
+async def _check_db_pool() -> Dict[str, Any]:
     try:
-        if db is not None:
-            server_status = await db.command("serverStatus")
-            conn_stats = server_status.get("connections", {})
-            current = conn_stats.get("current", 0)
-            available = conn_stats.get("available", 0)
-            max_conns = current + available
-            usage_percent = (current / max_conns * 100) if max_conns > 0 else 0
-            
-            health_data["components"]["db_pool"] = {
-                "status": "ok" if usage_percent < 80 else "warning",
-                "current": current,
-                "available": available,
-                "usage_percent": round(usage_percent, 1)
-            }
-        else:
-            health_data["components"]["db_pool"] = {
+        db = await get_database()
+        if db is None:
+            return {
                 "status": "error",
                 "error": "Database connection not available"
             }
+        
+        server_status = await db.command("serverStatus")
+        conn_stats = server_status.get("connections", {})
+        current = conn_stats.get("current", 0)
+        available = conn_stats.get("available", 0)
+        max_conns = current + available
+        usage_percent = (current / max_conns * 100) if max_conns > 0 else 0
+        
+        return {
+            "status": "ok" if usage_percent < 80 else "warning",
+            "current": current,
+            "available": available,
+            "usage_percent": round(usage_percent, 1)
+        }
     except Exception as e:
-        print(f"DB pool health check error: {str(e)}")
-        health_data["components"]["db_pool"] = {
+        logger.error("DB pool health check error: %s", e, exc_info=True)
+        return {
             "status": "unknown",
             "error": str(e)
         }
+
+@router.get("/health")
+async def health_check():
+    """Health check endpoint for monitoring."""
+    components = {
+        "database": await _cached_check("database", _check_database),
+        "memory": await _cached_check("memory", _check_memory),
+        "db_pool": await _cached_check("db_pool", _check_db_pool)
+    }
+    
+    health_data = {
+        "status": "unhealthy" if components["database"]["status"] == "error" else "healthy",
+        "components": components,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
     
-    # Return appropriate status code
-    status_code = 200 if health_data["status"] == "healthy" else 500
     return health_data
 
 @router.get("/stats")
@@ -94,27 +116,35 @@ async def get_stats():
         if db is None:
             raise HTTPException(status_code=500, detail="Database connection not available")
             
-        # Get collection stats
-        users_count = await db.users.count_documents({})
-        sessions_count = await db.sessions.count_documents({})
-        activities_count = await db.activities.count_documents({})
-        summaries_count = await db.daily_summaries.count_documents({})
-        
-        # Get active users (users with activity in the last 24 hours)
-        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
-        active_users = len(await db.daily_summaries.distinct("user_id", {
-            "last_updated": {"$gte": yesterday}
-        }))
+        now = datetime.now(timezone.utc)
         
         # Get top apps across all users for today
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         pipeline = [
-            {"$match": {"date": today}},
+            {"$match": {"date": now.strftime("%Y-%m-%d")}},
             {"$group": {"_id": "$app_name", "total_time": {"$sum": "$total_time"}}},
             {"$sort": {"total_time": -1}},
             {"$limit": 10}
         ]
-        top_apps = await db.activities.aggregate(pipeline).to_list(None)
+        
+        # The queries are independent, so they run concurrently. Collection
+        # stats come from metadata; these totals needn't be exact. Active
+        # users are those with activity in the last 24 hours.
+        (
+            users_count,
+            sessions_count,
+            activities_count,
+            summaries_count,
+            active_user_ids,
+            top_apps
+        ) = await asyncio.gather(
+            db.users.estimated_document_count(),
+            db.sessions.estimated_document_count(),
+            db.activities.estimated_document_count(),
+            db.daily_summaries.estimated_document_count(),
+            db.daily_summaries.distinct("user_id", {"last_updated": {"$gte": now - timedelta(days=1)}}),
+            db.activities.aggregate(pipeline).to_list(None)
+        )
+        active_users = len(active_user_ids)
         
         return {
             "database": {
@@ -131,5 +161,5 @@ async def get_stats():
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_stats: {str(e)}")
+        logger.error("Error in get_stats: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
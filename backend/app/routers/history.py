@@ -3,12 +3,15 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, ConfigDict
 import asyncio
+from collections import defaultdict
 from bson import ObjectId
+import logging
 
 from ..services.mongodb import get_database
-from ..utils.helpers import ensure_timezone_aware, normalize_app_names, serialize_mongodb_doc
+from ..utils.helpers import day_bounds, ensure_timezone_aware, normalize_app_names, serialize_mongodb_doc
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class DailyData:
     def __init__(
@@ -59,15 +62,19 @@ class HistoryData:
             "days": [day.dict() for day in self.days]
         }
 
-async def get_session_data(user_id: ObjectId, day_str: str, sessions_data: List[dict]) -> Optional[dict]:
+async def get_session_data(user_id: ObjectId, day_str: str, sessions_index: Dict[tuple, dict]) -> Optional[dict]:
     """Get session data for a specific day"""
-    return next((s for s in sessions_data if s["_id"]["user_id"] == user_id and s["_id"]["date"] == day_str), None)
+    return sessions_index.get((user_id, day_str))
 
-async def get_daily_data(user_id: ObjectId, day_str: str, session_data: Optional[dict]) -> DailyData:
-    """Get daily activity data for a user"""
+async def get_daily_data(
+    user_id: ObjectId,
+    day_str: str,
+    session_data: Optional[dict],
+    activities: List[dict],
+    daily_summary: Optional[dict]
+) -> DailyData:
+    """Build a user's daily activity data from the preloaded documents"""
     try:
-        db = await get_database()
-        
         # Get session times
         first_join_time = None
         last_leave_time = None
@@ -85,12 +92,6 @@ async def get_daily_data(user_id: ObjectId, day_str: str, session_data: Optional
                     total_session_seconds = (last_leave_time - first_join_time).total_seconds()
                     total_session_hours = round(total_session_seconds / 3600, 2)
         
-        # Get activities
-        activities = await db.activities.find({
-            "user_id": user_id,
-            "date": day_str
-        }).to_list(length=None)
-        
         # Process app usage
         app_usage = []
         most_active_app = None
@@ -112,12 +113,6 @@ async def get_daily_data(user_id: ObjectId, day_str: str, session_data: Optional
                 most_active_app = app_usage[0]["app_name"]
                 most_used_app_time = app_usage[0]["total_time"]
         
-        # Get daily summary
-        daily_summary = await db.daily_summaries.find_one({
-            "user_id": user_id,
-            "date": day_str
-        })
-        
         # Calculate active and idle time
         total_active_time = 0
         total_idle_time = 0
@@ -138,7 +133,7 @@ async def get_daily_data(user_id: ObjectId, day_str: str, session_data: Optional
             most_used_app_time=most_used_app_time
         )
     except Exception as e:
-        print(f"Error getting daily data: {e}")
+        logger.error("Error getting daily data: %s", e, exc_info=True)
         return DailyData(date=day_str)
 
 @router.get("/history")
@@ -167,8 +162,8 @@ async def get_history(
         start_date = end_date - timedelta(days=days-1)
         
         # Get sessions data
-        start_datetime = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc)
-        end_datetime = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=timezone.utc)
+        start_datetime = day_bounds(start_date)[0]
+        end_datetime = day_bounds(end_date)[1]
         
         pipeline = [
             {
@@ -195,18 +190,41 @@ async def get_history(
             }
         ]
         
-        sessions_data = await db.sessions.aggregate(pipeline).to_list(length=None)
+        # Grouped session rows keyed by (user_id, day) for O(1) lookups
+        sessions_index = {
+            (s["_id"]["user_id"], s["_id"]["date"]): s
+            async for s in db.sessions.aggregate(pipeline)
+        }
+        
+        # Load every activity and daily summary in range up front, keyed by
+        # (user_id, day), instead of two queries per user and day
+        user_ids = [user["_id"] for user in users]
+        day_strs = [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+        day_filter = {"user_id": {"$in": user_ids}, "date": {"$in": day_strs}}
+        
+        activities_index = defaultdict(list)
+        async for activity in db.activities.find(day_filter):
+            activities_index[(activity["user_id"], activity["date"])].append(activity)
+        
+        summaries_index = {
+            (summary["user_id"], summary["date"]): summary
+            async for summary in db.daily_summaries.find(
+                day_filter,
+                projection={"user_id": 1, "date": 1, "total_active_time": 1, "total_idle_time": 1}
+            )
+        }
         
         # Process history for each user
         history_data = []
         for user in users:
             days_data = []
-            for i in range(days):
-                current_date = start_date + timedelta(days=i)
-                day_str = current_date.strftime("%Y-%m-%d")
-                
-                session_data = await get_session_data(user["_id"], day_str, sessions_data)
-                daily_data = await get_daily_data(user["_id"], day_str, session_data)
+            for day_str in day_strs:
+                session_data = await get_session_data(user["_id"], day_str, sessions_index)
+                key = (user["_id"], day_str)
+                daily_data = await get_daily_data(
+                    user["_id"], day_str, session_data,
+                    activities_index.get(key, []), summaries_index.get(key)
+                )
                 days_data.append(daily_data)
             
             history_data.append(HistoryData(
@@ -231,7 +249,7 @@ async def get_session_history(
 ):
     """Get session history for a user."""
     try:
-        collections = get_collections()
+        collections = await get_collections()
         users = collections["users"]
         sessions = collections["sessions"]
         
@@ -298,7 +316,7 @@ async def get_activity_history(
 ):
     """Get activity history for a user."""
     try:
-        collections = get_collections()
+        collections = await get_collections()
         users = collections["users"]
         activities = collections["activities"]
         
@@ -360,7 +378,7 @@ async def get_daily_summaries(
 ):
     """Get daily summaries for a user."""
     try:
-        collections = get_collections()
+        collections = await get_collections()
         users = collections["users"]
         daily_summaries = collections["daily_summaries"]
         
@@ -423,7 +441,7 @@ async def generate_report(
 ):
     """Generate a comprehensive report for a user."""
     try:
-        collections = get_collections()
+        collections = await get_collections()
         users = collections["users"]
         sessions = collections["sessions"]
         activities = collections["activities"]
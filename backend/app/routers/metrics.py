@@ -2,11 +2,13 @@ from fastapi import APIRouter, HTTPException, Request
 from datetime import datetime, timezone, timedelta
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, ConfigDict
+import logging
 
 from ..services.mongodb import get_database
 from ..utils.helpers import ensure_timezone_aware, normalize_app_names
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class MetricsData(BaseModel):
     username: str
@@ -34,7 +36,7 @@ def serialize_date(date_obj):
             return date_obj
         return str(date_obj)
     except Exception as e:
-        print(f"Error serializing date: {e}")
+        logger.error("Error serializing date: %s", e, exc_info=True)
         return str(date_obj)
 
 @router.get("/metrics/system")
@@ -102,7 +104,7 @@ async def get_system_metrics():
         pipeline = [
             {
                 "$match": {
-                    "date": {"$gte": week_start.date()}
+                    "date": {"$gte": week_start.strftime("%Y-%m-%d")}
                 }
             },
             {
@@ -142,7 +144,7 @@ async def get_system_metrics():
                     "unique_users": len(stat["unique_users"])
                 })
             except Exception as e:
-                print(f"Error processing stat: {e}")
+                logger.error("Error processing stat: %s", e, exc_info=True)
                 continue
         
         return {
@@ -160,7 +162,7 @@ async def get_system_metrics():
         }
         
     except Exception as e:
-        print(f"Error in get_system_metrics: {str(e)}")
+        logger.error("Error in get_system_metrics: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/metrics/user")
@@ -270,5 +272,5 @@ async def get_user_metrics(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_user_metrics: {str(e)}")
+        logger.error("Error in get_user_metrics: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
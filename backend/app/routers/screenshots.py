@@ -4,18 +4,90 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, ConfigDict
 import boto3
 import os
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from pymongo import UpdateOne
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from datetime import datetime, timezone
+from functools import lru_cache
+import asyncio
 import hashlib
+import hmac
+import io
+import orjson
+from PIL import Image
+import logging
 
 
-from ..services.mongodb import get_database
-from ..utils.helpers import ensure_timezone_aware
+from ..services.mongodb import get_database, get_collections
+from ..services.s3 import (
+    run_in_s3_pool,
+    SCREENSHOT_CONTENT_TYPES,
+    screenshot_extension,
+    is_screenshot_key,
+    thumbnail_key
+)
+from ..utils.helpers import ensure_timezone_aware, is_valid_date
+from ..core.cache import Cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
+# S3 settings, resolved once at import time
+AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
+S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME', 'km-wfh-monitoring-bucket')
+_URL_PREFIX = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/"
+
+# Uploads are hashed in 1 MiB chunks
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Thumbnails are written next to each upload as <name>-thumb.png
+GENERATE_THUMBNAILS = os.getenv('GENERATE_THUMBNAILS', 'true').lower() == 'true'
+THUMBNAIL_SIZE = (256, 256)
+
+# Screenshots above 8 MiB are uploaded as parallel multipart chunks
+UPLOAD_MAX_CONCURRENCY = 8
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=UPLOAD_MAX_CONCURRENCY,
+    use_threads=True
+)
+
+# The connection pool is shared by concurrent requests and multipart parts,
+# so it is sized well above botocore's default of 10
+_BOTO_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    tcp_keepalive=True
+)
+
+# Serialized listings keyed by "username/date". Today's folder still receives
+# uploads so it is only cached briefly; past folders are immutable. Both are
+# bounded, since the key comes from the client.
+LISTING_CACHE_SIZE = 256
+_today_listings = Cache(ttl=30, maxsize=LISTING_CACHE_SIZE)
+_past_listings = Cache(ttl=86400, maxsize=LISTING_CACHE_SIZE)
+_inflight_listings: Dict[str, asyncio.Future] = {}
+
+def _listing_cache(date: str) -> Cache:
+    """Pick the listing cache whose TTL matches the given date folder."""
+    if date < datetime.now(timezone.utc).strftime("%Y-%m-%d"):
+        return _past_listings
+    return _today_listings
+
+def invalidate_screenshot_listing(username: str, date: str) -> None:
+    """Drop any cached listing for a user's date folder."""
+    cache_key = f"{username}/{date}"
+    _today_listings.delete(cache_key, "screenshots")
+    _past_listings.delete(cache_key, "screenshots")
+
+# These models document the listing's wire format. The listing is built from
+# trusted S3/MongoDB fields and serialized directly, so they are never
+# instantiated per item on the request path.
 class ScreenshotData(BaseModel):
     url: str
     thumbnail_url: Optional[str] = None
@@ -36,82 +108,184 @@ class ScreenshotsResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+@lru_cache(maxsize=1)
 def get_s3_client():
-    """Get S3 client with error handling."""
+    """Get the shared S3 client, creating it on first use."""
     try:
         return boto3.client(
             's3',
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'us-east-1')
+            region_name=AWS_REGION,
+            config=_BOTO_CONFIG
         )
     except Exception as e:
-        print(f"Error initializing S3 client: {str(e)}")
+        logger.error("Error initializing S3 client: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to initialize S3 client")
 
-@router.get("/screenshots")
-async def list_screenshots(username: str, date: str):
+@router.get("/screenshots", responses={200: {"model": ScreenshotsResponse}})
+async def list_screenshots(username: str, date: str, refresh: bool = False):
     """Get screenshots for a user on a specific date."""
     try:
         # Validate date format
-        try:
-            datetime.strptime(date, "%Y-%m-%d")
-        except ValueError:
+        if not is_valid_date(date):
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
-        # Initialize S3 client
-        s3_client = get_s3_client()
-        S3_BUCKET = os.getenv('S3_BUCKET_NAME', 'km-wfh-monitoring-bucket')
-        
-        # List objects in the S3 folder
-        prefix = f"{username}/{date}/"
+        cache = _listing_cache(date)
+        cache_key = f"{username}/{date}"
+        if not refresh:
+            cached = cache.get(cache_key, "screenshots")
+            if cached is not None:
+                return Response(content=cached, media_type="application/json")
+
+        # Only one request per folder builds the listing; concurrent callers
+        # await the same future instead of issuing their own query
+        inflight = _inflight_listings.get(cache_key)
+        if inflight is not None:
+            body = await asyncio.shield(inflight)
+            return Response(content=body, media_type="application/json")
+
+        inflight = asyncio.get_running_loop().create_future()
+        _inflight_listings[cache_key] = inflight
         try:
-            response = s3_client.list_objects_v2(
-                Bucket=S3_BUCKET,
-                Prefix=prefix
-            )
+            body = await _fetch_screenshot_listing(username, date)
+            cache.set(cache_key, body, "screenshots")
+            inflight.set_result(body)
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error accessing S3: {str(e)}")
-        
-        # Extract screenshot URLs
-        screenshots = []
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                if obj['Key'].endswith('.png'):
-                    url = f"https://{S3_BUCKET}.s3.{os.getenv('AWS_REGION', 'us-east-1')}.amazonaws.com/{obj['Key']}"
-                    # Generate thumbnail URL if available
-                    thumbnail_key = obj['Key'].replace('.png', '-thumb.png')
-                    thumbnail_url = f"https://{S3_BUCKET}.s3.{os.getenv('AWS_REGION', 'us-east-1')}.amazonaws.com/{thumbnail_key}"
-                    
-                    screenshots.append(ScreenshotData(
-                        url=url,
-                        thumbnail_url=thumbnail_url,
-                        key=obj['Key'],
-                        timestamp=obj['LastModified'].isoformat(),
-                        size=obj['Size'],
-                        last_modified=obj['LastModified'].isoformat()
-                    ))
-        
-        # Sort screenshots by timestamp
-        screenshots.sort(key=lambda x: x.timestamp, reverse=True)
-        
-        # Prepare response
-        response = ScreenshotsResponse(
-            screenshots=screenshots,
-            count=len(screenshots),
-            username=username,
-            date=date,
-            timestamp=datetime.now(timezone.utc).isoformat(),
-            message="No screenshots found for this date" if not screenshots else None
-        )
-        
-        return response
+            inflight.set_exception(e)
+            # Mark the exception retrieved in case nobody else was waiting
+            inflight.exception()
+            raise
+        finally:
+            if not inflight.done():
+                inflight.cancel()
+            _inflight_listings.pop(cache_key, None)
+
+        return Response(content=body, media_type="application/json")
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _list_s3_screenshots(username: str, date: str) -> List[Dict[str, Any]]:
+    """List a user's date folder in S3 as screenshot index records."""
+    # Initialize S3 client
+    s3_client = get_s3_client()
+    
+    # List objects in the S3 folder, following continuation tokens so
+    # listings larger than a single page (1000 keys) are not truncated
+    prefix = f"{username}/{date}/"
+    paginator = s3_client.get_paginator('list_objects_v2')
+    
+    # Only Key, Size and LastModified are used from each object
+    records = []
+    try:
+        for page in paginator.paginate(
+            Bucket=S3_BUCKET_NAME,
+            Prefix=prefix,
+            PaginationConfig={'PageSize': 1000}
+        ):
+            for obj in page.get('Contents', ()):
+                key = obj['Key']
+                if not is_screenshot_key(key):
+                    continue
+
+                records.append({
+                    "username": username,
+                    "date": date,
+                    "key": key,
+                    "size": obj['Size'],
+                    "last_modified": obj['LastModified']
+                })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error accessing S3: {str(e)}")
+    
+    return records
+
+async def _fetch_screenshot_listing(username: str, date: str) -> bytes:
+    """Read a user's screenshots for a date from the index and serialize them."""
+    collections = await get_collections()
+    screenshots_index = collections["screenshots"]
+    folder_id = f"{username}/{date}"
+    
+    # Every folder is listed from S3 once and merged into the index, so
+    # objects written before the index existed (or by older trackers) show up
+    # even when the folder already has some indexed uploads. A marker
+    # document records the backfill so later reads only touch MongoDB.
+    marker = await collections["screenshot_folders"].find_one({"_id": folder_id}, {"_id": 1})
+    if marker is None:
+        s3_records = await run_in_s3_pool(_list_s3_screenshots, username, date)
+        if s3_records:
+            # $setOnInsert keeps the fields recorded at upload time
+            await screenshots_index.bulk_write(
+                [
+                    UpdateOne({"key": record["key"]}, {"$setOnInsert": record}, upsert=True)
+                    for record in s3_records
+                ],
+                ordered=False
+            )
+        await collections["screenshot_folders"].update_one(
+            {"_id": folder_id},
+            {"$set": {"backfilled_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    
+    records = await screenshots_index.find(
+        {"username": username, "date": date},
+        {"_id": 0, "key": 1, "size": 1, "last_modified": 1}
+    ).sort("last_modified", -1).to_list(length=None)
+    
+    screenshots = []
+    for record in records:
+        key = record["key"]
+        last_modified = ensure_timezone_aware(record["last_modified"]).isoformat()
+        screenshots.append({
+            "url": _URL_PREFIX + key,
+            "thumbnail_url": _URL_PREFIX + thumbnail_key(key),
+            "key": key,
+            "timestamp": last_modified,
+            "size": record["size"],
+            "last_modified": last_modified
+        })
+    
+    # Prepare response in the ScreenshotsResponse shape; the dicts are built
+    # from stored fields directly, so they are serialized without re-validation
+    return orjson.dumps({
+        "screenshots": screenshots,
+        "count": len(screenshots),
+        "username": username,
+        "date": date,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "message": "No screenshots found for this date" if not screenshots else None
+    })
+
+def _upload_thumbnail(s3_client, fileobj, key: str) -> None:
+    """Downscale an uploaded screenshot and store it as the key's thumbnail."""
+    fileobj.seek(0)
+    with Image.open(fileobj) as image:
+        image.draft('RGB', THUMBNAIL_SIZE)
+        image.thumbnail(THUMBNAIL_SIZE)
+        thumbnail = io.BytesIO()
+        image.save(thumbnail, format='PNG', optimize=True)
+    
+    s3_client.put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=thumbnail_key(key),
+        Body=thumbnail.getvalue(),
+        ContentType='image/png'
+    )
+
+async def _s3_object_exists(s3_client, key: str) -> bool:
+    """HEAD an object, treating 404 as missing and re-raising other errors."""
+    try:
+        await run_in_s3_pool(s3_client.head_object, Bucket=S3_BUCKET_NAME, Key=key)
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+            return False
+        raise
+
 @router.post("/screenshots/upload")
 async def upload_screenshot(
     screenshot: UploadFile = File(...),
@@ -122,51 +296,92 @@ async def upload_screenshot(
     timestamp: str = Form(...)
 ):
     """Handle screenshot uploads from the tracker app"""
+    upload_time = datetime.now(timezone.utc)
     try:
-        # Read the screenshot data
-        screenshot_bytes = await screenshot.read()
+        # Hash the upload in chunks straight from the spooled file Starlette
+        # already wrote it to, then rewind so boto3 can stream the same file
+        hasher = hashlib.sha256()
+        size = 0
+        while chunk := await screenshot.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+            size += len(chunk)
+        await screenshot.seek(0)
         
-        # Verify file hash
-        file_hash = hashlib.sha256(screenshot_bytes).hexdigest()
-        if file_hash != hash:
+        # Verify file hash with a constant-time digest comparison
+        try:
+            expected_digest = bytes.fromhex(hash)
+        except ValueError:
+            expected_digest = b""
+        if not hmac.compare_digest(hasher.digest(), expected_digest):
             raise HTTPException(
                 status_code=400, 
                 detail="File hash verification failed"
             )
 
-        # Generate S3 key using the provided structure
-        s3_key = f"{username}/{date_folder}/{filename}"
+        # Objects are content-addressed by their SHA-256 so identical
+        # captures (retries, idle screens) map to the same key
+        extension = screenshot_extension(filename)
+        s3_key = f"{username}/{date_folder}/{hasher.hexdigest()}{extension}"
         
         # Initialize S3 client
         s3_client = get_s3_client()
-        S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME', 'km-wfh-monitoring-bucket')
         
-        # Upload to S3 with metadata
+        # Upload to S3 with metadata, unless the same content is already stored
         try:
-            s3_client.put_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=s3_key,
-                Body=screenshot_bytes,
-                ContentType='image/png',
-                Metadata={
-                    'username': username,
-                    'date': date_folder,
-                    'hash': hash,
-                    'filename': filename,
-                    'timestamp': timestamp,
-                    'upload_time': datetime.now(timezone.utc).isoformat()
-                }
+            already_stored = await _s3_object_exists(s3_client, s3_key)
+            if not already_stored:
+                await run_in_s3_pool(
+                    s3_client.upload_fileobj,
+                    screenshot.file,
+                    S3_BUCKET_NAME,
+                    s3_key,
+                    ExtraArgs={
+                        'ContentType': SCREENSHOT_CONTENT_TYPES[extension],
+                        'Metadata': {
+                            'username': username,
+                            'date': date_folder,
+                            'hash': hash,
+                            'filename': filename,
+                            'timestamp': timestamp,
+                            'upload_time': upload_time.isoformat()
+                        }
+                    },
+                    Config=_TRANSFER_CONFIG
+                )
+                
+                # A missing thumbnail only degrades the dashboard, so it
+                # never fails the upload itself
+                if GENERATE_THUMBNAILS:
+                    try:
+                        await run_in_s3_pool(_upload_thumbnail, s3_client, screenshot.file, s3_key)
+                    except Exception as e:
+                        logger.error("Error generating thumbnail for %s: %s", s3_key, e, exc_info=True)
+            
+            # Record the upload in the screenshot index read by list_screenshots
+            collections = await get_collections()
+            await collections["screenshots"].update_one(
+                {"key": s3_key},
+                {"$set": {
+                    "username": username,
+                    "date": date_folder,
+                    "key": s3_key,
+                    "filename": filename,
+                    "size": size,
+                    "last_modified": upload_time
+                }},
+                upsert=True
             )
+            invalidate_screenshot_listing(username, date_folder)
             
             return JSONResponse(
                 status_code=200,
                 content={
-                    "message": "Screenshot uploaded successfully",
+                    "message": "Screenshot already stored" if already_stored else "Screenshot uploaded successfully",
                     "filename": s3_key
                 }
             )
             
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"S3 upload failed: {str(e)}"
@@ -252,27 +467,34 @@ async def delete_screenshot(key: str):
     try:
         # Initialize S3 client
         s3_client = get_s3_client()
-        S3_BUCKET = os.getenv('S3_BUCKET', 'km-wfh-monitoring-bucket')
         
-        # Delete from S3
+        # Delete the screenshot and its thumbnail in a single request
         try:
-            s3_client.delete_object(
-                Bucket=S3_BUCKET,
-                Key=key
+            response = await run_in_s3_pool(
+                s3_client.delete_objects,
+                Bucket=S3_BUCKET_NAME,
+                Delete={
+                    'Objects': [{'Key': key}, {'Key': thumbnail_key(key)}],
+                    'Quiet': True
+                }
             )
         except ClientError as e:
-            print(f"S3 delete error: {str(e)}")
+            logger.error("S3 delete error: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail="Failed to delete screenshot from S3")
         
-        # Also delete thumbnail if it exists
-        thumbnail_key = key.replace('.png', '-thumb.png')
-        try:
-            s3_client.delete_object(
-                Bucket=S3_BUCKET,
-                Key=thumbnail_key
-            )
-        except ClientError:
-            pass  # Ignore if thumbnail doesn't exist
+        # Quiet mode only reports failures; ignore the thumbnail's
+        for error in response.get('Errors', ()):
+            if error.get('Key') == key and error.get('Code') != 'NoSuchKey':
+                logger.error("S3 delete error: %s %s", error.get('Code'), error.get('Message'))
+                raise HTTPException(status_code=500, detail="Failed to delete screenshot from S3")
+        
+        collections = await get_collections()
+        await collections["screenshots"].delete_one({"key": key})
+        
+        # Keys are laid out as username/date/filename
+        parts = key.split('/')
+        if len(parts) >= 3:
+            invalidate_screenshot_listing(parts[0], parts[1])
         
         return {
             "status": "success",
@@ -283,5 +505,5 @@ async def delete_screenshot(key: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in delete_screenshot: {str(e)}")
+        logger.error("Error in delete_screenshot: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,14 +1,53 @@
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Dict, Any, Set
+from pydantic import BaseModel, ConfigDict, field_validator
 from bson import ObjectId
+from pymongo import ReturnDocument
+import asyncio
+import logging
 
 from ..services.mongodb import get_database, get_collections
 from ..models.database import User, Session
 from ..utils.helpers import ensure_timezone_aware
+from ..core.cache import Cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Bound once; the clock is read on every session request
+_utc = timezone.utc
+_now = datetime.now
+
+# Fields read from the latest session document by the session endpoints
+LATEST_SESSION_PROJECTION = {
+    "_id": 1,
+    "start_time": 1,
+    "screen_shared": 1,
+    "screen_share_time": 1,
+    "event": 1,
+    "channel": 1,
+    "timestamp": 1,
+    "active_app": 1,
+    "active_apps": 1
+}
+
+# Session status responses by username, kept for one second; bounded so
+# polling for many (or made-up) usernames can't grow it without limit
+_status_cache = Cache(ttl=1, maxsize=1024)
+
+# Status lookups arriving within STATUS_BATCH_WINDOW seconds of each other are
+# answered by one query; each username has at most one pending future
+STATUS_BATCH_WINDOW = 0.005
+_status_waiters: Dict[str, asyncio.Future] = {}
+_status_batch: List[str] = []
+# Strong references to running flushes; the event loop only keeps weak ones
+_status_flush_tasks: Set[asyncio.Task] = set()
+
+def _elapsed_seconds(end_time) -> Dict[str, Any]:
+    """Aggregation expression for whole seconds from $start_time to end_time."""
+    return {"$toInt": {"$divide": [{"$subtract": [end_time, "$start_time"]}, 1000]}}
 
 class SessionData(BaseModel):
     username: str
@@ -20,6 +59,12 @@ class SessionData(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("timestamp")
+    @classmethod
+    def timestamp_is_aware(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """Treat naive client timestamps as UTC once, at the boundary."""
+        return ensure_timezone_aware(value)
+
 @router.post("/session")
 async def handle_session(data: SessionData):
     """Handle session events (join, leave, start/stop streaming)."""
@@ -32,28 +77,29 @@ async def handle_session(data: SessionData):
         if data.event not in ['joined', 'left', 'started_streaming', 'stopped_streaming']:
             raise HTTPException(status_code=400, detail="Invalid event type")
         
-        # Get or create user
-        user = await users.find_one({"username": data.username})
-        if not user:
-            user = {
-                "username": data.username,
-                "display_name": data.display_name or data.username,
-                "created_at": datetime.now(timezone.utc)
-            }
-            result = await users.insert_one(user)
-            user["_id"] = result.inserted_id
+        # Read the clock once so every field written for this event agrees
+        now = _now(_utc)
         
-        # Update user's display_name if provided
+        # Get or create user, updating display_name if provided, in one
+        # atomic round-trip
+        user_update = {"$setOnInsert": {"created_at": now}}
         if data.display_name:
-            await users.update_one(
-                {"_id": user["_id"]},
-                {"$set": {"display_name": data.display_name}}
-            )
+            user_update["$set"] = {"display_name": data.display_name}
+        else:
+            user_update["$setOnInsert"]["display_name"] = data.username
+        user = await users.find_one_and_update(
+            {"username": data.username},
+            user_update,
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
         
-        # Use provided timestamp or current time, ensuring it's timezone-aware
-        current_time = data.timestamp if data.timestamp else datetime.now(timezone.utc)
-        if current_time.tzinfo is None:
-            current_time = current_time.replace(tzinfo=timezone.utc)
+        # Use provided timestamp (already timezone-aware) or current time
+        current_time = data.timestamp if data.timestamp else now
+        
+        # Close events without a client timestamp use the server clock
+        event_time = current_time if data.timestamp else "$$NOW"
         
         # Handle different events
         if data.event == "joined":
@@ -72,87 +118,70 @@ async def handle_session(data: SessionData):
             await sessions.insert_one(session)
             
         elif data.event == "left":
-            # Find latest session
-            latest_session = await sessions.find_one(
-                {"user_id": user["_id"]},
+            # Close the user's open session, computing its duration on the
+            # server so no read round-trip is needed
+            await sessions.find_one_and_update(
+                {"user_id": user["_id"], "stop_time": None, "start_time": {"$ne": None}},
+                [{
+                    "$set": {
+                        "stop_time": event_time,
+                        "channel": None,
+                        "event": "left",
+                        "timestamp": event_time,
+                        "total_working_hours": _elapsed_seconds(event_time)
+                    }
+                }],
+                projection={"_id": 1},
                 sort=[("timestamp", -1)]
             )
             
-            if latest_session:
-                start_time = latest_session.get("start_time")
-                if start_time:
-                    # Ensure start_time is timezone-aware
-                    start_time = ensure_timezone_aware(start_time)
-                    duration = (current_time - start_time).total_seconds()
-                    await sessions.update_one(
-                        {"_id": latest_session["_id"]},
-                        {
-                            "$set": {
-                                "stop_time": current_time,
-                                "channel": None,
-                                "event": "left",
-                                "timestamp": current_time,
-                                "total_working_hours": int(duration)
-                            }
-                        }
-                    )
-            
         elif data.event == "started_streaming":
-            # Find or create session
-            latest_session = await sessions.find_one(
+            # Update the latest session, or create one if the user has none
+            await sessions.find_one_and_update(
                 {"user_id": user["_id"]},
-                sort=[("timestamp", -1)]
-            )
-            
-            if latest_session:
-                await sessions.update_one(
-                    {"_id": latest_session["_id"]},
-                    {
-                        "$set": {
-                            "screen_shared": True,
-                            "start_time": current_time,
-                            "channel": data.channel,
-                            "event": "started_streaming",
-                            "timestamp": current_time
-                        }
+                {
+                    "$set": {
+                        "screen_shared": True,
+                        "start_time": current_time,
+                        "channel": data.channel,
+                        "event": "started_streaming",
+                        "timestamp": current_time
+                    },
+                    "$setOnInsert": {
+                        "screen_share_time": 0,
+                        "stop_time": None,
+                        "total_working_hours": 0
                     }
-                )
-            else:
-                session = {
-                    "user_id": user["_id"],
-                    "channel": data.channel,
-                    "screen_shared": True,
-                    "screen_share_time": 0,
-                    "start_time": current_time,
-                    "stop_time": None,
-                    "event": "started_streaming",
-                    "timestamp": current_time,
-                    "total_working_hours": 0
-                }
-                await sessions.insert_one(session)
+                },
+                projection={"_id": 1},
+                sort=[("timestamp", -1)],
+                upsert=True
+            )
                 
         elif data.event == "stopped_streaming":
-            latest_session = await sessions.find_one(
-                {"user_id": user["_id"]},
+            # Add the streamed time to the open session server-side; the
+            # $set stage reads start_time before it is cleared
+            await sessions.find_one_and_update(
+                {"user_id": user["_id"], "stop_time": None, "start_time": {"$ne": None}},
+                [{
+                    "$set": {
+                        "screen_share_time": {
+                            "$add": [
+                                {"$ifNull": ["$screen_share_time", 0]},
+                                _elapsed_seconds(event_time)
+                            ]
+                        },
+                        "screen_shared": False,
+                        "start_time": None,
+                        "event": "stopped_streaming",
+                        "timestamp": event_time
+                    }
+                }],
+                projection={"_id": 1},
                 sort=[("timestamp", -1)]
             )
-            
-            if latest_session and latest_session.get("start_time"):
-                start_time = ensure_timezone_aware(latest_session["start_time"])
-                duration = (current_time - start_time).total_seconds()
-                
-                await sessions.update_one(
-                    {"_id": latest_session["_id"]},
-                    {
-                        "$inc": {"screen_share_time": int(duration)},
-                        "$set": {
-                            "screen_shared": False,
-                            "start_time": None,
-                            "event": "stopped_streaming",
-                            "timestamp": current_time
-                        }
-                    }
-                )
+        
+        _status_cache.delete(data.username, "sessions")
         
         return {
             "status": "success",
@@ -164,56 +193,117 @@ async def handle_session(data: SessionData):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in handle_session: {str(e)}")
+        logger.error("Error in handle_session: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _format_session_status(user: Dict[str, Any], session: Optional[Dict[str, Any]], last_update: str) -> Dict[str, Any]:
+    """Build the /session_status payload for a user and their latest session."""
+    response = {
+        "username": user["username"],
+        "display_name": user.get("display_name", user["username"]),
+        "screen_shared": False,
+        "channel": None,
+        "timestamp": None,
+        "active_app": None,
+        "active_apps": [],
+        "last_event": None,
+        "last_update": last_update
+    }
+    
+    # Update response with session data if available
+    if session:
+        response.update({
+            "screen_shared": session.get("screen_shared", False),
+            "channel": session.get("channel"),
+            "timestamp": session.get("timestamp").isoformat() if session.get("timestamp") else None,
+            "active_app": session.get("active_app"),
+            "active_apps": session.get("active_apps", []),
+            "last_event": session.get("event")
+        })
+    
+    return response
+
+async def _load_session_status(username: str) -> Optional[Dict[str, Any]]:
+    """Get a user's status, sharing one batched query with concurrent callers.
+
+    Returns None if the user does not exist.
+    """
+    future = _status_waiters.get(username)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        _status_waiters[username] = future
+        if not _status_batch:
+            loop.call_later(STATUS_BATCH_WINDOW, _start_status_flush)
+        _status_batch.append(username)
+    return await asyncio.shield(future)
+
+def _start_status_flush() -> None:
+    """Run the pending status batch, keeping the task alive until it finishes."""
+    task = asyncio.get_running_loop().create_task(_flush_status_batch())
+    _status_flush_tasks.add(task)
+    task.add_done_callback(_status_flush_tasks.discard)
+
+async def _flush_status_batch() -> None:
+    """Resolve every queued status lookup with one users and one sessions query."""
+    usernames = _status_batch[:]
+    _status_batch.clear()
+    try:
+        collections = await get_collections()
+        users = await collections["users"].find(
+            {"username": {"$in": usernames}},
+            {"_id": 1, "username": 1, "display_name": 1}
+        ).to_list(length=None)
+        
+        # Sorting on (user_id, timestamp desc) before $group/$first lets the
+        # (user_id, timestamp) index pick each user's latest session directly
+        latest_sessions = await collections["sessions"].aggregate([
+            {"$match": {"user_id": {"$in": [user["_id"] for user in users]}}},
+            {"$sort": {"user_id": 1, "timestamp": -1}},
+            {"$group": {"_id": "$user_id", "session": {"$first": "$$ROOT"}}},
+            {"$project": {
+                "session." + field: 1 for field in LATEST_SESSION_PROJECTION
+            }}
+        ]).to_list(length=None)
+        sessions_by_user = {row["_id"]: row["session"] for row in latest_sessions}
+        
+        # One clock read stamps every status answered by this batch
+        last_update = _now(_utc).isoformat()
+        statuses = {
+            user["username"]: _format_session_status(user, sessions_by_user.get(user["_id"]), last_update)
+            for user in users
+        }
+        for username in usernames:
+            _status_waiters.pop(username).set_result(statuses.get(username))
+    except Exception as e:
+        for username in usernames:
+            future = _status_waiters.pop(username, None)
+            if future is not None:
+                future.set_exception(e)
+                # Mark the exception retrieved in case every waiter went away
+                future.exception()
+
 @router.get("/session_status")
 async def get_session_status(username: str):
     """Get current session status for a user."""
     try:
-        collections = await get_collections()
-        users = collections["users"]
-        sessions = collections["sessions"]
+        # Dashboards poll this endpoint; serve repeats within a second from
+        # memory. handle_session drops the entry when the user posts an event.
+        response = _status_cache.get(username, "sessions")
+        if response is not None:
+            return ORJSONResponse(response)
         
-        # Get user
-        user = await users.find_one({"username": username})
-        if not user:
+        response = await _load_session_status(username)
+        if response is None:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Get latest session
-        session = await sessions.find_one(
-            {"user_id": user["_id"]},
-            sort=[("timestamp", -1)]
-        )
-        
-        # Format response
-        response = {
-            "username": user["username"],
-            "display_name": user.get("display_name", user["username"]),
-            "screen_shared": False,
-            "channel": None,
-            "timestamp": None,
-            "active_app": None,
-            "active_apps": [],
-            "last_event": None,
-            "last_update": datetime.now(timezone.utc).isoformat()
-        }
-        
-        # Update response with session data if available
-        if session:
-            response.update({
-                "screen_shared": session.get("screen_shared", False),
-                "channel": session.get("channel"),
-                "timestamp": session.get("timestamp").isoformat() if session.get("timestamp") else None,
-                "active_app": session.get("active_app"),
-                "active_apps": session.get("active_apps", []),
-                "last_event": session.get("event")
-            })
+        _status_cache.set(username, response, "sessions")
         
-        return response
+        # Every value is already JSON-native, so skip jsonable_encoder
+        return ORJSONResponse(response)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_session_status: {str(e)}")
+        logger.error("Error in get_session_status: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
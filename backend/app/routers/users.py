@@ -1,12 +1,18 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
 from typing import List, Optional
 from datetime import datetime, timezone
 from bson import ObjectId
-from ..services.mongodb import get_database
+import asyncio
+import orjson
+from ..services.mongodb import get_collections
 from ..utils.helpers import serialize_mongodb_doc
 
 router = APIRouter()
 
+_utc = timezone.utc
+_now = datetime.now
+
 @router.get("/users")
 async def get_users(
     page: int = Query(1, ge=1),
@@ -14,30 +20,32 @@ async def get_users(
 ):
     """Get a paginated list of users"""
     try:
-        db = get_database()
-        users_collection = db.users
+        users_collection = (await get_collections())["users"]
         
         # Calculate skip value for pagination
         skip = (page - 1) * per_page
         
-        # Get total count for pagination
-        total_users = await users_collection.count_documents({})
-        
-        # Get users for current page
-        users = await users_collection.find().skip(skip).limit(per_page).to_list(length=per_page)
-        
-        # Serialize the response
-        serialized_users = serialize_mongodb_doc(users)
+        # The unfiltered total comes from collection metadata, and both
+        # queries run concurrently
+        total_users, users = await asyncio.gather(
+            users_collection.estimated_document_count(),
+            users_collection.find().skip(skip).limit(per_page).to_list(length=per_page)
+        )
         
-        return {
-            "data": serialized_users,
-            "pagination": {
-                "total": total_users,
-                "page": page,
-                "per_page": per_page,
-                "pages": (total_users + per_page - 1) // per_page
-            }
-        }
+        # Encode straight to JSON bytes; orjson handles datetimes natively
+        # and ObjectIds fall back to str
+        return Response(
+            content=orjson.dumps({
+                "data": users,
+                "pagination": {
+                    "total": total_users,
+                    "page": page,
+                    "per_page": per_page,
+                    "pages": (total_users + per_page - 1) // per_page
+                }
+            }, default=str),
+            media_type="application/json"
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -45,8 +53,7 @@ async def get_users(
 async def get_user(username: str):
     """Get a specific user by username"""
     try:
-        db = get_database()
-        users_collection = db.users
+        users_collection = (await get_collections())["users"]
         
         user = await users_collection.find_one({"username": username})
         if not user:
@@ -62,8 +69,7 @@ async def get_user(username: str):
 async def create_user(username: str, display_name: Optional[str] = None):
     """Create a new user"""
     try:
-        db = get_database()
-        users_collection = db.users
+        users_collection = (await get_collections())["users"]
         
         # Check if user already exists
         existing_user = await users_collection.find_one({"username": username})
@@ -74,7 +80,7 @@ async def create_user(username: str, display_name: Optional[str] = None):
         user_data = {
             "username": username,
             "display_name": display_name or username,
-            "created_at": datetime.now(timezone.utc)
+            "created_at": _now(_utc)
         }
         
         result = await users_collection.insert_one(user_data)
@@ -90,8 +96,7 @@ async def create_user(username: str, display_name: Optional[str] = None):
 async def update_user(username: str, display_name: Optional[str] = None):
     """Update a user's information"""
     try:
-        db = get_database()
-        users_collection = db.users
+        users_collection = (await get_collections())["users"]
         
         # Check if user exists
         user = await users_collection.find_one({"username": username})
@@ -127,8 +132,7 @@ async def update_user(username: str, display_name: Optional[str] = None):
 async def delete_user(username: str):
     """Delete a user"""
     try:
-        db = get_database()
-        users_collection = db.users
+        users_collection = (await get_collections())["users"]
         
         # Check if user exists
         user = await users_collection.find_one({"username": username})
@@ -8,7 +8,8 @@ from .s3 import (
     upload_file,
     get_file_url,
     list_files,
-    delete_file
+    delete_file,
+    run_in_s3_pool
 )
 
 __all__ = [
@@ -19,5 +20,6 @@ __all__ = [
     'upload_file',
     'get_file_url',
     'list_files',
-    'delete_file'
+    'delete_file',
+    'run_in_s3_pool'
 ] 
\ No newline at end of file
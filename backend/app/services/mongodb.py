@@ -1,11 +1,18 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from pymongo import IndexModel
+
+from ..core.exceptions import ServiceUnavailableError
+from typing import Optional, Dict, Any, List
+import asyncio
 import os
 from dotenv import load_dotenv
+import logging
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # MongoDB connection settings
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'wfh_monitoring')
@@ -17,13 +24,35 @@ users_collection = None
 sessions_collection = None
 activities_collection = None
 daily_summaries_collection = None
+screenshots_collection = None
+screenshot_folders_collection = None
+
+# Collection handles by name, built once a connection is established
+_collections: Optional[Dict[str, Any]] = None
+# Serializes reconnect attempts so a burst of requests opens one client
+_connect_lock = asyncio.Lock()
+
+async def _ensure_indexes(collection, indexes: List[IndexModel]) -> None:
+    """Create the indexes a collection is missing, skipping the write on warm starts."""
+    existing = {index["name"] async for index in collection.list_indexes()}
+    missing = [index for index in indexes if index.document["name"] not in existing]
+    if missing:
+        await collection.create_indexes(missing)
 
 async def connect_to_mongodb():
     """Create database connection."""
-    global client, db, users_collection, sessions_collection, activities_collection, daily_summaries_collection
+    global client, db, users_collection, sessions_collection, activities_collection, daily_summaries_collection, screenshots_collection, screenshot_folders_collection, _collections
     
     try:
-        client = AsyncIOMotorClient(MONGO_URI)
+        # minPoolSize keeps warm connections so the first requests skip the
+        # handshake; zstd falls back to zlib if the server lacks it
+        client = AsyncIOMotorClient(
+            MONGO_URI,
+            maxPoolSize=50,
+            minPoolSize=10,
+            serverSelectionTimeoutMS=5000,
+            compressors="zstd,zlib"
+        )
         db = client[DATABASE_NAME]
         
         # Initialize collections
@@ -31,18 +60,47 @@ async def connect_to_mongodb():
         sessions_collection = db.sessions
         activities_collection = db.activities
         daily_summaries_collection = db.daily_summaries
+        screenshots_collection = db.screenshots
+        # One marker per username/date folder already backfilled from S3
+        screenshot_folders_collection = db.screenshot_folders
         
-        # Create indexes
-        await users_collection.create_index("username", unique=True)
-        await sessions_collection.create_index([("user_id", 1), ("timestamp", -1)])
-        await sessions_collection.create_index([("user_id", 1), ("start_time", 1)])
-        await sessions_collection.create_index([("user_id", 1), ("stop_time", -1)])
-        await activities_collection.create_index([("user_id", 1), ("date", 1), ("app_name", 1)])
-        await daily_summaries_collection.create_index([("user_id", 1), ("date", 1)])
+        # Create missing indexes; each collection costs one listIndexes
+        # round-trip, plus one createIndexes only when something is missing.
+        # (user_id, start_time) and (user_id, stop_time) back the dashboard's
+        # first-join/last-leave range queries and the open-session lookup.
+        await asyncio.gather(
+            _ensure_indexes(users_collection, [
+                IndexModel([("username", 1)], unique=True)
+            ]),
+            _ensure_indexes(sessions_collection, [
+                IndexModel([("user_id", 1), ("timestamp", -1)]),
+                IndexModel([("user_id", 1), ("start_time", 1)]),
+                IndexModel([("user_id", 1), ("stop_time", -1)])
+            ]),
+            _ensure_indexes(activities_collection, [
+                IndexModel([("user_id", 1), ("date", 1), ("app_name", 1)])
+            ]),
+            _ensure_indexes(daily_summaries_collection, [
+                IndexModel([("user_id", 1), ("date", 1)])
+            ]),
+            _ensure_indexes(screenshots_collection, [
+                IndexModel([("username", 1), ("date", 1), ("last_modified", -1)]),
+                IndexModel([("key", 1)], unique=True)
+            ])
+        )
+        
+        _collections = {
+            "users": users_collection,
+            "sessions": sessions_collection,
+            "activities": activities_collection,
+            "daily_summaries": daily_summaries_collection,
+            "screenshots": screenshots_collection,
+            "screenshot_folders": screenshot_folders_collection
+        }
         
         return True
     except Exception as e:
-        print(f"Error connecting to MongoDB: {e}")
+        logger.error("Error connecting to MongoDB: %s", e, exc_info=True)
         return False
 
 async def close_mongodb_connection():
@@ -58,14 +116,18 @@ async def get_database():
         await connect_to_mongodb()
     return db
 
-async def get_collections():
-    """Get all collections."""
-    global users_collection, sessions_collection, activities_collection, daily_summaries_collection
-    if any(c is None for c in [users_collection, sessions_collection, activities_collection, daily_summaries_collection]):
-        await connect_to_mongodb()
-    return {
-        "users": users_collection,
-        "sessions": sessions_collection,
-        "activities": activities_collection,
-        "daily_summaries": daily_summaries_collection
-    } 
\ No newline at end of file
+async def get_collections() -> Dict[str, Any]:
+    """Get all collections, keyed by name.
+
+    The dict is built once; if the startup connection failed (e.g. MongoDB
+    came up after the API), each call retries until one succeeds.
+    """
+    if _collections is None:
+        async with _connect_lock:
+            if _collections is None:
+                if client is not None:
+                    client.close()
+                await connect_to_mongodb()
+        if _collections is None:
+            raise ServiceUnavailableError("Database connection not available")
+    return _collections
@@ -1,29 +1,77 @@
 import boto3
+from botocore.config import Config
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
+from typing import Dict, Any, Callable, List
+import logging
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # AWS settings
 AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 S3_BUCKET = os.getenv('S3_BUCKET', 'km-wfh-monitoring-bucket')
+S3_URL_PREFIX = f"https://{S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/"
+
+# Screenshot extensions accepted on upload, with their Content-Type; anything
+# else is stored as .png
+SCREENSHOT_CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.webp': 'image/webp'
+}
+_EXTENSION_ALIASES = {'.jpeg': '.jpg'}
+THUMBNAIL_SUFFIX = '-thumb.png'
 
-# Initialize S3 client
+# Initialize S3 client, shared by every request in this worker
 s3_client = boto3.client(
     's3',
     aws_access_key_id=AWS_ACCESS_KEY_ID,
     aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
+    region_name=AWS_REGION,
+    config=Config(
+        max_pool_connections=64,
+        retries={'mode': 'adaptive', 'max_attempts': 5},
+        tcp_keepalive=True
+    )
 )
 
+# boto3 is synchronous; its calls run on this bounded pool so they never
+# block the event loop. Clients are thread-safe, so the pool shares s3_client.
+S3_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="s3")
+
+def screenshot_extension(filename: str) -> str:
+    """Normalise a client filename's extension to one of SCREENSHOT_CONTENT_TYPES."""
+    extension = os.path.splitext(filename)[1].lower()
+    extension = _EXTENSION_ALIASES.get(extension, extension)
+    return extension if extension in SCREENSHOT_CONTENT_TYPES else '.png'
+
+def is_screenshot_key(key: str) -> bool:
+    """Whether a key is a stored screenshot rather than a thumbnail or other object."""
+    return (not key.endswith(THUMBNAIL_SUFFIX)
+            and os.path.splitext(key)[1] in SCREENSHOT_CONTENT_TYPES)
+
+def thumbnail_key(key: str) -> str:
+    """Key of the PNG thumbnail stored next to a screenshot."""
+    return os.path.splitext(key)[0] + THUMBNAIL_SUFFIX
+
+async def run_in_s3_pool(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking S3 call on the S3 thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(S3_POOL, functools.partial(fn, *args, **kwargs))
+
 async def upload_file(file_data: bytes, key: str, content_type: str = 'image/png') -> bool:
     """Upload a file to S3."""
     try:
-        s3_client.put_object(
+        await run_in_s3_pool(
+            s3_client.put_object,
             Bucket=S3_BUCKET,
             Key=key,
             Body=file_data,
@@ -31,59 +79,66 @@ async def upload_file(file_data: bytes, key: str, content_type: str = 'image/png
         )
         return True
     except Exception as e:
-        print(f"Error uploading file to S3: {e}")
+        logger.error("Error uploading file to S3: %s", e, exc_info=True)
         return False
 
-async def get_file_url(key: str) -> Optional[str]:
+def get_file_url(key: str) -> str:
     """Get the URL for a file in S3."""
-    try:
-        url = f"https://{S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{key}"
-        return url
-    except Exception as e:
-        print(f"Error getting file URL: {e}")
-        return None
+    return S3_URL_PREFIX + key
+
+def _list_png_files(prefix: str) -> List[Dict[str, Any]]:
+    """List every screenshot under a prefix, following continuation tokens."""
+    files = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+        for obj in page.get('Contents', ()):
+            key = obj['Key']
+            if not is_screenshot_key(key):
+                continue
+
+            last_modified = obj['LastModified'].isoformat()
+            files.append({
+                'url': S3_URL_PREFIX + key,
+                'thumbnail_url': S3_URL_PREFIX + thumbnail_key(key),
+                'key': key,
+                'timestamp': last_modified,
+                'size': obj['Size'],
+                'last_modified': last_modified
+            })
+    return files
 
 async def list_files(prefix: str) -> Dict[str, Any]:
     """List files in S3 with a given prefix."""
     try:
-        response = s3_client.list_objects_v2(
-            Bucket=S3_BUCKET,
-            Prefix=prefix
-        )
-        
-        files = []
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                if obj['Key'].endswith('.png'):
-                    url = await get_file_url(obj['Key'])
-                    thumbnail_key = obj['Key'].replace('.png', '-thumb.png')
-                    thumbnail_url = await get_file_url(thumbnail_key)
-                    
-                    files.append({
-                        'url': url,
-                        'thumbnail_url': thumbnail_url,
-                        'key': obj['Key'],
-                        'timestamp': obj['LastModified'].isoformat(),
-                        'size': obj['Size'],
-                        'last_modified': obj['LastModified'].isoformat()
-                    })
-        
+        files = await run_in_s3_pool(_list_png_files, prefix)
+        files.sort(key=lambda x: x['key'])
         return {
-            'files': sorted(files, key=lambda x: x['key']),
+            'files': files,
             'count': len(files)
         }
     except Exception as e:
-        print(f"Error listing files from S3: {e}")
+        logger.error("Error listing files from S3: %s", e, exc_info=True)
         return {'files': [], 'count': 0}
 
 async def delete_file(key: str) -> bool:
-    """Delete a file from S3."""
+    """Delete a file from S3, along with its thumbnail for screenshots."""
+    objects = [{'Key': key}]
+    if is_screenshot_key(key):
+        objects.append({'Key': thumbnail_key(key)})
+    
     try:
-        s3_client.delete_object(
+        response = await run_in_s3_pool(
+            s3_client.delete_objects,
             Bucket=S3_BUCKET,
-            Key=key
+            Delete={'Objects': objects, 'Quiet': True}
         )
-        return True
     except Exception as e:
-        print(f"Error deleting file from S3: {e}")
-        return False 
\ No newline at end of file
+        logger.error("Error deleting file from S3: %s", e, exc_info=True)
+        return False
+    
+    # Quiet mode reports only failures; a missing thumbnail is not one
+    for error in response.get('Errors', ()):
+        if error.get('Key') == key and error.get('Code') != 'NoSuchKey':
+            logger.error("Error deleting file from S3: %s %s", error.get('Code'), error.get('Message'))
+            return False
+    return True 
\ No newline at end of file
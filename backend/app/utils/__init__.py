@@ -1,5 +1,8 @@
 from .helpers import (
     ensure_timezone_aware,
+    day_bounds,
+    is_valid_date,
+    normalize_app_name,
     normalize_app_names,
     calculate_session_duration,
     format_duration,
@@ -13,6 +16,7 @@ from .validators import (
     validate_display_name,
     validate_session_data,
     validate_activity_data,
+    validate_activity_batch,
     validate_date_range,
     validate_pagination_params
 )
@@ -20,6 +24,9 @@ from .validators import (
 __all__ = [
     # Helper functions
     'ensure_timezone_aware',
+    'day_bounds',
+    'is_valid_date',
+    'normalize_app_name',
     'normalize_app_names',
     'calculate_session_duration',
     'format_duration',
@@ -32,6 +39,7 @@ __all__ = [
     'validate_display_name',
     'validate_session_data',
     'validate_activity_data',
+    'validate_activity_batch',
     'validate_date_range',
     'validate_pagination_params'
 ] 
\ No newline at end of file
@@ -1,58 +1,75 @@
-from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Tuple
 import logging
 from bson import ObjectId
-import json
-from bson import json_util
+from functools import lru_cache
+import re
 
 logger = logging.getLogger(__name__)
 
-def ensure_timezone_aware(dt: Optional[datetime]) -> Optional[datetime]:
+_DATE_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+
+def ensure_timezone_aware(dt: Optional[datetime], _utc=timezone.utc) -> Optional[datetime]:
     """Ensure a datetime object is timezone-aware by adding UTC timezone if needed."""
-    if dt and dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    return dt
+    return dt.replace(tzinfo=_utc) if dt is not None and dt.tzinfo is None else dt
+
+# Added to a day's midnight to get its last microsecond
+_DAY_END_OFFSET = timedelta(days=1, microseconds=-1)
+
+@lru_cache(maxsize=32)
+def day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """Return the first and last UTC datetimes of a date; cached, since a page asks once per user."""
+    day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return day_start, day_start + _DAY_END_OFFSET
+
+def is_valid_date(date_str: str) -> bool:
+    """Check that a string is a real YYYY-MM-DD calendar date (rejects 2024-02-31)."""
+    if not _DATE_RE.match(date_str):
+        return False
+    try:
+        date.fromisoformat(date_str)
+    except ValueError:
+        return False
+    return True
+
+# Browser process/display names mapped to one canonical label
+_BROWSER_NAMES = {
+    'chrome': 'Google Chrome',
+    'google-chrome': 'Google Chrome',
+    'google chrome': 'Google Chrome',
+    'chromium': 'Google Chrome',
+    'chromium-browser': 'Google Chrome',
+    'firefox': 'Firefox',
+    'mozilla firefox': 'Firefox',
+    'mozilla-firefox': 'Firefox',
+    'safari': 'Safari',
+    'microsoft-edge': 'Microsoft Edge',
+    'msedge': 'Microsoft Edge',
+    'edge': 'Microsoft Edge',
+    'brave': 'Brave',
+    'brave-browser': 'Brave',
+    'opera': 'Opera',
+    'opera-browser': 'Opera',
+    'vivaldi': 'Vivaldi',
+    'vivaldi-browser': 'Vivaldi'
+}
+
+@lru_cache(maxsize=4096)
+def normalize_app_name(app: str) -> str:
+    """Normalize a single application name; the same few names recur constantly."""
+    browser_name = _BROWSER_NAMES.get(app.lower())
+    if browser_name:
+        return browser_name
+    # For non-browser apps, just capitalize each word
+    return ' '.join(word.capitalize() for word in app.split())
 
 def normalize_app_names(app_usage: Dict[str, int]) -> Dict[str, int]:
     """Normalize application names for consistent display"""
     normalized = {}
-    browser_names = {
-        'chrome': 'Google Chrome',
-        'google-chrome': 'Google Chrome',
-        'google chrome': 'Google Chrome',
-        'chromium': 'Google Chrome',
-        'chromium-browser': 'Google Chrome',
-        'firefox': 'Firefox',
-        'mozilla firefox': 'Firefox',
-        'mozilla-firefox': 'Firefox',
-        'safari': 'Safari',
-        'microsoft-edge': 'Microsoft Edge',
-        'msedge': 'Microsoft Edge',
-        'edge': 'Microsoft Edge',
-        'brave': 'Brave',
-        'brave-browser': 'Brave',
-        'opera': 'Opera',
-        'opera-browser': 'Opera',
-        'vivaldi': 'Vivaldi',
-        'vivaldi-browser': 'Vivaldi'
-    }
-    
     for app, time in app_usage.items():
-        # Convert to lowercase for case-insensitive matching
-        app_lower = app.lower()
-        
-        # Check if it's a browser
-        if app_lower in browser_names:
-            normalized_name = browser_names[app_lower]
-        else:
-            # For non-browser apps, just capitalize each word
-            normalized_name = ' '.join(word.capitalize() for word in app.split())
-        
-        # Add to normalized dict, combining times for same normalized names
-        if normalized_name in normalized:
-            normalized[normalized_name] += time
-        else:
-            normalized[normalized_name] = time
+        # Combine times for apps that normalize to the same name
+        normalized_name = normalize_app_name(app)
+        normalized[normalized_name] = normalized.get(normalized_name, 0) + time
     
     return normalized
 
@@ -68,11 +85,16 @@ def calculate_session_duration(start_time: Optional[datetime], end_time: Optiona
         return int((end - start).total_seconds())
     return 0
 
+# Sub-minute durations are the common case; their strings are built once
+_SEC_STR = tuple(f"{i}s" for i in range(60))
+
 def format_duration(seconds: int) -> str:
     """Format duration in seconds to human-readable string."""
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    seconds = seconds % 60
+    if type(seconds) is int and 0 <= seconds < 60:
+        return _SEC_STR[seconds]
+    
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
     
     if hours > 0:
         return f"{hours}h {minutes}m {seconds}s"
@@ -101,22 +123,21 @@ def log_request(request_id: str, method: str, path: str, status_code: int, durat
     )
 
 def serialize_mongodb_doc(doc, max_depth=10):
-    """Helper function to serialize MongoDB documents"""
-    try:
-        # First try to use pymongo's json_util
-        return json.loads(json_util.dumps(doc))
-    except Exception:
-        # Fall back to manual serialization if json_util fails
-        def serialize(item, depth):
-            if depth > max_depth:
-                return str(item)
-            if isinstance(item, ObjectId):
-                return str(item)
-            elif isinstance(item, datetime):
-                return item.isoformat()
-            elif isinstance(item, dict):
-                return {k: serialize(v, depth + 1) for k, v in item.items()}
-            elif isinstance(item, list):
-                return [serialize(i, depth + 1) for i in item]
-            return item
-        return serialize(doc, 0) 
\ No newline at end of file
+    """Helper function to serialize MongoDB documents into JSON-safe values.
+
+    ObjectIds become strings and datetimes ISO-8601 strings; the document is
+    walked once instead of being dumped to a JSON string and parsed back.
+    """
+    def serialize(item, depth):
+        if depth > max_depth:
+            return str(item)
+        if isinstance(item, dict):
+            return {k: serialize(v, depth + 1) for k, v in item.items()}
+        elif isinstance(item, list):
+            return [serialize(i, depth + 1) for i in item]
+        elif isinstance(item, ObjectId):
+            return str(item)
+        elif isinstance(item, datetime):
+            return item.isoformat()
+        return item
+    return serialize(doc, 0)
@@ -1,10 +1,25 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
 import re
+from bson import ObjectId
 from app.core.exceptions import ValidationError
 
+# One C-level match covers the common valid case, length limits included.
+# \Z, unlike $, does not accept a trailing newline.
+_USERNAME_RE = re.compile(r"\A[a-zA-Z0-9_-]{3,50}\Z")
+_DISPLAY_NAME_RE = re.compile(r"\A.{2,100}\Z", re.DOTALL)
+
+# The same few users post repeatedly, so accepted names are memoized.
+# lru_cache never stores a raised exception, so invalid names are
+# re-checked (and re-raised) on every call.
+@lru_cache(maxsize=4096)
 def validate_username(username: str) -> None:
     """Validate username format."""
+    if username and _USERNAME_RE.match(username) is not None:
+        return
+    
+    # Rejected; work out which rule failed for the error message
     if not username:
         raise ValidationError("Username cannot be empty")
     
@@ -14,60 +29,81 @@ def validate_username(username: str) -> None:
     if len(username) > 50:
         raise ValidationError("Username must not exceed 50 characters")
     
-    if not re.match(r"^[a-zA-Z0-9_-]+$", username):
-        raise ValidationError("Username can only contain letters, numbers, underscores, and hyphens")
+    raise ValidationError("Username can only contain letters, numbers, underscores, and hyphens")
 
+@lru_cache(maxsize=4096)
 def validate_display_name(display_name: str) -> None:
     """Validate display name format."""
+    if display_name and _DISPLAY_NAME_RE.match(display_name) is not None:
+        return
+    
     if not display_name:
         raise ValidationError("Display name cannot be empty")
     
     if len(display_name) < 2:
         raise ValidationError("Display name must be at least 2 characters long")
     
-    if len(display_name) > 100:
-        raise ValidationError("Display name must not exceed 100 characters")
+    raise ValidationError("Display name must not exceed 100 characters")
+
+# Field schemas as (name, type or type tuple, description), checked in order
+# user_id may arrive as the ObjectId itself, so callers need not str() it
+_SESSION_REQUIRED = (
+    ("user_id", (str, ObjectId), "a string or ObjectId"),
+    ("channel", str, "a string"),
+    ("start_time", datetime, "a datetime object")
+)
+_SESSION_OPTIONAL = (
+    ("stop_time", datetime, "a datetime object"),
+    ("screen_shared", bool, "a boolean")
+)
+_ACTIVITY_REQUIRED = (
+    ("user_id", (str, ObjectId), "a string or ObjectId"),
+    ("session_id", str, "a string"),
+    ("active_app", str, "a string"),
+    ("timestamp", datetime, "a datetime object")
+)
+
+_MISSING = object()
 
-def validate_session_data(data: Dict[str, Any]) -> None:
+def _validate_fields(data: Dict[str, Any], required: tuple, optional: tuple = (),
+                     _type=type, _isinstance=isinstance, _VE=ValidationError, _missing=_MISSING) -> None:
+    """Check field presence and types against a schema.
+
+    The underscore defaults bind builtins and globals as locals; callers
+    never pass them.
+    """
+    get = data.get
+    for field, field_type, description in required:
+        value = get(field, _missing)
+        if value is _missing:
+            raise _VE(f"Missing required field: {field}")
+        # Exact-type check first; isinstance only for subclasses
+        if _type(value) is not field_type and not _isinstance(value, field_type):
+            raise _VE(f"{field} must be {description}")
+    
+    for field, field_type, description in optional:
+        value = get(field, _missing)
+        if value is not _missing and _type(value) is not field_type and not _isinstance(value, field_type):
+            raise _VE(f"{field} must be {description}")
+
+def validate_session_data(data: Dict[str, Any], _validate=_validate_fields,
+                          _required=_SESSION_REQUIRED, _optional=_SESSION_OPTIONAL) -> None:
     """Validate session data format."""
-    required_fields = ["user_id", "channel", "start_time"]
-    for field in required_fields:
-        if field not in data:
-            raise ValidationError(f"Missing required field: {field}")
-    
-    if not isinstance(data["user_id"], str):
-        raise ValidationError("user_id must be a string")
-    
-    if not isinstance(data["channel"], str):
-        raise ValidationError("channel must be a string")
-    
-    if not isinstance(data["start_time"], datetime):
-        raise ValidationError("start_time must be a datetime object")
-    
-    if "stop_time" in data and not isinstance(data["stop_time"], datetime):
-        raise ValidationError("stop_time must be a datetime object")
-    
-    if "screen_shared" in data and not isinstance(data["screen_shared"], bool):
-        raise ValidationError("screen_shared must be a boolean")
+    _validate(data, _required, _optional)
 
-def validate_activity_data(data: Dict[str, Any]) -> None:
+def validate_activity_data(data: Dict[str, Any], _validate=_validate_fields,
+                           _required=_ACTIVITY_REQUIRED) -> None:
     """Validate activity data format."""
-    required_fields = ["user_id", "session_id", "active_app", "timestamp"]
-    for field in required_fields:
-        if field not in data:
-            raise ValidationError(f"Missing required field: {field}")
-    
-    if not isinstance(data["user_id"], str):
-        raise ValidationError("user_id must be a string")
-    
-    if not isinstance(data["session_id"], str):
-        raise ValidationError("session_id must be a string")
-    
-    if not isinstance(data["active_app"], str):
-        raise ValidationError("active_app must be a string")
-    
-    if not isinstance(data["timestamp"], datetime):
-        raise ValidationError("timestamp must be a datetime object")
+    _validate(data, _required)
+
+def validate_activity_batch(rows: List[Dict[str, Any]], _validate=_validate_fields,
+                            _required=_ACTIVITY_REQUIRED, _VE=ValidationError) -> None:
+    """Validate a list of activity payloads, naming the first bad row."""
+    for index, row in enumerate(rows):
+        try:
+            _validate(row, _required)
+        except _VE as e:
+            raise _VE(f"Activity {index}: {e.detail}")
 
 def validate_date_range(start_date: Optional[datetime], end_date: Optional[datetime]) -> None:
     """Validate date range for queries."""
@@ -4,12 +4,15 @@ Contains all configuration settings and environment variables.
 """
 import os
 import logging
+import orjson
+from bson import ObjectId
 from dotenv import load_dotenv
-from flask import Flask
-from flask_cors import CORS
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 
 # Load environment variables
 load_dotenv()
@@ -31,26 +34,83 @@ S3_BUCKET = os.getenv('S3_BUCKET', 'km-wfh-monitoring-bucket')
 # Cache Configuration
 CACHE_TTL = 60  # 1 minute
 
+# Rate limit storage. Set LIMITER_REDIS_URI (e.g. redis://redis:6379/0) so
+# every worker shares one set of counters; without it each worker counts
+# in its own memory and the effective limit scales with the worker count.
+LIMITER_STORAGE_URI = os.getenv('LIMITER_REDIS_URI', 'memory://')
+LIMITER_STRATEGY = 'fixed-window' if LIMITER_STORAGE_URI == 'memory://' else 'moving-window'
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    datetimes are written as ISO 8601 (naive values as UTC) rather than
+    Flask's HTTP-date format, and ObjectIds as their hex string.
+    """
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+    
+    @staticmethod
+    def _default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self._default, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self._default, option=self.option),
+            mimetype=self.mimetype
+        )
+
+CORS_ALLOW_HEADERS = "Content-Type, Authorization, Cache-Control"
+CORS_ALLOW_METHODS = "GET, POST, PUT, DELETE, OPTIONS"
+
 def create_app():
     """Create and configure the Flask application"""
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     # Increase maximum content length to 50MB
     app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB in bytes
     app.config['JSON_SORT_KEYS'] = False  # Preserve key order in JSON responses
     
-    # Configure CORS with proper settings
-    CORS(app, resources={r"/*": {"origins": "*", "allow_headers": ["Content-Type", "Authorization", "Cache-Control"]}}, 
-         supports_credentials=True)
+    # CORS for every origin, with credentials. The headers are static, so
+    # they are set directly rather than matched per request by flask-cors.
+    # Credentialed requests cannot use a literal "*", so the caller's Origin
+    # is echoed back. Flask answers OPTIONS preflights for every route itself.
+    @app.after_request
+    def add_cors_headers(response):
+        origin = request.headers.get("Origin")
+        if origin:
+            headers = response.headers
+            headers["Access-Control-Allow-Origin"] = origin
+            headers["Access-Control-Allow-Credentials"] = "true"
+            headers.add("Vary", "Origin")
+            if request.method == "OPTIONS":
+                headers["Access-Control-Allow-Headers"] = CORS_ALLOW_HEADERS
+                headers["Access-Control-Allow-Methods"] = CORS_ALLOW_METHODS
+        return response
     
     # Configure rate limiting - high limits for multiple users
     limiter = Limiter(
         key_func=get_remote_address,
         app=app,
+        storage_uri=LIMITER_STORAGE_URI,
+        strategy=LIMITER_STRATEGY,
         default_limits=["10000 per day", "2000 per hour"]
     )
     
     return app, limiter
 
-# Create scheduler for background tasks
-scheduler = BackgroundScheduler()
\ No newline at end of file
+# Create scheduler for background tasks. Overrunning jobs never overlap
+# themselves and missed firings coalesce into a single run.
+scheduler = BackgroundScheduler(
+    job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 30},
+    executors={"default": ThreadPoolExecutor(max_workers=4)}
+)
\ No newline at end of file
@@ -1,24 +1,53 @@
 """
 Activity model for MongoDB.
 """
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, TypedDict
 from bson import ObjectId
 
+class ActivityDocument(TypedDict):
+    """Shape of an activities collection document"""
+    user_id: ObjectId
+    active_apps: List[str]
+    active_app: Optional[str]
+    idle_time: int
+    timestamp: datetime
+    date: str
+
+class AppUsageDocument(TypedDict):
+    """Shape of an app_usage collection document"""
+    user_id: ObjectId
+    app_name: str
+    usage_count: int
+    date: str
+    created_at: datetime
+
+class DailySummaryDocument(TypedDict):
+    """Shape of a daily_summaries collection document"""
+    user_id: ObjectId
+    date: str
+    total_screen_share_time: int
+    total_active_time: int
+    total_idle_time: int
+    created_at: datetime
+
 class Activity:
     """Activity model for MongoDB"""
     
     @staticmethod
-    def create(user_id: ObjectId, active_apps: List[str], active_app: Optional[str], idle_time: int) -> Dict[str, Any]:
-        """Create a new activity document"""
-        now = datetime.utcnow()
+    def create(user_id: ObjectId, active_apps: List[str], active_app: Optional[str], idle_time: int,
+               now: Optional[datetime] = None) -> ActivityDocument:
+        """Create a new activity document; pass now to share one clock read across a batch"""
+        if now is None:
+            now = datetime.now(timezone.utc)
         return {
             "user_id": user_id,
             "active_apps": active_apps,
             "active_app": active_app,
             "idle_time": idle_time,
             "timestamp": now,
-            "date": now.date()
+            # Dates are stored as YYYY-MM-DD strings, which every reader queries by
+            "date": now.strftime("%Y-%m-%d")
         }
     
     @staticmethod
@@ -31,14 +60,15 @@ class AppUsage:
     """App usage model for MongoDB"""
     
     @staticmethod
-    def create(user_id: ObjectId, app_name: str) -> Dict[str, Any]:
+    def create(user_id: ObjectId, app_name: str, now: Optional[datetime] = None) -> AppUsageDocument:
         """Create a new app usage document"""
-        now = datetime.utcnow()
+        if now is None:
+            now = datetime.now(timezone.utc)
         return {
             "user_id": user_id,
             "app_name": app_name,
             "usage_count": 1,
-            "date": now.date(),
+            "date": now.strftime("%Y-%m-%d"),
             "created_at": now
         }
 
@@ -46,10 +76,12 @@ class DailySummary:
     """Daily summary model for MongoDB"""
     
     @staticmethod
-    def create(user_id: ObjectId, date: Optional[datetime] = None) -> Dict[str, Any]:
+    def create(user_id: ObjectId, date: Optional[str] = None, now: Optional[datetime] = None) -> DailySummaryDocument:
         """Create a new daily summary document"""
+        if now is None:
+            now = datetime.now(timezone.utc)
         if date is None:
-            date = datetime.utcnow().date()
+            date = now.strftime("%Y-%m-%d")
             
         return {
             "user_id": user_id,
@@ -57,5 +89,5 @@ class DailySummary:
             "total_screen_share_time": 0,
             "total_active_time": 0,
             "total_idle_time": 0,
-            "created_at": datetime.utcnow()
+            "created_at": now
         }
\ No newline at end of file
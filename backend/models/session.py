@@ -1,22 +1,31 @@
 """
 Session model for MongoDB.
 """
-from datetime import datetime
-from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, TypedDict
 from bson import ObjectId
 
+class SessionDocument(TypedDict):
+    """Shape of a sessions collection document"""
+    user_id: ObjectId
+    channel: str
+    screen_shared: bool
+    event: str
+    timestamp: datetime
+
 class Session:
     """Session model for MongoDB"""
     
     @staticmethod
-    def create(user_id: ObjectId, channel: str, screen_shared: bool, event: str) -> Dict[str, Any]:
+    def create(user_id: ObjectId, channel: str, screen_shared: bool, event: str,
+               now: Optional[datetime] = None) -> SessionDocument:
         """Create a new session document"""
         return {
             "user_id": user_id,
             "channel": channel,
             "screen_shared": screen_shared,
             "event": event,
-            "timestamp": datetime.utcnow()
+            "timestamp": now or datetime.now(timezone.utc)
         }
     
     @staticmethod
@@ -1,20 +1,30 @@
 """
 User model for MongoDB.
 """
-from datetime import datetime
-from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, TypedDict
+
+class UserDocument(TypedDict):
+    """Shape of a users collection document"""
+    username: str
+    display_name: str
+    created_at: datetime
+    last_active: datetime
+    is_active: bool
 
 class User:
     """User model for MongoDB"""
     
     @staticmethod
-    def create(username: str, display_name: Optional[str] = None) -> Dict[str, Any]:
+    def create(username: str, display_name: Optional[str] = None, now: Optional[datetime] = None) -> UserDocument:
         """Create a new user document"""
+        if now is None:
+            now = datetime.now(timezone.utc)
         return {
             "username": username,
             "display_name": display_name or username,
-            "created_at": datetime.utcnow(),
-            "last_active": datetime.utcnow(),
+            "created_at": now,
+            "last_active": now,
             "is_active": True
         }
     
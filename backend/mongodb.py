@@ -1,7 +1,8 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 import os
 import time
+import threading
 import logging
 from typing import Optional
 import pymongo  # Added for error handling
@@ -15,14 +16,18 @@ class MongoDBConnection:
     _client: Optional[MongoClient] = None
     
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(MongoDBConnection, cls).__new__(cls)
-        return cls._instance
+        instance = cls._instance
+        if instance is None:
+            # Connect before publishing the instance, so a failed connect
+            # is retried by the next caller
+            instance = super(MongoDBConnection, cls).__new__(cls)
+            instance.connect()
+            cls._instance = instance
+        return instance
     
     def __init__(self):
-        if not hasattr(self, 'initialized'):
-            self.initialized = True
-            self.connect()
+        # Everything happens once, in __new__
+        pass
     
     def connect(self, max_retries: int = 3, retry_delay: int = 5):
         """Establish connection to MongoDB with retry mechanism"""
@@ -30,13 +35,19 @@ class MongoDBConnection:
         
         for attempt in range(max_retries):
             try:
+                # Size the pool per worker to its request threads; zstd
+                # needs pymongo[zstd] and falls back to zlib without it
                 self._client = MongoClient(
                     MONGO_URI,
                     serverSelectionTimeoutMS=5000,
-                    maxPoolSize=50,
-                    minPoolSize=10,
+                    maxPoolSize=int(os.getenv("MONGO_POOL_MAX", "20")),
+                    minPoolSize=int(os.getenv("MONGO_POOL_MIN", "2")),
                     maxIdleTimeMS=30000,
-                    waitQueueTimeoutMS=10000
+                    waitQueueTimeoutMS=10000,
+                    compressors=os.getenv("MONGO_COMPRESSORS", "zstd,zlib"),
+                    zlibCompressionLevel=-1,
+                    retryWrites=True,
+                    readPreference="primaryPreferred"
                 )
                 # Test the connection
                 self._client.admin.command('ping')
@@ -61,38 +72,80 @@ class MongoDBConnection:
         """Get database instance"""
         return self.client[db_name]
 
-# Initialize MongoDB connection
-mongo_connection = MongoDBConnection()
-db = mongo_connection.get_database()
+# The connection, database and collection handles below are resolved on
+# first access through the module __getattr__, so importing this module
+# does not touch the network. Indexes are created once, the first time a
+# collection is requested.
+_COLLECTION_NAMES = {
+    "users_collection": "users",
+    "sessions_collection": "sessions",
+    "activities_collection": "activities",
+    "daily_summaries_collection": "daily_summaries",
+    "app_usage_collection": "app_usage"
+}
+
+_indexes_ready = False
+_indexes_lock = threading.Lock()
 
-# Collections
-users_collection = db["users"]
-sessions_collection = db["sessions"]
-activities_collection = db["activities"]
-daily_summaries_collection = db["daily_summaries"]
-app_usage_collection = db["app_usage"]
+# Indexes per collection, each sent as one createIndexes command
+_INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("display_name", ASCENDING)])
+    ],
+    "sessions": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel([("screen_shared", ASCENDING)]),
+        # Latest join/stream start per user; only those events are indexed
+        IndexModel(
+            [("user_id", ASCENDING), ("event", ASCENDING), ("timestamp", DESCENDING)],
+            partialFilterExpression={"event": {"$in": ["joined", "started_streaming"]}}
+        )
+    ],
+    "activities": [
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("app_name", ASCENDING), ("date", ASCENDING)]),
+        # Covers per-day active_app grouping without fetching documents
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING), ("active_app", ASCENDING)])
+    ],
+    "daily_summaries": [
+        # One summary per user and day; descending date serves "latest N days"
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING)], unique=True)
+    ]
+}
 
 # Create indexes for better query performance
 def create_indexes():
-    try:
-        # Users collection indexes
-        users_collection.create_index("username", unique=True)
-        users_collection.create_index("display_name")  # Add index for display_name
-        
-        # Sessions collection indexes
-        sessions_collection.create_index([("user_id", 1), ("timestamp", -1)])
-        sessions_collection.create_index("screen_shared")
-        
-        # Activities collection indexes
-        activities_collection.create_index([("user_id", 1), ("date", 1)])
-        activities_collection.create_index([("user_id", 1), ("app_name", 1), ("date", 1)])
-        
-        # Daily summaries collection indexes
-        daily_summaries_collection.create_index([("user_id", 1), ("date", 1)])
-        
-        logger.info("Successfully created database indexes")
-    except Exception as e:
-        logger.error(f"Error creating indexes: {e}")
+    database = __getattr__("db")
+    for collection_name, indexes in _INDEXES.items():
+        try:
+            database[collection_name].create_indexes(indexes)
+        except Exception as e:
+            logger.error("Error creating indexes for %s: %s", collection_name, e)
+    logger.info("Database indexes ensured")
 
-# Create indexes on startup
-create_indexes()
+def _ensure_indexes():
+    """Run create_indexes once per process."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    with _indexes_lock:
+        if not _indexes_ready:
+            create_indexes()
+            _indexes_ready = True
+
+def __getattr__(name):
+    """Resolve connection and collection handles lazily (PEP 562)."""
+    if name == "mongo_connection":
+        value = MongoDBConnection()
+    elif name == "db":
+        value = MongoDBConnection().get_database()
+    elif name in _COLLECTION_NAMES:
+        _ensure_indexes()
+        value = __getattr__("db")[_COLLECTION_NAMES[name]]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    # Later lookups are plain module attribute loads
+    globals()[name] = value
+    return value
@@ -2,17 +2,26 @@
 Activity routes for handling activity-related API endpoints.
 """
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
 from services.user_service import user_service
 from services.activity_service import activity_service
-from utils.helpers import monitor_performance, gzip_response
+from utils.helpers import monitor_performance, gzip_response, parse_ymd
 
 logger = logging.getLogger(__name__)
 
 # Create Blueprint
 activity_bp = Blueprint('activity', __name__)
 
+def _parse_ymd(s):
+    """Validate a YYYY-MM-DD string and return it unchanged, since that is
+    the form dates are stored and queried in.
+
+    Raises ValueError for anything else.
+    """
+    parse_ymd(s)
+    return s
+
 @activity_bp.route('/api/activity', methods=['POST'])
 @monitor_performance
 def record_activity():
@@ -22,13 +31,13 @@ def record_activity():
 
     try:
         validate_activity_data(data)
-        user_id = user_service.get_or_create_user(data['username'])
+        now = datetime.now(timezone.utc)
         
-        # Update user's last active timestamp
-        user_service.update_user_activity(user_id)
+        # Get or create the user and update last_active in one upsert
+        user_id = user_service.touch_user(data['username'], now)
         
         # Record the activity
-        activity_service.record_activity(user_id, data)
+        activity_service.record_activity(user_id, data, now)
         
         return jsonify({'ok': True})
     except Exception as e:
@@ -45,14 +54,26 @@ def get_user_activities(username):
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
         
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
+        # Activity dates are stored as YYYY-MM-DD strings
+        try:
+            start_date = _parse_ymd(start_date_str) if start_date_str else None
+            end_date = _parse_ymd(end_date_str) if end_date_str else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
         user = user_service.get_user_by_username(username)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
             
+        # ?format=columnar returns {"columns", "rows"} instead of a list of
+        # documents, for clients fetching long activity histories
+        if request.args.get('format') == 'columnar':
+            return jsonify({
+                'username': username,
+                'activities': activity_service.get_user_activities_columnar(user['_id'], start_date, end_date, limit)
+            })
+        
         activities = activity_service.get_user_activities(user['_id'], start_date, end_date, limit)
         
         return jsonify({
@@ -70,7 +91,10 @@ def get_app_usage(username):
     """Get app usage statistics for a user"""
     try:
         date_str = request.args.get('date')
-        date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else None
+        try:
+            date = _parse_ymd(date_str) if date_str else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
         user = user_service.get_user_by_username(username)
         
@@ -94,7 +118,10 @@ def get_daily_summary(username):
     """Get daily summary for a user"""
     try:
         date_str = request.args.get('date')
-        date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else None
+        try:
+            date = _parse_ymd(date_str) if date_str else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
         user = user_service.get_user_by_username(username)
         
@@ -2,13 +2,12 @@
 Dashboard routes for handling dashboard-related API endpoints.
 """
 import logging
-import threading
 from datetime import datetime, timezone, timedelta
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from services.user_service import user_service
-from mongodb import sessions_collection, daily_summaries_collection, activities_collection
-from utils.helpers import monitor_performance, gzip_response, serialize_mongodb_doc, ensure_timezone_aware, get_cached_data
+import mongodb
+from utils.helpers import monitor_performance, gzip_response, ensure_timezone_aware, cached_json_response, day_bounds
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +20,13 @@ dashboard_bp = Blueprint('dashboard', __name__)
 def get_dashboard():
     """Get dashboard data"""
     try:
-        # Check if we have a cached version
-        cache_key = "dashboard"
-        
         # Get users with pagination support
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 100))
         
+        # Each page is cached separately
+        cache_key = f"dashboard:{page}:{per_page}"
+        
         # Define the query function for cache
         def query_func():
             skip = (page - 1) * per_page
@@ -38,36 +37,15 @@ def get_dashboard():
             # Get users for current page
             users = user_service.get_users_paginated(skip, per_page)
             current_date = datetime.now(timezone.utc).date()
+            day_str = current_date.strftime("%Y-%m-%d")
             
-            # Process user data in parallel using threads
-            dashboard_data = []
-            threads = []
-            results = [None] * len(users)
-            
-            def process_user(index, user):
-                try:
-                    results[index] = get_user_dashboard_data(user, current_date)
-                except Exception as e:
-                    logger.error(f"Error processing user {user.get('username')}: {e}")
-                    results[index] = {
-                        "username": user.get("username", "unknown"),
-                        "display_name": user.get("display_name", user.get("username", "unknown")),
-                        "error": str(e),
-                        "active_apps": []  # Ensure active_apps is always an array
-                    }
-            
-            # Create and start threads
-            for i, user in enumerate(users):
-                thread = threading.Thread(target=process_user, args=(i, user))
-                threads.append(thread)
-                thread.start()
-            
-            # Wait for all threads to complete
-            for thread in threads:
-                thread.join()
-            
-            # Collect results and filter out None values
-            dashboard_data = [r for r in results if r is not None]
+            # Load the whole page's sessions, summaries and activities in two
+            # queries, then assemble each user's row from memory
+            page_data = fetch_dashboard_data(users, current_date, day_str)
+            dashboard_data = [
+                get_user_dashboard_data(user, page_data[user["_id"]])
+                for user in users
+            ]
             
             # Ensure data is an array
             if not isinstance(dashboard_data, list):
@@ -86,10 +64,8 @@ def get_dashboard():
             
             return response_data
         
-        # Get data from cache or execute query
-        dashboard_data = get_cached_data(cache_key, "users", query_func)
-        
-        return jsonify(dashboard_data)
+        # Get the encoded page from cache or execute query
+        return cached_json_response(cache_key, query_func)
     except Exception as e:
         logger.error(f"❌ Error in dashboard endpoint: {e}", exc_info=True)
         # Return a valid response even on error
@@ -99,14 +75,101 @@ def get_dashboard():
             'data': []  # Ensure data is always an array
         }), 500
 
-def get_user_dashboard_data(user, current_date):
-    """Get dashboard data for a specific user"""
+def fetch_dashboard_data(users, current_date, day_str):
+    """Load the dashboard inputs for a page of users in two queries.
+
+    Returns {user_id: {"latest_session", "first_join", "last_leave",
+    "daily_summary", "daily_summaries", "activities"}}. "daily_summaries"
+    covers the seven days up to current_date, newest first, and
+    "activities" is the day's per-app usage, most used first.
+    """
+    user_ids = [user["_id"] for user in users]
+    day_start, day_end = day_bounds(current_date)
+    recent_days = [(current_date - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
+    
+    def session_lookup(name, pipeline):
+        return {"$lookup": {
+            "from": mongodb.sessions_collection.name,
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": pipeline,
+            "as": name
+        }}
+    
+    # One result document per user; every joined branch is limited, and each
+    # lookup joins on user_id so it can use the (user_id, ...) indexes
+    pipeline = [
+        {"$match": {"_id": {"$in": user_ids}}},
+        {"$project": {"_id": 1}},
+        session_lookup("latest_session", [
+            {"$sort": {"timestamp": -1}},
+            {"$limit": 1},
+            {"$project": {"_id": 0, "channel": 1, "screen_shared": 1, "timestamp": 1, "screen_share_time": 1}}
+        ]),
+        session_lookup("first_join", [
+            {"$match": {"event": "joined", "start_time": {"$gte": day_start, "$lte": day_end}}},
+            {"$sort": {"start_time": 1}},
+            {"$limit": 1},
+            {"$project": {"_id": 0, "start_time": 1}}
+        ]),
+        session_lookup("last_leave", [
+            {"$match": {"event": "left", "stop_time": {"$gte": day_start, "$lte": day_end}}},
+            {"$sort": {"stop_time": -1}},
+            {"$limit": 1},
+            {"$project": {"_id": 0, "stop_time": 1}}
+        ]),
+        {"$lookup": {
+            "from": mongodb.daily_summaries_collection.name,
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": [
+                {"$match": {"date": {"$in": recent_days}}},
+                {"$sort": {"date": -1}},
+                {"$project": {"_id": 0, "date": 1, "total_active_time": 1, "total_idle_time": 1, "total_screen_share_time": 1}}
+            ],
+            "as": "daily_summaries"
+        }}
+    ]
+    
+    data = {
+        user_id: {
+            "latest_session": None,
+            "first_join": None,
+            "last_leave": None,
+            "daily_summary": None,
+            "daily_summaries": [],
+            "activities": []
+        }
+        for user_id in user_ids
+    }
+    
+    for row in mongodb.users_collection.aggregate(pipeline):
+        user_data = data[row["_id"]]
+        for key in ("latest_session", "first_join", "last_leave"):
+            user_data[key] = row[key][0] if row[key] else None
+        user_data["daily_summaries"] = row["daily_summaries"]
+        # Newest first, so the day's own summary can only be the first one
+        if row["daily_summaries"] and row["daily_summaries"][0]["date"] == day_str:
+            user_data["daily_summary"] = row["daily_summaries"][0]
+    
+    activities = mongodb.activities_collection.find(
+        {"user_id": {"$in": user_ids}, "date": day_str},
+        projection={"_id": 0, "user_id": 1, "app_name": 1, "total_time": 1}
+    ).sort("total_time", -1)
+    for activity in activities:
+        data[activity["user_id"]]["activities"].append(activity)
+    
+    return data
+
+def get_user_dashboard_data(user, user_data):
+    """Build one user's dashboard row from their fetch_dashboard_data entry"""
     try:
-        latest_session = get_latest_session(user)
-        first_join, last_leave = get_day_sessions(user, current_date)
+        latest_session = user_data["latest_session"]
+        first_join = user_data["first_join"]
+        last_leave = user_data["last_leave"]
         total_session_hours = calculate_session_time(first_join, last_leave)
-        app_usage, total_active_time, active_apps, most_active_app = get_app_usage(user, current_date)
-        daily_summary = get_daily_summary(user, current_date)
+        daily_summary = user_data["daily_summary"]
+        app_usage, total_active_time, active_apps, most_active_app = get_app_usage(user_data["activities"], daily_summary)
         
         # Ensure timestamp is properly formatted if it exists
         timestamp = None
@@ -132,15 +195,7 @@ def get_user_dashboard_data(user, current_date):
             most_used_app = most_active_app.get("app_name")
             most_used_app_time = round(most_active_app.get("total_time", 0), 2)
         
-        # Safely get daily summaries
-        try:
-            daily_summaries = list(daily_summaries_collection.find(
-                {"user_id": user["_id"]},
-                sort=[("date", -1)],
-                limit=7
-            ))
-        except Exception:
-            daily_summaries = []
+        daily_summaries = user_data["daily_summaries"]
         
         return {
             "username": user["username"],
@@ -183,31 +238,6 @@ def get_user_dashboard_data(user, current_date):
             "daily_summaries": []
         }
 
-def get_latest_session(user):
-    """Get the latest session for a user"""
-    return sessions_collection.find_one(
-        {"user_id": user["_id"]},
-        sort=[("timestamp", -1)]
-    )
-
-def get_day_sessions(user, current_date):
-    """Get the first join and last leave sessions for a user on a specific date"""
-    day_start = datetime.combine(current_date, datetime.min.time(), tzinfo=timezone.utc)
-    day_end = datetime.combine(current_date, datetime.max.time(), tzinfo=timezone.utc)
-    first_join = sessions_collection.find_one({
-        "user_id": user["_id"],
-        "event": "joined",
-        "start_time": {"$gte": day_start, "$lte": day_end}
-    }, sort=[("start_time", 1)])
-    
-    last_leave = sessions_collection.find_one({
-        "user_id": user["_id"],
-        "event": "left",
-        "stop_time": {"$gte": day_start, "$lte": day_end}
-    }, sort=[("stop_time", -1)])
-    
-    return first_join, last_leave
-
 def calculate_session_time(first_join, last_leave):
     """Calculate session time in hours"""
     if first_join and last_leave and first_join.get("start_time") and last_leave.get("stop_time"):
@@ -224,26 +254,14 @@ def calculate_session_time(first_join, last_leave):
             return 0
     return 0
 
-def get_app_usage(user, current_date):
-    """Get app usage data for a user on a specific date"""
-    day_str = current_date.strftime("%Y-%m-%d")
-    activities_today = list(activities_collection.find({
-        "user_id": user["_id"],
-        "date": day_str
-    }))
-    
+def get_app_usage(activities_today, daily_summary):
+    """Summarize a user's app usage from the day's activities and daily summary"""
     # Ensure app_usage is always a list, even if empty
     app_usage = [
         {"app_name": a["app_name"], "total_time": max(a.get("total_time", 0), 0)}
         for a in activities_today
     ] if activities_today else []
     
-    # Get total_active_time from daily_summary instead of calculating from activities
-    daily_summary = daily_summaries_collection.find_one({
-        "user_id": user["_id"],
-        "date": day_str
-    })
-    
     # Use the stored total_active_time if available, otherwise calculate from activities
     if daily_summary and "total_active_time" in daily_summary:
         total_active_time = daily_summary["total_active_time"]
@@ -252,27 +270,7 @@ def get_app_usage(user, current_date):
     
     active_apps = [a["app_name"] for a in app_usage if a.get("total_time", 0) > 0]
     
-    # Handle empty app_usage case
-    if not app_usage:
-        most_active_app = None
-    else:
-        try:
-            most_active_app = max(app_usage, key=lambda x: x.get("total_time", 0), default=None)
-        except (ValueError, TypeError):
-            most_active_app = None
-            
-    return app_usage, total_active_time, active_apps, most_active_app
-
-def get_daily_summary(user, current_date):
-    """Get daily summary for a user on a specific date"""
-    # Check if current_date is already a string or a datetime object
-    if isinstance(current_date, str):
-        day_str = current_date
-    else:
-        day_str = current_date.strftime("%Y-%m-%d")
+    # Activities arrive sorted by total_time, so the first is the most used
+    most_active_app = app_usage[0] if app_usage else None
     
-    # Use projection to get only needed fields
-    return daily_summaries_collection.find_one(
-        {"user_id": user["_id"], "date": day_str},
-        projection={"total_active_time": 1, "total_idle_time": 1, "app_summaries": 1, "_id": 1}
-    )
\ No newline at end of file
+    return app_usage, total_active_time, active_apps, most_active_app
@@ -5,7 +5,7 @@ import logging
 import time
 from datetime import datetime, timezone
 from flask import Blueprint, jsonify
-from mongodb import users_collection
+import mongodb
 from services.s3_service import s3_service
 
 logger = logging.getLogger(__name__)
@@ -13,86 +13,106 @@ logger = logging.getLogger(__name__)
 # Create Blueprint
 health_bp = Blueprint('health', __name__)
 
-@health_bp.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint for monitoring"""
-    health_data = {
-        "status": "healthy",
-        "components": {},
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
-    
-    # Check database connection
+# Each component's result is reused for HEALTH_CHECK_TTL seconds, so
+# frequent load balancer probes don't turn into Mongo and S3 traffic
+HEALTH_CHECK_TTL = 5.0
+_health_results = {}
+
+def _cached_check(name, check):
+    """Return check()'s result for a component, rerunning it once the cached one is stale"""
+    entry = _health_results.get(name)
+    now = time.monotonic()
+    if entry is None or now - entry[0] >= HEALTH_CHECK_TTL:
+        entry = (now, check())
+        _health_results[name] = entry
+    return entry[1]
+
+def _check_database():
     try:
         start_time = time.time()
-        users_collection.find_one({})
+        mongodb.users_collection.find_one({})
         db_response_time = time.time() - start_time
-        health_data["components"]["database"] = {
+        return {
             "status": "connected",
             "response_time_ms": round(db_response_time * 1000, 2)
         }
     except Exception as e:
-        health_data["status"] = "unhealthy"
-        health_data["components"]["database"] = {
+        logger.error(f"❌ Database health check failed: {e}")
+        return {
             "status": "error",
             "error": str(e)
         }
-        logger.error(f"❌ Database health check failed: {e}")
-    
-    # Check S3 connection
+
+def _check_s3():
     try:
         start_time = time.time()
         s3_service.s3_client.list_buckets()
         s3_response_time = time.time() - start_time
-        health_data["components"]["s3"] = {
+        return {
             "status": "connected",
             "response_time_ms": round(s3_response_time * 1000, 2)
         }
     except Exception as e:
-        health_data["status"] = "unhealthy"
-        health_data["components"]["s3"] = {
+        logger.error(f"❌ S3 health check failed: {e}")
+        return {
             "status": "error",
             "error": str(e)
         }
-        logger.error(f"❌ S3 health check failed: {e}")
-    
-    # Check memory usage
+
+def _check_memory():
     try:
         import psutil
         process = psutil.Process()
         memory_info = process.memory_info()
         memory_mb = memory_info.rss / 1024 / 1024
-        health_data["components"]["memory"] = {
+        return {
             "status": "ok" if memory_mb < 500 else "warning",
             "usage_mb": round(memory_mb, 2)
         }
     except Exception as e:
-        health_data["components"]["memory"] = {
+        return {
             "status": "unknown",
             "error": str(e)
         }
-    
-    # Check MongoDB connection pool
+
+def _check_db_pool():
     try:
-        from mongodb import mongo_connection
-        server_status = mongo_connection.client.admin.command('serverStatus')
+        server_status = mongodb.mongo_connection.client.admin.command('serverStatus')
         conn_stats = server_status.get('connections', {})
         current = conn_stats.get('current', 0)
         available = conn_stats.get('available', 0)
         max_conns = current + available
         usage_percent = (current / max_conns * 100) if max_conns > 0 else 0
         
-        health_data["components"]["db_pool"] = {
+        return {
             "status": "ok" if usage_percent < 80 else "warning",
             "current": current,
             "available": available,
             "usage_percent": round(usage_percent, 1)
         }
     except Exception as e:
-        health_data["components"]["db_pool"] = {
+        return {
             "status": "unknown",
             "error": str(e)
         }
+
+@health_bp.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint for monitoring"""
+    components = {
+        "database": _cached_check("database", _check_database),
+        "s3": _cached_check("s3", _check_s3),
+        "memory": _cached_check("memory", _check_memory),
+        "db_pool": _cached_check("db_pool", _check_db_pool)
+    }
+    
+    # Only a failed database or S3 check makes the service unhealthy
+    healthy = components["database"]["status"] != "error" and components["s3"]["status"] != "error"
+    health_data = {
+        "status": "healthy" if healthy else "unhealthy",
+        "components": components,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
     
     # Return appropriate status code
     status_code = 200 if health_data["status"] == "healthy" else 500
@@ -2,13 +2,14 @@
 History routes for handling history-related API endpoints.
 """
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from services.user_service import user_service
 from services.activity_service import activity_service
-from mongodb import sessions_collection, daily_summaries_collection, activities_collection
-from utils.helpers import monitor_performance, gzip_response, serialize_mongodb_doc, ensure_timezone_aware, get_cached_data
+import mongodb
+from utils.helpers import monitor_performance, gzip_response, serialize_mongodb_doc, ensure_timezone_aware, cached_json_response, day_bounds
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +35,10 @@ def get_history():
                 return {'error': 'No users found', 'data': []}
                 
             start_date, end_date = calculate_date_range(days)
-            sessions_data = get_sessions_data(users, start_date, end_date)
-            history_data = process_user_history(users, days, start_date, sessions_data)
+            sessions_index = get_sessions_data(users, start_date, end_date)
+            day_strs = get_day_strs(start_date, days)
+            activities_index, summaries_index = get_daily_inputs(users, day_strs)
+            history_data = process_user_history(users, day_strs, sessions_index, activities_index, summaries_index)
             
             # Ensure history_data is always a list
             if not isinstance(history_data, list):
@@ -43,9 +46,7 @@ def get_history():
                 
             return history_data
         
-        history_data = get_cached_data(cache_key, "summaries", query_func)
-        
-        return jsonify(history_data)
+        return cached_json_response(cache_key, query_func)
     except ValueError as ve:
         # Handle specific value errors like user not found
         logger.warning(f"Value error in history endpoint: {ve}")
@@ -68,10 +69,18 @@ def calculate_date_range(days):
     start_date = end_date - timedelta(days=days-1)
     return start_date, end_date
 
+def get_day_strs(start_date, days):
+    """Format each day in range as YYYY-MM-DD once, for every user to share"""
+    return [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+
 def get_sessions_data(users, start_date, end_date):
+    """Return each user's first join and last leave per day.
+
+    The result maps (user_id, "YYYY-MM-DD") to the grouped session row.
+    """
     # Convert date objects to datetime objects for MongoDB compatibility
-    start_datetime = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc)
-    end_datetime = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=timezone.utc)
+    start_datetime = day_bounds(start_date)[0]
+    end_datetime = day_bounds(end_date)[1]
     
     pipeline = [
         {"$match": {
@@ -91,9 +100,36 @@ def get_sessions_data(users, start_date, end_date):
             "last_leave": {"$last": "$stop_time"}
         }}
     ]
-    return list(sessions_collection.aggregate(pipeline))
+    return {(s["_id"]["user_id"], s["_id"]["date"]): s for s in mongodb.sessions_collection.aggregate(pipeline)}
+
+def get_daily_inputs(users, day_strs):
+    """Load the activities and daily summaries for every user and day in range.
+
+    Returns (activities_index, summaries_index): activity lists and summary
+    documents keyed by (user_id, "YYYY-MM-DD").
+    """
+    user_ids = [user["_id"] for user in users]
+    
+    activities_index = defaultdict(list)
+    # Sorted so each day's list starts with its most used app
+    activities = mongodb.activities_collection.find(
+        {"user_id": {"$in": user_ids}, "date": {"$in": day_strs}},
+        projection={"user_id": 1, "date": 1, "app_name": 1, "total_time": 1}
+    ).sort("total_time", -1)
+    for activity in activities:
+        activities_index[(activity["user_id"], activity["date"])].append(activity)
+    
+    summaries_index = {
+        (summary["user_id"], summary["date"]): summary
+        for summary in mongodb.daily_summaries_collection.find(
+            {"user_id": {"$in": user_ids}, "date": {"$in": day_strs}},
+            projection={"user_id": 1, "date": 1, "total_active_time": 1, "total_idle_time": 1}
+        )
+    }
+    
+    return activities_index, summaries_index
 
-def process_user_history(users, days, start_date, sessions_data):
+def process_user_history(users, day_strs, sessions_index, activities_index, summaries_index):
     history_data = []
     
     # Ensure users is a list
@@ -114,11 +150,9 @@ def process_user_history(users, days, start_date, sessions_data):
                 "days": []
             }
             
-            for i in range(days):
-                day = start_date + timedelta(days=i)
-                day_str = day.strftime("%Y-%m-%d")
-                session_data = get_session_data(user["_id"], day_str, sessions_data)
-                daily_data = get_daily_data(user["_id"], day_str, session_data)
+            for day_str in day_strs:
+                session_data = get_session_data(user["_id"], day_str, sessions_index)
+                daily_data = get_daily_data(user["_id"], day_str, session_data, activities_index, summaries_index)
                 
                 # Ensure daily_data is valid
                 if daily_data:
@@ -150,19 +184,15 @@ def process_user_history(users, days, start_date, sessions_data):
             
     return history_data
 
-def get_session_data(user_id, day_str, sessions_data):
-    return next((s for s in sessions_data if s["_id"]["user_id"] == user_id and s["_id"]["date"] == day_str), None)
+def get_session_data(user_id, day_str, sessions_index):
+    return sessions_index.get((user_id, day_str))
 
-def get_daily_data(user_id, day_str, session_data):
+def get_daily_data(user_id, day_str, session_data, activities_index, summaries_index):
     first_join_time, last_leave_time, total_session_hours = process_session_data(session_data)
-    activities = get_activities(user_id, day_str)
+    # .get keeps the defaultdict from growing an entry per empty day
+    activities = activities_index.get((user_id, day_str), [])
     app_usage, most_active_app = process_activities(activities)
-    
-    # Get daily summary directly from collection
-    daily_summary = daily_summaries_collection.find_one({
-        "user_id": user_id,
-        "date": day_str
-    })
+    daily_summary = summaries_index.get((user_id, day_str))
     
     return create_daily_data(day_str, first_join_time, last_leave_time, total_session_hours, app_usage, most_active_app, daily_summary)
 
@@ -185,12 +215,6 @@ def process_session_data(session_data):
     
     return first_join_time, last_leave_time, total_session_hours
 
-def get_activities(user_id, day_str):
-    return list(activities_collection.find({
-        "user_id": user_id,
-        "date": day_str
-    }))
-
 def process_activities(activities):
     # Ensure app_usage is always a list, even if empty
     app_usage = [
@@ -198,15 +222,9 @@ def process_activities(activities):
         for a in activities
     ] if activities else []
     
-    # Handle empty app_usage case
-    if not app_usage:
-        most_active_app = None
-    else:
-        try:
-            most_active_app = max(app_usage, key=lambda x: x.get("total_time", 0), default=None)
-        except (ValueError, TypeError):
-            most_active_app = None
-            
+    # Activities arrive sorted by total_time, so the first is the most used
+    most_active_app = app_usage[0] if app_usage else None
+    
     return app_usage, most_active_app
 
 def create_daily_data(day_str, first_join_time, last_leave_time, total_session_hours, app_usage, most_active_app, daily_summary):
@@ -228,39 +246,24 @@ def create_daily_data(day_str, first_join_time, last_leave_time, total_session_h
         else:
             last_activity = None
         
-        # Convert active time from minutes to hours
+        # Convert times from minutes to hours. app_usage and most_active_app
+        # come from process_activities, so every entry has both keys.
         active_time = 0
-        if daily_summary and "total_active_time" in daily_summary:
-            # Convert minutes to hours (divide by 60)
+        idle_time = 0
+        if daily_summary:
             active_time = round(daily_summary.get("total_active_time", 0) / 60, 2)
+            idle_time = round(daily_summary.get("total_idle_time", 0) / 60, 2)
         
-        # Ensure app_usage is a list
-        if not isinstance(app_usage, list):
-            app_usage = []
-        
-        # Convert app usage times from minutes to hours
-        normalized_app_usage = []
-        for app in app_usage:
-            if isinstance(app, dict) and "app_name" in app and "total_time" in app:
-                normalized_app_usage.append({
-                    "app_name": app["app_name"],
-                    "total_time": round(app["total_time"] / 60, 2)  # Convert minutes to hours
-                })
+        normalized_app_usage = [
+            {"app_name": app["app_name"], "total_time": round(app["total_time"] / 60, 2)}
+            for app in app_usage
+        ]
         
-        # Convert most active app time from minutes to hours
         most_used_app = None
         most_used_app_time = 0
-        if most_active_app and isinstance(most_active_app, dict):
-            if "app_name" in most_active_app:
-                most_used_app = most_active_app["app_name"]
-            if "total_time" in most_active_app:
-                most_used_app_time = round(most_active_app["total_time"] / 60, 2)
-        
-        # Convert idle time from minutes to hours if it exists
-        idle_time = 0
-        if daily_summary and "total_idle_time" in daily_summary:
-            # Convert minutes to hours (divide by 60)
-            idle_time = round(daily_summary.get("total_idle_time", 0) / 60, 2)
+        if most_active_app:
+            most_used_app = most_active_app["app_name"]
+            most_used_app_time = round(most_active_app["total_time"] / 60, 2)
         
         return {
             "date": day_str,
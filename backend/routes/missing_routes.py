@@ -3,12 +3,11 @@ Missing routes from the original server-old.py that need to be added to the refa
 """
 import logging
 import os
-from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
 from services.user_service import user_service
 from services.activity_service import activity_service
-from utils.helpers import monitor_performance, gzip_response
-from mongodb import daily_summaries_collection
+from utils.helpers import monitor_performance, gzip_response, etag_response, get_cached_data, parse_ymd, today_str
+import mongodb
 from bson import ObjectId
 
 logger = logging.getLogger(__name__)
@@ -48,11 +47,12 @@ def update_total_active_time():
 @missing_bp.route('/api/metrics', methods=['GET'])
 @monitor_performance
 @gzip_response
+@etag_response
 def get_metrics():
     """Get detailed metrics for a user"""
     try:
         username = request.args.get('username')
-        date_str = request.args.get('date', datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+        date_str = request.args.get('date', today_str())
         
         if not username:
             return jsonify({'error': 'Username required'}), 400
@@ -67,19 +67,21 @@ def get_metrics():
             
         # Parse date
         try:
-            current_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            current_date = parse_ymd(date_str)
         except ValueError:
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
             
-        # Calculate metrics
-        metrics = activity_service.calculate_productivity_metrics(user, current_date)
-        
-        # Add user info
-        metrics["username"] = user["username"]
-        metrics["display_name"] = user.get("display_name", user["username"])
-        metrics["date"] = date_str
+        def query_func():
+            metrics = activity_service.calculate_productivity_metrics(user, current_date)
+            
+            # Add user info
+            metrics["username"] = user["username"]
+            metrics["display_name"] = user.get("display_name", user["username"])
+            metrics["date"] = date_str
+            return metrics
         
-        return jsonify(metrics)
+        # Calculate metrics, reusing them for the cache TTL
+        return jsonify(get_cached_data(cache_key, "summaries", query_func))
         
     except Exception as e:
         logger.error(f"❌ Error getting metrics: {e}", exc_info=True)
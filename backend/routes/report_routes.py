@@ -6,8 +6,8 @@ from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
 from services.user_service import user_service
 from services.activity_service import activity_service
-from utils.helpers import monitor_performance, gzip_response
-from mongodb import activities_collection, users_collection
+from utils.helpers import monitor_performance, gzip_response, etag_response, parse_ymd
+import mongodb
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +17,7 @@ reports_bp = Blueprint('reports', __name__)
 @reports_bp.route('/api/reports/activity', methods=['GET'])
 @monitor_performance
 @gzip_response
+@etag_response
 def get_activity_report():
     """Get detailed activity report for a user"""
     try:
@@ -29,8 +30,8 @@ def get_activity_report():
 
         # Validate dates
         try:
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d") if start_date else datetime.now(timezone.utc)
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d") if end_date else start_dt
+            start_dt = parse_ymd(start_date) if start_date else datetime.now(timezone.utc)
+            end_dt = parse_ymd(end_date) if end_date else start_dt
         except ValueError:
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
 
@@ -40,8 +41,8 @@ def get_activity_report():
 
         activities = activity_service.get_user_activities(
             user["_id"], 
-            start_dt.date(),
-            end_dt.date()
+            start_dt.strftime("%Y-%m-%d"),
+            end_dt.strftime("%Y-%m-%d")
         )
 
         report_data = {
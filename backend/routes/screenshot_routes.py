@@ -3,6 +3,7 @@ Screenshot routes for handling screenshot-related API endpoints.
 """
 import logging
 import base64
+import io
 from flask import Blueprint, request, jsonify
 from services.user_service import user_service
 from services.s3_service import s3_service
@@ -16,26 +17,49 @@ screenshot_bp = Blueprint('screenshot', __name__)
 @screenshot_bp.route('/api/screenshot', methods=['POST'])
 @monitor_performance
 def upload_screenshot():
-    """Upload a screenshot"""
+    """Upload a screenshot.
+
+    Accepts a raw image/png body with ?username=, multipart/form-data with
+    the PNG as an 'image' file part and a 'username' field, or the older
+    JSON body with a base64 'image' string.
+    """
     try:
-        data = request.json
-        
-        if not data or 'username' not in data or 'image' not in data:
-            return jsonify({'error': 'Missing required fields'}), 400
+        if request.mimetype == 'image/png':
+            # The body is the PNG itself; it is streamed to S3 unread
+            username = request.args.get('username')
             
-        username = data['username']
-        image_data = data['image']
-        
-        # Remove data URL prefix if present
-        if image_data.startswith('data:image/png;base64,'):
-            image_data = image_data[len('data:image/png;base64,'):]
+            if not username or not request.content_length:
+                return jsonify({'error': 'Missing required fields'}), 400
+                
+            image_file = request.stream
+        elif request.files:
+            # Multipart uploads carry the raw PNG, so nothing is decoded
+            username = request.form.get('username')
+            image_part = request.files.get('image')
+            
+            if not username or image_part is None:
+                return jsonify({'error': 'Missing required fields'}), 400
+                
+            image_file = image_part.stream
+        else:
+            data = request.json
+            
+            if not data or 'username' not in data or 'image' not in data:
+                return jsonify({'error': 'Missing required fields'}), 400
+                
+            username = data['username']
+            image_data = data['image']
             
-        # Decode base64 image
-        try:
-            image_bytes = base64.b64decode(image_data)
-        except Exception as e:
-            logger.error(f"❌ Error decoding base64 image: {e}")
-            return jsonify({'error': 'Invalid image data'}), 400
+            # Remove data URL prefix if present
+            if image_data.startswith('data:image/png;base64,'):
+                image_data = image_data[len('data:image/png;base64,'):]
+                
+            # Decode base64 image
+            try:
+                image_file = io.BytesIO(base64.b64decode(image_data))
+            except Exception as e:
+                logger.error(f"❌ Error decoding base64 image: {e}")
+                return jsonify({'error': 'Invalid image data'}), 400
             
         # Get user
         user = user_service.get_user_by_username(username)
@@ -48,7 +72,7 @@ def upload_screenshot():
         object_key = f"screenshots/{username}/{timestamp}.png"
         
         # Upload to S3
-        success = s3_service.upload_file(image_bytes, object_key)
+        success = s3_service.upload_file(image_file, object_key)
         
         if not success:
             return jsonify({'error': 'Failed to upload screenshot'}), 500
@@ -6,8 +6,8 @@ from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
 from services.user_service import user_service
 from services.session_service import session_service
-from utils.helpers import monitor_performance, gzip_response
-from mongodb import sessions_collection
+from utils.helpers import monitor_performance, gzip_response, etag_response
+import mongodb
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +66,7 @@ def handle_session():
 @sessions_bp.route('/api/sessions/<username>', methods=['GET'])
 @monitor_performance
 @gzip_response
+@etag_response
 def get_user_sessions(username):
     """Get sessions for a specific user"""
     try:
@@ -2,10 +2,11 @@
 Stats routes for handling stats-related API endpoints.
 """
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from flask import Blueprint, request, jsonify
-from mongodb import users_collection, sessions_collection, activities_collection, daily_summaries_collection
-from utils.helpers import monitor_performance, gzip_response, serialize_mongodb_doc
+import mongodb
+from utils.helpers import monitor_performance, gzip_response, serialize_mongodb_doc, today_str
 import time
 
 logger = logging.getLogger(__name__)
@@ -13,23 +14,36 @@ logger = logging.getLogger(__name__)
 # Create Blueprint
 stats_bp = Blueprint('stats', __name__)
 
+# One worker per stats query, so their round trips overlap
+stats_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix='stats')
+
 @stats_bp.route('/api/stats', methods=['GET'])
 @monitor_performance
 @gzip_response
 def get_stats():
     """Get system statistics and metrics"""
     try:
-        # Get collection stats
-        users_count = users_collection.count_documents({})
-        sessions_count = sessions_collection.count_documents({})
-        activities_count = activities_collection.count_documents({})
-        summaries_count = daily_summaries_collection.count_documents({})
+        now = datetime.now(timezone.utc)
         
-        # Get active users (users with activity in the last 24 hours)
-        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
-        active_users = len(list(daily_summaries_collection.distinct("user_id", {
-            "last_updated": {"$gte": yesterday}
-        })))
+        # Get top apps across all users for today
+        pipeline = [
+            {"$match": {"date": today_str()}},
+            {"$group": {"_id": "$app_name", "total_time": {"$sum": "$total_time"}}},
+            {"$sort": {"total_time": -1}},
+            {"$limit": 10}
+        ]
+        
+        # Start every query before waiting on any of them
+        # Collection stats come from metadata; these totals needn't be exact
+        users_count = stats_executor.submit(mongodb.users_collection.estimated_document_count)
+        sessions_count = stats_executor.submit(mongodb.sessions_collection.estimated_document_count)
+        activities_count = stats_executor.submit(mongodb.activities_collection.estimated_document_count)
+        summaries_count = stats_executor.submit(mongodb.daily_summaries_collection.estimated_document_count)
+        # Active users are those with activity in the last 24 hours
+        active_user_ids = stats_executor.submit(mongodb.daily_summaries_collection.distinct, "user_id", {
+            "last_updated": {"$gte": now - timedelta(days=1)}
+        })
+        top_apps = stats_executor.submit(lambda: list(mongodb.activities_collection.aggregate(pipeline)))
         
         # Get cache stats from global cache object
         from utils.helpers import cache
@@ -37,33 +51,24 @@ def get_stats():
             "users_cached": len(cache["users"]),
             "sessions_cached": len(cache["sessions"]),
             "summaries_cached": len(cache["summaries"]),
-            "total_cached_items": len(cache["users"]) + len(cache["sessions"]) + len(cache["summaries"])
+            "responses_cached": len(cache["responses"]),
+            "total_cached_items": len(cache["users"]) + len(cache["sessions"]) + len(cache["summaries"]) + len(cache["responses"])
         }
         
-        # Get top apps across all users for today
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        pipeline = [
-            {"$match": {"date": today}},
-            {"$group": {"_id": "$app_name", "total_time": {"$sum": "$total_time"}}},
-            {"$sort": {"total_time": -1}},
-            {"$limit": 10}
-        ]
-        top_apps = list(activities_collection.aggregate(pipeline))
-        
         # Get app start time from Flask app
         from flask import current_app
         uptime = time.time() - current_app.start_time if hasattr(current_app, 'start_time') else 0
         
         return jsonify({
             "database": {
-                "users": users_count,
-                "sessions": sessions_count,
-                "activities": activities_count,
-                "summaries": summaries_count,
-                "active_users_24h": active_users
+                "users": users_count.result(),
+                "sessions": sessions_count.result(),
+                "activities": activities_count.result(),
+                "summaries": summaries_count.result(),
+                "active_users_24h": len(active_user_ids.result())
             },
             "cache": cache_stats,
-            "top_apps_today": [{"app": app["_id"], "minutes": app["total_time"]} for app in top_apps],
+            "top_apps_today": [{"app": app["_id"], "minutes": app["total_time"]} for app in top_apps.result()],
             "server_time": datetime.now(timezone.utc).isoformat(),
             "uptime": uptime
         })
@@ -79,24 +84,24 @@ def verify_data():
         if not username:
             return jsonify({'error': 'Username required'}), 400
 
-        user = users_collection.find_one({"username": username})
+        user = mongodb.users_collection.find_one({"username": username}, projection={"_id": 1})
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
         # Get today's date
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        today = today_str()
 
         # Get activities
-        activities = list(activities_collection.find({
+        activities = list(mongodb.activities_collection.find({
             "user_id": user["_id"],
             "date": today
-        }))
+        }, projection={"app_name": 1, "total_time": 1, "last_updated": 1, "_id": 0}))
 
         # Get daily summary
-        daily_summary = daily_summaries_collection.find_one({
+        daily_summary = mongodb.daily_summaries_collection.find_one({
             "user_id": user["_id"],
             "date": today
-        })
+        }, projection={"total_active_time": 1, "last_updated": 1, "_id": 0})
 
         return jsonify({
             'activities': [
@@ -127,10 +132,11 @@ def clear_cache():
             
         # Clear cache
         from utils.helpers import cache
-        cache_size = len(cache["users"]) + len(cache["sessions"]) + len(cache["summaries"])
+        cache_size = len(cache["users"]) + len(cache["sessions"]) + len(cache["summaries"]) + len(cache["responses"])
         cache["users"].clear()
         cache["sessions"].clear()
         cache["summaries"].clear()
+        cache["responses"].clear()
         cache["last_updated"].clear()
         
         return jsonify({
@@ -5,7 +5,7 @@ import logging
 from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
 from services.user_service import user_service
-from utils.helpers import monitor_performance, gzip_response, serialize_mongodb_doc
+from utils.helpers import monitor_performance, gzip_response, etag_response
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +15,13 @@ users_bp = Blueprint('users', __name__)
 @users_bp.route('/api/users', methods=['GET'])
 @monitor_performance
 @gzip_response
+@etag_response
 def get_users():
     """Get all users"""
     try:
         users = user_service.get_all_users()
         return jsonify({
-            'users': serialize_mongodb_doc(users)
+            'users': users
         })
     except Exception as e:
         logger.error(f"❌ Error getting users: {e}")
@@ -29,12 +30,13 @@ def get_users():
 @users_bp.route('/api/users/active', methods=['GET'])
 @monitor_performance
 @gzip_response
+@etag_response
 def get_active_users():
     """Get all active users"""
     try:
         users = user_service.get_active_users()
         return jsonify({
-            'users': serialize_mongodb_doc(users)
+            'users': users
         })
     except Exception as e:
         logger.error(f"❌ Error getting active users: {e}")
@@ -43,6 +45,7 @@ def get_active_users():
 @users_bp.route('/api/users/<username>', methods=['GET'])
 @monitor_performance
 @gzip_response
+@etag_response
 def get_user(username):
     """Get user by username"""
     try:
@@ -52,7 +55,7 @@ def get_user(username):
             return jsonify({'error': 'User not found'}), 404
             
         return jsonify({
-            'user': serialize_mongodb_doc(user)
+            'user': user
         })
     except Exception as e:
         logger.error(f"❌ Error getting user: {e}")
@@ -92,7 +95,10 @@ def session_status():
             return jsonify({'error': 'User not found'}), 404
 
         # Get latest session
-        latest_session = user_service.get_latest_session(user["_id"])
+        latest_session = user_service.get_latest_session(
+            user["_id"],
+            projection={"screen_shared": 1, "channel": 1, "timestamp": 1, "active_app": 1, "active_apps": 1, "_id": 0}
+        )
 
         # Ensure we return a valid response even if session is None
         return jsonify({
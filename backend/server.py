@@ -1,24 +1,30 @@
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from datetime import datetime, timedelta, timezone
-from pymongo import MongoClient, UpdateOne, ASCENDING, DESCENDING
+from datetime import date, datetime, timedelta, timezone
+from pymongo import UpdateOne, ASCENDING, DESCENDING
 from bson import ObjectId
 from bson import json_util
 from apscheduler.schedulers.background import BackgroundScheduler
-from mongodb import users_collection, sessions_collection, activities_collection, daily_summaries_collection, app_usage_collection
+from apscheduler.executors.pool import ThreadPoolExecutor as APSThreadPoolExecutor
+from config import OrjsonProvider
+from mongodb import mongo_connection, users_collection, sessions_collection, activities_collection, daily_summaries_collection, app_usage_collection
 import json
+import orjson
+import zlib
 import boto3
 import os
 import time
 import logging
 import threading
 import pymongo
-from functools import wraps
+from collections import defaultdict
+from functools import lru_cache, wraps
 from dotenv import load_dotenv
 import gzip
 import io
+import re
 
 
 # Configure logging
@@ -31,6 +37,9 @@ logger = logging.getLogger(__name__)
 
 # Create Flask app
 app = Flask(__name__)
+# jsonify/create_response encode with orjson; ObjectIds become hex strings
+# and datetimes ISO 8601
+app.json = OrjsonProvider(app)
 # Increase maximum content length to 50MB
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB in bytes
 app.config['JSON_SORT_KEYS'] = False  # Preserve key order in JSON responses
@@ -42,23 +51,24 @@ CORS(app, resources={r"/*": {
     "supports_credentials": True
 }})
 
-# Configure rate limiting - high limits for multiple users
+# Load environment variables
+load_dotenv()
+
+# Configure rate limiting - high limits for multiple users. Counters live in
+# Redis when LIMITER_REDIS_URI is set, so all workers share one limit;
+# otherwise each worker keeps its own in-memory fixed-window counters.
+LIMITER_STORAGE_URI = os.getenv('LIMITER_REDIS_URI', 'memory://')
 limiter = Limiter(
     key_func=get_remote_address,
     app=app,
+    storage_uri=LIMITER_STORAGE_URI,
+    strategy='fixed-window' if LIMITER_STORAGE_URI == 'memory://' else 'moving-window',
     default_limits=["10000 per day", "2000 per hour"]
 )
 
-# Load environment variables
-load_dotenv()
-
-# Initialize MongoDB client with connection pooling
-mongo_client = MongoClient(
-    os.getenv('MONGO_URI', 'mongodb://localhost:27017/'),
-    maxPoolSize=50,
-    minPoolSize=10,
-    maxIdleTimeMS=30000
-)
+# Share the MongoDBConnection singleton's client; a second MongoClient here
+# would open a second pool of up to 50 connections per worker
+mongo_client = mongo_connection.client
 
 # Add connection pool monitoring
 def monitor_db_connection_pool():
@@ -84,10 +94,6 @@ def monitor_db_connection_pool():
     except Exception as e:
         logger.error(f"❌ Error monitoring connection pool: {e}")
 
-# Schedule connection pool monitoring
-scheduler = BackgroundScheduler()
-scheduler.add_job(monitor_db_connection_pool, 'interval', minutes=5)  # Check every 5 minutes
-
 # Initialize S3 client
 s3_client = boto3.client(
     's3',
@@ -98,6 +104,10 @@ s3_client = boto3.client(
 )
 
 S3_BUCKET = os.getenv('S3_BUCKET', 'km-wfh-monitoring-bucket')
+S3_URL_PREFIX = f"https://{S3_BUCKET}.s3.{os.getenv('AWS_REGION', 'us-east-1')}.amazonaws.com/"
+
+# YYYY-MM-DD, checked without building a datetime
+DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
 
 # Create indexes for better performance
 try:
@@ -107,11 +117,24 @@ try:
     sessions_collection.create_index([("user_id", ASCENDING), ("start_time", ASCENDING)])
     sessions_collection.create_index([("user_id", ASCENDING), ("stop_time", DESCENDING)])
     activities_collection.create_index([("user_id", ASCENDING), ("date", ASCENDING), ("app_name", ASCENDING)])
-    daily_summaries_collection.create_index([("user_id", ASCENDING), ("date", ASCENDING)])
+    # One summary per user and day; descending date serves "latest N days"
+    daily_summaries_collection.create_index([("user_id", ASCENDING), ("date", DESCENDING)], unique=True)
     logger.info("✅ Database indexes created successfully")
 except Exception as e:
     logger.error(f"❌ Error creating database indexes: {e}")
 
+# Fields of the latest session the event handlers read
+SESSION_EVENT_PROJECTION = {"_id": 1, "start_time": 1}
+
+# Fields of the latest session shown on the dashboard
+DASHBOARD_SESSION_PROJECTION = {
+    "user_id": 1,
+    "timestamp": 1,
+    "channel": 1,
+    "screen_shared": 1,
+    "screen_share_time": 1
+}
+
 # Cache for frequently accessed data
 cache = {
     "users": {},
@@ -152,8 +175,10 @@ def gzip_response(f):
     def decorated_function(*args, **kwargs):
         response = f(*args, **kwargs)
         
-        # Check if client accepts gzip encoding
-        if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+        # Check if client accepts gzip encoding; responses that are already
+        # encoded (e.g. the streamed history) are passed through
+        if ('gzip' in request.headers.get('Accept-Encoding', '').lower()
+                and 'Content-Encoding' not in response.headers):
             content = response.data
             
             gzip_buffer = io.BytesIO()
@@ -194,6 +219,16 @@ def ensure_timezone_aware(dt):
         return dt.replace(tzinfo=timezone.utc)
     return dt
 
+def is_valid_date(date_str):
+    """Check that a string is a real YYYY-MM-DD calendar date (rejects 2024-02-31)"""
+    if not DATE_RE.match(date_str):
+        return False
+    try:
+        date.fromisoformat(date_str)
+    except ValueError:
+        return False
+    return True
+
 def get_cached_data(cache_key, collection_key, query_func, ttl=CACHE_TTL):
     """Get data from cache or execute query function if cache is stale"""
     current_time = time.time()
@@ -265,7 +300,11 @@ def get_or_create_user(username):
 
 def handle_event(data, user_id):
     event = data['event']
-    session = sessions_collection.find_one({"user_id": user_id}, sort=[("timestamp", -1)])
+    session = sessions_collection.find_one(
+        {"user_id": user_id},
+        projection=SESSION_EVENT_PROJECTION,
+        sort=[("timestamp", -1)]
+    )
 
     if event == "joined":
         handle_join_event(data, user_id, session)
@@ -292,16 +331,43 @@ def handle_join_event(data, user_id, session):
         "timestamp": current_time,
         "total_working_hours": 0  # Initialize total working hours
     })
+    record_duty_times(user_id, first_join=current_time)
+
+def record_duty_times(user_id, first_join=None, last_leave=None):
+    """Fold a join or leave time into the user's daily summary for that day.
+
+    The summary keeps the day's earliest first_join, latest last_leave and
+    the total_session_hours between them, so the dashboard can read them
+    instead of searching the day's sessions.
+    """
+    event_time = first_join or last_leave
+    if first_join:
+        update = {"first_join": {"$min": ["$first_join", first_join]}}
+    else:
+        update = {"last_leave": {"$max": ["$last_leave", last_leave]}}
+    
+    daily_summaries_collection.update_one(
+        {"user_id": user_id, "date": event_time.strftime("%Y-%m-%d")},
+        [
+            {"$set": update},
+            {"$set": {"total_session_hours": {"$cond": [
+                {"$and": ["$first_join", "$last_leave", {"$gt": ["$last_leave", "$first_join"]}]},
+                {"$round": [{"$divide": [{"$subtract": ["$last_leave", "$first_join"]}, 3600000]}, 2]},
+                0
+            ]}}}
+        ],
+        upsert=True
+    )
 
 def handle_left_event(user_id, session):
     if session:
         print(f"🔄 User left the channel for user_id: {user_id}")
         start_time = session.get("start_time")
+        stop_time = datetime.now(timezone.utc)
         
         if start_time:
             # Ensure start_time is timezone aware
             start_time = ensure_timezone_aware(start_time)
-            stop_time = datetime.now(timezone.utc)
 
             # Calculate duration only if start_time is valid
             if start_time < stop_time:
@@ -334,10 +400,11 @@ def handle_left_event(user_id, session):
             sessions_collection.update_one(
                 {"_id": session["_id"]},
                 {
-                    "$set": {"stop_time": datetime.now(timezone.utc), "channel": None, "event": "left", 
-                             "timestamp": datetime.now(timezone.utc)}
+                    "$set": {"stop_time": stop_time, "channel": None, "event": "left", 
+                             "timestamp": stop_time}
                 }
             )
+        record_duty_times(user_id, last_leave=stop_time)
     else:
         print(f"❌ No session found for user_id: {user_id}")
         raise ValueError('No session found')
@@ -397,6 +464,25 @@ def handle_stop_streaming_event(user_id, session):
         raise ValueError('No active screen sharing session found')
 
 
+def summarize_app_usage(user_id, day_str):
+    """Return the daily summary fields derived from a user's activities for a day.
+
+    app_usage lists each app's minutes, most used first; the dashboard reads
+    these from the summary instead of querying activities.
+    """
+    app_usage = [
+        {"app_name": a["app_name"], "total_time": max(a.get("total_time", 0), 0)}
+        for a in activities_collection.find(
+            {"user_id": user_id, "date": day_str},
+            projection={"_id": 0, "app_name": 1, "total_time": 1}
+        ).sort("total_time", -1)
+    ]
+    return {
+        "app_usage": app_usage,
+        "active_apps": [a["app_name"] for a in app_usage if a["total_time"] > 0],
+        "most_used_app": app_usage[0] if app_usage else None
+    }
+
 @app.route('/api/activity', methods=['POST'])
 @limiter.limit("6000/hour")  # 20 users * 300 requests per hour
 @limiter.limit("120/minute")  # 20 users * 6 requests per minute
@@ -472,9 +558,11 @@ def activity():
                 print(f"⚠️ Duplicate or old sync for {app_name} on {current_date}, ignoring.")
         
         # Execute bulk operations if any
+        app_usage_fields = {}
         if bulk_operations:
             activities_collection.bulk_write(bulk_operations)
             print(f"✅ Bulk updated {len(bulk_operations)} app activities")
+            app_usage_fields = summarize_app_usage(ObjectId(user["_id"]), current_date)
 
         # Update daily summary
         total_time = sum(app_usage.values())
@@ -511,7 +599,8 @@ def activity():
             "$set": {
                 "last_updated": now_utc,
                 "username": user['username'],
-                "app_summaries": updated_summaries
+                "app_summaries": updated_summaries,
+                **app_usage_fields
             }
         }
         
@@ -586,35 +675,13 @@ def dashboard():
         users = list(users_collection.find().skip(skip).limit(per_page))
         current_date = datetime.now(timezone.utc).date()
         
-        # Process user data in parallel using threads
-        dashboard_data = []
-        threads = []
-        results = [None] * len(users)
-        
-        def process_user(index, user):
-            try:
-                results[index] = get_user_dashboard_data(user, current_date)
-            except Exception as e:
-                logger.error(f"Error processing user {user.get('username')}: {e}")
-                results[index] = {
-                    "username": user.get("username", "unknown"),
-                    "display_name": user.get("display_name", user.get("username", "unknown")),
-                    "error": str(e),
-                    "active_apps": []  # Ensure active_apps is always an array
-                }
-        
-        # Create and start threads
-        for i, user in enumerate(users):
-            thread = threading.Thread(target=process_user, args=(i, user))
-            threads.append(thread)
-            thread.start()
-        
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
-        
-        # Collect results and filter out None values
-        dashboard_data = [r for r in results if r is not None]
+        # Load the whole page's sessions, activities and summaries in a fixed
+        # number of queries, then assemble each user's row from memory
+        page_data = fetch_dashboard_data(users, current_date)
+        dashboard_data = [
+            get_user_dashboard_data(user, current_date, page_data[user["_id"]])
+            for user in users
+        ]
         
         # Ensure data is an array
         if not isinstance(dashboard_data, list):
@@ -631,13 +698,12 @@ def dashboard():
             }
         }
         
-        serialized_data = serialize_mongodb_doc(response_data)
-        
-        # Cache the result
-        cache["users"][cache_key] = serialized_data
+        # The app's orjson provider encodes the ObjectIds and datetimes in
+        # the raw daily summaries, so no separate serialization pass is needed
+        cache["users"][cache_key] = response_data
         cache["last_updated"][cache_key] = time.time()
         
-        return create_response(serialized_data)
+        return create_response(response_data)
     except Exception as e:
         logger.error(f"❌ Error in dashboard endpoint: {e}", exc_info=True)
         # Return a valid response even on error
@@ -647,51 +713,164 @@ def dashboard():
             'data': []  # Ensure data is always an array
         }), 500
 
-def calculate_total_working_hours(user, current_date):
-    """Calculate total working hours for a user on a specific date"""
-    day_start = datetime.combine(current_date, datetime.min.time(), tzinfo=timezone.utc)
-    day_end = datetime.combine(current_date, datetime.max.time(), tzinfo=timezone.utc)
+# Added to a day's midnight to get its last microsecond
+DAY_END_OFFSET = timedelta(days=1, microseconds=-1)
+
+@lru_cache(maxsize=32)
+def get_day_bounds(current_date):
+    """Return the UTC start and end datetimes of a date.
+
+    Cached, since a dashboard page asks for the same date once per user.
+    """
+    day_start = datetime(current_date.year, current_date.month, current_date.day, tzinfo=timezone.utc)
+    return day_start, day_start + DAY_END_OFFSET
+
+def parse_ymd(date_str):
+    """Parse a YYYY-MM-DD string into a date with the C ISO parser, as
+    strictly as strptime did. Raises ValueError for anything else.
+    """
+    if len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
+        raise ValueError(f"Invalid date: {date_str!r}")
+    return date.fromisoformat(date_str)
+
+def fetch_dashboard_data(users, current_date):
+    """Load the dashboard inputs for a list of users in one aggregation.
+
+    Returns {user_id: {"latest_session", "day_sessions", "activities",
+    "daily_summary", "daily_summaries"}} with empty values for users that
+    have no matching documents. "activities" is the day's per-app usage,
+    most used first, as stored on the daily summary or, for summaries
+    written before it was kept there, read from the activities collection.
+    "daily_summaries" covers the seven days up to current_date, newest first.
+    """
+    user_ids = [user["_id"] for user in users]
+    day_str = current_date.strftime("%Y-%m-%d")
+    day_start, day_end = get_day_bounds(current_date)
+    recent_days = [(current_date - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
     
-    # Find all sessions for the day
-    sessions = list(sessions_collection.find({
-        "user_id": user["_id"],
-        "start_time": {"$gte": day_start, "$lte": day_end},
-        "stop_time": {"$ne": None}
-    }))
+    # One result document per user, each joined branch bounded (one session,
+    # the day's sessions, seven summaries), so the result grows with the page
+    # size rather than with the stored history. The lookups join on user_id
+    # and use each collection's user_id indexes.
+    pipeline = [
+        {"$match": {"_id": {"$in": user_ids}}},
+        {"$project": {"_id": 1}},
+        {"$lookup": {
+            "from": sessions_collection.name,
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": [
+                {"$sort": {"timestamp": -1}},
+                {"$limit": 1},
+                {"$project": DASHBOARD_SESSION_PROJECTION}
+            ],
+            "as": "latest_session"
+        }},
+        # Every session that started or stopped on the day; first join, last
+        # leave and the working-hour sums are all derived from these
+        {"$lookup": {
+            "from": sessions_collection.name,
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": [
+                {"$match": {"$or": [
+                    {"start_time": {"$gte": day_start, "$lte": day_end}},
+                    {"stop_time": {"$gte": day_start, "$lte": day_end}}
+                ]}},
+                {"$project": {"user_id": 1, "event": 1, "start_time": 1, "stop_time": 1}}
+            ],
+            "as": "day_sessions"
+        }},
+        # The summaries are sent to the client as-is, so _id is dropped and
+        # user_id goes out as a string
+        {"$lookup": {
+            "from": daily_summaries_collection.name,
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": [
+                {"$match": {"date": {"$in": recent_days}}},
+                {"$sort": {"date": -1}},
+                {"$unset": "_id"},
+                {"$set": {"user_id": {"$toString": "$user_id"}}}
+            ],
+            "as": "daily_summaries"
+        }}
+    ]
+    
+    data = {
+        user_id: {
+            "latest_session": None,
+            "day_sessions": [],
+            "activities": [],
+            "daily_summary": None,
+            "daily_summaries": []
+        }
+        for user_id in user_ids
+    }
+    
+    for row in users_collection.aggregate(pipeline):
+        user_data = data[row["_id"]]
+        user_data["latest_session"] = row["latest_session"][0] if row["latest_session"] else None
+        user_data["day_sessions"] = row["day_sessions"]
+        user_data["daily_summaries"] = row["daily_summaries"]
+        # Newest first, so the day's own summary can only be the first one
+        summaries = row["daily_summaries"]
+        if summaries and summaries[0]["date"] == day_str:
+            user_data["daily_summary"] = summaries[0]
+            user_data["activities"] = summaries[0].get("app_usage", [])
+    
+    # The activity endpoint keeps the day's per-app minutes on the summary;
+    # users whose summary predates that are read from activities in one query
+    missing_app_usage = [
+        user_id for user_id, user_data in data.items()
+        if not user_data["daily_summary"] or "app_usage" not in user_data["daily_summary"]
+    ]
+    if missing_app_usage:
+        activities = activities_collection.find(
+            {"user_id": {"$in": missing_app_usage}, "date": day_str},
+            projection={"_id": 0, "user_id": 1, "app_name": 1, "total_time": 1}
+        ).sort("total_time", -1)
+        for activity in activities:
+            data[activity["user_id"]]["activities"].append(
+                {"app_name": activity["app_name"], "total_time": max(activity.get("total_time", 0), 0)}
+            )
+    
+    return data
+
+def calculate_total_working_hours(user, current_date, day_sessions):
+    """Calculate total working hours for a user on a specific date"""
+    day_start, day_end = get_day_bounds(current_date)
     
+    # Sum the closed sessions that started on the day
     total_seconds = 0
-    for session in sessions:
+    for session in day_sessions:
         if session.get("start_time") and session.get("stop_time"):
             start_time = ensure_timezone_aware(session["start_time"])
             stop_time = ensure_timezone_aware(session["stop_time"])
-            if stop_time > start_time:
+            if day_start <= start_time <= day_end and stop_time > start_time:
                 duration = (stop_time - start_time).total_seconds()
                 total_seconds += duration
     
     return round(total_seconds / 3600, 2)  # Convert to hours
 
-def calculate_productivity_metrics(user, current_date):
-    """Calculate productivity metrics for a user on a specific date"""
-    day_str = current_date.strftime("%Y-%m-%d")
-    
-    # Get daily summary
-    daily_summary = daily_summaries_collection.find_one({
-        "user_id": user["_id"],
-        "date": day_str
-    })
+def calculate_productivity_metrics(user, current_date, user_data=None):
+    """Calculate productivity metrics for a user on a specific date.
+
+    user_data is the user's entry from fetch_dashboard_data; it is fetched
+    when not given.
+    """
+    if user_data is None:
+        user_data = fetch_dashboard_data([user], current_date)[user["_id"]]
     
-    # Get activities
-    activities = list(activities_collection.find({
-        "user_id": user["_id"],
-        "date": day_str
-    }))
+    daily_summary = user_data["daily_summary"]
+    activities = user_data["activities"]
+    day_sessions = user_data["day_sessions"]
     
     # Get sessions
-    first_join, last_leave = get_day_sessions(user, current_date)
-    total_session_hours = calculate_session_time(first_join, last_leave)
+    first_join, last_leave, total_session_hours = get_duty_times(user, current_date, user_data)
     
     # Calculate total working hours (sum of all sessions)
-    total_working_hours = calculate_total_working_hours(user, current_date)
+    total_working_hours = calculate_total_working_hours(user, current_date, day_sessions)
     
     # If we have activities but no session data, estimate session time from activities
     if total_session_hours == 0 and activities:
@@ -775,20 +954,16 @@ def calculate_productivity_metrics(user, current_date):
     metrics["productive_apps"] = productive_apps[:5]  # Top 5
     metrics["distracting_apps"] = distracting_apps[:5]  # Top 5
     
-    # Calculate average session length
-    sessions = list(sessions_collection.find({
-        "user_id": user["_id"],
-        "start_time": {"$gte": datetime.combine(current_date, datetime.min.time(), tzinfo=timezone.utc)},
-        "stop_time": {"$lte": datetime.combine(current_date, datetime.max.time(), tzinfo=timezone.utc)}
-    }))
+    # Calculate average session length over sessions held within the day
+    day_start, day_end = get_day_bounds(current_date)
     
-    if sessions:
+    if day_sessions:
         session_durations = []
-        for session in sessions:
+        for session in day_sessions:
             if session.get("start_time") and session.get("stop_time"):
                 start = ensure_timezone_aware(session["start_time"])
                 stop = ensure_timezone_aware(session["stop_time"])
-                if stop > start:
+                if start >= day_start and stop <= day_end and stop > start:
                     duration = (stop - start).total_seconds() / 3600  # hours
                     session_durations.append(duration)
         
@@ -797,34 +972,25 @@ def calculate_productivity_metrics(user, current_date):
     
     return metrics
 
-def get_user_dashboard_data(user, current_date):
+def get_user_dashboard_data(user, current_date, user_data):
+    """Build one user's dashboard row from their fetch_dashboard_data entry"""
     try:
-        latest_session = get_latest_session(user)
-        first_join, last_leave = get_day_sessions(user, current_date)
-        total_session_hours = calculate_session_time(first_join, last_leave)
-        total_working_hours = calculate_total_working_hours(user, current_date)
-        app_usage, total_active_time, active_apps, most_active_app = get_app_usage(user, current_date)
-        daily_summary = get_daily_summary(user, current_date)
+        latest_session = user_data["latest_session"]
+        daily_summary = user_data["daily_summary"]
+        first_join, last_leave, total_session_hours = get_duty_times(user, current_date, user_data)
+        total_working_hours = calculate_total_working_hours(user, current_date, user_data["day_sessions"])
+        app_usage, total_active_time, active_apps, most_active_app = get_app_usage(
+            user_data["activities"], daily_summary
+        )
         
         # Calculate additional metrics
-        productivity_metrics = calculate_productivity_metrics(user, current_date)
-        
-        # Ensure timestamp is properly formatted if it exists
-        timestamp = None
-        if latest_session and latest_session.get("timestamp"):
-            timestamp_dt = ensure_timezone_aware(latest_session.get("timestamp"))
-            timestamp = timestamp_dt.isoformat()
-        
-        # Ensure duty start and end times are properly formatted
-        duty_start_time = None
-        if first_join and first_join.get("start_time"):
-            start_time_dt = ensure_timezone_aware(first_join.get("start_time"))
-            duty_start_time = start_time_dt.isoformat()
+        productivity_metrics = calculate_productivity_metrics(user, current_date, user_data)
         
-        duty_end_time = None
-        if last_leave and last_leave.get("stop_time"):
-            end_time_dt = ensure_timezone_aware(last_leave.get("stop_time"))
-            duty_end_time = end_time_dt.isoformat()
+        # Datetimes are left as-is; the orjson provider writes them as ISO
+        # 8601, treating naive values from Mongo as UTC
+        timestamp = latest_session.get("timestamp") if latest_session else None
+        duty_start_time = first_join.get("start_time") if first_join else None
+        duty_end_time = last_leave.get("stop_time") if last_leave else None
         
         # Handle potential None values for most_active_app
         most_used_app = None
@@ -833,15 +999,7 @@ def get_user_dashboard_data(user, current_date):
             most_used_app = most_active_app.get("app_name")
             most_used_app_time = round(most_active_app.get("total_time", 0), 2)
         
-        # Safely get daily summaries
-        try:
-            daily_summaries = list(daily_summaries_collection.find(
-                {"user_id": user["_id"]},
-                sort=[("date", -1)],
-                limit=7
-            ))
-        except Exception:
-            daily_summaries = []
+        daily_summaries = user_data["daily_summaries"]
         
         return {
             "username": user["username"],
@@ -893,39 +1051,49 @@ def get_user_dashboard_data(user, current_date):
             "daily_summaries": []
         }
 
-def get_latest_session(user):
-    return sessions_collection.find_one(
-        {"user_id": user["_id"]},
-        sort=[("timestamp", -1)]
-    )
-
-def get_day_sessions(user, current_date):
-    """Get the first join and last leave for a user on a specific date"""
-    day_start = datetime.combine(current_date, datetime.min.time(), tzinfo=timezone.utc)
-    day_end = datetime.combine(current_date, datetime.max.time(), tzinfo=timezone.utc)
+def get_duty_times(user, current_date, user_data):
+    """Return (first_join, last_leave, total_session_hours) for the day.
+
+    Uses the values record_duty_times keeps on the daily summary, and falls
+    back to the day's sessions for days recorded before those existed or
+    with no leave yet.
+    """
+    daily_summary = user_data["daily_summary"]
+    if daily_summary and daily_summary.get("first_join") and daily_summary.get("last_leave"):
+        return (
+            {"start_time": daily_summary["first_join"]},
+            {"stop_time": daily_summary["last_leave"]},
+            daily_summary.get("total_session_hours", 0)
+        )
     
-    # Find the first join of the day
-    first_join = sessions_collection.find_one({
-        "user_id": user["_id"],
-        "event": "joined",
-        "start_time": {"$gte": day_start, "$lte": day_end}
-    }, sort=[("start_time", 1)])  # Sort by start_time ascending
+    first_join, last_leave = get_day_sessions(user, current_date, user_data["day_sessions"], daily_summary)
+    return first_join, last_leave, calculate_session_time(first_join, last_leave)
+
+def get_day_sessions(user, current_date, day_sessions, daily_summary):
+    """Get the first join and last leave for a user on a specific date.
+
+    day_sessions and daily_summary come from fetch_dashboard_data.
+    """
+    day_start, day_end = get_day_bounds(current_date)
     
-    # Find the last leave of the day
-    last_leave = sessions_collection.find_one({
-        "user_id": user["_id"],
-        "event": "left",
-        "stop_time": {"$gte": day_start, "$lte": day_end}
-    }, sort=[("stop_time", -1)])  # Sort by stop_time descending
+    # Earliest join and latest leave of the day
+    first_join = None
+    first_join_time = None
+    last_leave = None
+    last_leave_time = None
+    for session in day_sessions:
+        event = session.get("event")
+        if event == "joined" and session.get("start_time"):
+            start_time = ensure_timezone_aware(session["start_time"])
+            if day_start <= start_time <= day_end and (first_join_time is None or start_time < first_join_time):
+                first_join, first_join_time = session, start_time
+        elif event == "left" and session.get("stop_time"):
+            stop_time = ensure_timezone_aware(session["stop_time"])
+            if day_start <= stop_time <= day_end and (last_leave_time is None or stop_time > last_leave_time):
+                last_leave, last_leave_time = session, stop_time
     
     # If no session data found, use activity data to estimate session time
     if not first_join or not last_leave:
-        # Get daily summary to find activity timestamps
-        daily_summary = daily_summaries_collection.find_one({
-            "user_id": user["_id"],
-            "date": current_date.strftime("%Y-%m-%d")
-        })
-        
         if daily_summary and "app_summaries" in daily_summary and daily_summary["app_summaries"]:
             # Extract timestamps from app summaries
             timestamps = []
@@ -976,25 +1144,14 @@ def calculate_session_time(first_join, last_leave):
             return 0
     return 0
 
-def get_app_usage(user, current_date):
-    day_str = current_date.strftime("%Y-%m-%d")
-    activities_today = list(activities_collection.find({
-        "user_id": user["_id"],
-        "date": day_str
-    }))
-    
+def get_app_usage(activities_today, daily_summary):
+    """Summarize a user's app usage from today's activities and daily summary"""
     # Ensure app_usage is always a list, even if empty
     app_usage = [
         {"app_name": a["app_name"], "total_time": max(a.get("total_time", 0), 0)}
         for a in activities_today
     ] if activities_today else []
     
-    # Get total_active_time from daily_summary instead of calculating from activities
-    daily_summary = daily_summaries_collection.find_one({
-        "user_id": user["_id"],
-        "date": day_str
-    })
-    
     # Use the stored total_active_time if available, otherwise calculate from activities
     if daily_summary and "total_active_time" in daily_summary:
         total_active_time = daily_summary["total_active_time"]
@@ -1003,31 +1160,16 @@ def get_app_usage(user, current_date):
         total_active_time = round(sum(a.get("total_time", 0) for a in app_usage), 2)
         print(f"📊 Calculated total_active_time from activities: {total_active_time}")
     
+    # The activity endpoint stores these on the summary alongside app_usage
+    if daily_summary and "active_apps" in daily_summary:
+        return app_usage, total_active_time, daily_summary["active_apps"], daily_summary["most_used_app"]
+    
     active_apps = [a["app_name"] for a in app_usage if a.get("total_time", 0) > 0]
     
-    # Handle empty app_usage case
-    if not app_usage:
-        most_active_app = None
-    else:
-        try:
-            most_active_app = max(app_usage, key=lambda x: x.get("total_time", 0), default=None)
-        except (ValueError, TypeError):
-            most_active_app = None
-            
-    return app_usage, total_active_time, active_apps, most_active_app
-
-def get_daily_summary(user, current_date):
-    # Check if current_date is already a string or a datetime object
-    if isinstance(current_date, str):
-        day_str = current_date
-    else:
-        day_str = current_date.strftime("%Y-%m-%d")
+    # Activities arrive sorted by total_time, so the first is the most used
+    most_active_app = app_usage[0] if app_usage else None
     
-    # Use projection to get only needed fields
-    return daily_summaries_collection.find_one(
-        {"user_id": user["_id"], "date": day_str},
-        projection={"total_active_time": 1, "total_idle_time": 1, "app_summaries": 1, "_id": 1}
-    )
+    return app_usage, total_active_time, active_apps, most_active_app
 
 def create_response(data):
     """Create a properly formatted JSON response with appropriate headers"""
@@ -1058,13 +1200,14 @@ def session_status():
         if not username:
             return jsonify({'error': 'Username required'}), 400
 
-        user = users_collection.find_one({"username": username})
+        user = users_collection.find_one({"username": username}, projection={"username": 1, "display_name": 1})
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
         # Get latest session
         session = sessions_collection.find_one(
             {"user_id": user["_id"]},
+            projection={"screen_shared": 1, "channel": 1, "timestamp": 1, "active_app": 1, "active_apps": 1, "_id": 0},
             sort=[("timestamp", -1)]
         )
 
@@ -1091,7 +1234,7 @@ def verify_data():
         if not username:
             return jsonify({'error': 'Username required'}), 400
 
-        user = users_collection.find_one({"username": username})
+        user = users_collection.find_one({"username": username}, projection={"_id": 1})
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
@@ -1101,16 +1244,16 @@ def verify_data():
         today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
         # Get activities
-        activities = list(activities_collection.find({
-            "user_id": user["_id"],
-            "date": today
-        }))
+        activities = list(activities_collection.find(
+            {"user_id": user["_id"], "date": today},
+            projection={"app_name": 1, "total_time": 1, "last_updated": 1, "_id": 0}
+        ))
 
         # Get daily summary
-        daily_summary = daily_summaries_collection.find_one({
-            "user_id": user["_id"],
-            "date": today
-        })
+        daily_summary = daily_summaries_collection.find_one(
+            {"user_id": user["_id"], "date": today},
+            projection={"total_active_time": 1, "last_updated": 1, "_id": 0}
+        )
 
         return jsonify({
             'activities': [
@@ -1138,7 +1281,10 @@ def reset_screen_share_time():
         yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).date()
 
         # Aggregate screen share time and idle time for each user
-        sessions = sessions_collection.find({"screen_share_time": {"$gt": 0}})
+        sessions = sessions_collection.find(
+            {"screen_share_time": {"$gt": 0}},
+            projection={"user_id": 1, "screen_share_time": 1}
+        )
         for session in sessions:
             user_id = session["user_id"]
             screen_share_time = session["screen_share_time"]
@@ -1146,6 +1292,7 @@ def reset_screen_share_time():
             # Fetch the latest activity for idle time
             latest_activity = activities_collection.find_one(
                 {"user_id": user_id},
+                projection={"idle_time": 1},
                 sort=[("timestamp", -1)]
             )
             total_idle_time = latest_activity.get("idle_time", "0 mins") if latest_activity else "0 mins"
@@ -1203,7 +1350,10 @@ def update_screen_share_time():
             if last_id:
                 query["_id"] = {"$gt": last_id}
             
-            active_sessions = sessions_collection.find(query).sort("_id", 1).limit(batch_size)
+            active_sessions = sessions_collection.find(
+                query,
+                projection={"user_id": 1, "start_time": 1}
+            ).sort("_id", 1).limit(batch_size)
             batch = list(active_sessions)
             
             if not batch:
@@ -1380,7 +1530,7 @@ def validate_activity_data(data):
     # Validate date format
     try:
         if data['date']:
-            datetime.strptime(data['date'], "%Y-%m-%d")
+            parse_ymd(data['date'])
     except ValueError:
         logger.error("❌ Invalid date format in activity data")
         return False
@@ -1399,8 +1549,12 @@ def cleanup_old_data():
     daily_summaries_collection.delete_many({"date": {"$lt": cutoff_date}})
     logger.info(f"🧹 Removed data older than {cutoff_date}")
 
-# Schedule the background tasks
-scheduler = BackgroundScheduler()
+# Schedule the background tasks. A job that overruns its interval is not
+# started again alongside itself, and missed firings collapse into one run.
+scheduler = BackgroundScheduler(
+    job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 30},
+    executors={"default": APSThreadPoolExecutor(max_workers=4)}
+)
 scheduler.add_job(update_screen_share_time, 'interval', minutes=5)  # Run every 5 minutes
 scheduler.add_job(reset_screen_share_time, 'cron', hour=0, minute=0)  # Run at midnight UTC
 scheduler.add_job(clean_expired_cache, 'interval', minutes=15)  # Run every 15 minutes
@@ -1476,7 +1630,7 @@ def get_metrics():
             
         # Parse date
         try:
-            current_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            current_date = parse_ymd(date_str)
         except ValueError:
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
             
@@ -1518,20 +1672,19 @@ def history():
                 return jsonify({'error': 'No users found', 'data': []}), 404
                 
             start_date, end_date = calculate_date_range(days)
-            sessions_data = get_sessions_data(users, start_date, end_date)
-            history_data = process_user_history(users, days, start_date, sessions_data)
-            
-            # Ensure history_data is always a list
-            if not isinstance(history_data, list):
-                history_data = []
-                
-            serialized_data = serialize_mongodb_doc(history_data)
+            sessions_index = get_sessions_data(users, start_date, end_date)
+            day_strs = get_day_strs(start_date, days)
+            activities_index, summaries_index = get_daily_inputs(users, day_strs)
+            user_histories = iter_user_history(users, day_strs, sessions_index, activities_index, summaries_index)
             
-            # Cache the result
-            cache["summaries"][cache_key] = serialized_data
-            cache["last_updated"][cache_key] = time.time()
-            
-            return jsonify(serialized_data)
+            # Each user's history is encoded and sent as soon as it is built,
+            # rather than after the whole array has been assembled
+            body = stream_history(cache_key, user_histories)
+            headers = {}
+            if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+                body = gzip_stream(body)
+                headers['Content-Encoding'] = 'gzip'
+            return Response(stream_with_context(body), mimetype='application/json', headers=headers)
         except ValueError as ve:
             # Handle specific value errors like user not found
             logger.warning(f"Value error in history endpoint: {ve}")
@@ -1559,10 +1712,18 @@ def calculate_date_range(days):
     start_date = end_date - timedelta(days=days-1)
     return start_date, end_date
 
+def get_day_strs(start_date, days):
+    """Format each day in range as YYYY-MM-DD once, for every user to share"""
+    return [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+
 def get_sessions_data(users, start_date, end_date):
+    """Return each user's first join and last leave per day.
+
+    The result maps (user_id, "YYYY-MM-DD") to the grouped session row.
+    """
     # Convert date objects to datetime objects for MongoDB compatibility
-    start_datetime = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc)
-    end_datetime = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=timezone.utc)
+    start_datetime = get_day_bounds(start_date)[0]
+    end_datetime = get_day_bounds(end_date)[1]
     
     pipeline = [
         {"$match": {
@@ -1582,15 +1743,89 @@ def get_sessions_data(users, start_date, end_date):
             "last_leave": {"$last": "$stop_time"}
         }}
     ]
-    return list(sessions_collection.aggregate(pipeline))
+    return {(s["_id"]["user_id"], s["_id"]["date"]): s for s in sessions_collection.aggregate(pipeline)}
 
-def process_user_history(users, days, start_date, sessions_data):
-    history_data = []
+def get_daily_inputs(users, day_strs):
+    """Load the activities and daily summaries for every user and day in range.
+
+    Returns (activities_index, summaries_index): activity lists and summary
+    documents keyed by (user_id, "YYYY-MM-DD").
+    """
+    user_ids = [user["_id"] for user in users]
+    
+    activities_index = defaultdict(list)
+    # Sorted so each day's list starts with its most used app
+    activities = activities_collection.find(
+        {"user_id": {"$in": user_ids}, "date": {"$in": day_strs}},
+        projection={"user_id": 1, "date": 1, "app_name": 1, "total_time": 1}
+    ).sort("total_time", -1)
+    for activity in activities:
+        activities_index[(activity["user_id"], activity["date"])].append(activity)
+    
+    summaries_index = {
+        (summary["user_id"], summary["date"]): summary
+        for summary in daily_summaries_collection.find(
+            {"user_id": {"$in": user_ids}, "date": {"$in": day_strs}},
+            projection={"user_id": 1, "date": 1, "total_active_time": 1, "total_idle_time": 1}
+        )
+    }
     
+    return activities_index, summaries_index
+
+def stream_history(cache_key, user_histories):
+    """Yield user histories as a JSON array, caching the full list once built.
+
+    Only complete lists are cached; a client disconnect still finishes and
+    caches the list. Datetimes are written as ISO 8601, with naive values treated as UTC, as
+    the app's JSON provider does for cache hits.
+    """
+    history_data = []
+    complete = True
+    try:
+        yield b'['
+        for user_history in user_histories:
+            # Encode before writing anything, so a value orjson rejects drops
+            # that user instead of truncating the array mid-element
+            try:
+                chunk = orjson.dumps(user_history, option=orjson.OPT_NAIVE_UTC)
+            except TypeError as e:
+                logger.error(f"❌ Skipping unserializable history for {user_history.get('username')}: {e}")
+                complete = False
+                continue
+            separator = b',' if history_data else b''
+            history_data.append(user_history)
+            yield separator + chunk
+        yield b']'
+    except GeneratorExit:
+        # The client went away mid-stream; the queries are already done, so
+        # build the remaining histories anyway and cache the full list
+        history_data.extend(user_histories)
+        raise
+    except Exception as e:
+        # Headers are already sent, so end with a valid (partial) array
+        logger.error(f"❌ Error streaming history: {e}", exc_info=True)
+        complete = False
+        yield b']'
+    finally:
+        if complete:
+            cache["summaries"][cache_key] = history_data
+            cache["last_updated"][cache_key] = time.time()
+
+def gzip_stream(chunks):
+    """Gzip an iterable of byte chunks incrementally"""
+    compressor = zlib.compressobj(wbits=31)  # 31 selects the gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def iter_user_history(users, day_strs, sessions_index, activities_index, summaries_index):
+    """Yield each user's history as soon as it has been built"""
     # Ensure users is a list
     if not isinstance(users, list):
-        logger.warning("process_user_history received non-list users parameter")
-        return []
+        logger.warning("iter_user_history received non-list users parameter")
+        return
         
     for user in users:
         try:
@@ -1605,11 +1840,9 @@ def process_user_history(users, days, start_date, sessions_data):
                 "days": []
             }
             
-            for i in range(days):
-                day = start_date + timedelta(days=i)
-                day_str = day.strftime("%Y-%m-%d")
-                session_data = get_session_data(user["_id"], day_str, sessions_data)
-                daily_data = get_daily_data(user["_id"], day_str, session_data)
+            for day_str in day_strs:
+                session_data = get_session_data(user["_id"], day_str, sessions_index)
+                daily_data = get_daily_data(user["_id"], day_str, session_data, activities_index, summaries_index)
                 
                 # Ensure daily_data is valid
                 if daily_data:
@@ -1627,33 +1860,27 @@ def process_user_history(users, days, start_date, sessions_data):
                         "most_used_app": None,
                         "most_used_app_time": 0
                     })
-            
-            history_data.append(user_history)
         except Exception as e:
             logger.error(f"Error processing history for user {user.get('username', 'unknown')}: {e}")
-            # Add a minimal user history object with empty days
-            history_data.append({
+            # Yield a minimal user history object with empty days
+            user_history = {
                 "username": user.get("username", "unknown"),
                 "display_name": user.get("display_name", user.get("username", "unknown")),
                 "error": str(e),
                 "days": []
-            })
-            
-    return history_data
+            }
+        
+        yield user_history
 
-def get_session_data(user_id, day_str, sessions_data):
-    return next((s for s in sessions_data if s["_id"]["user_id"] == user_id and s["_id"]["date"] == day_str), None)
+def get_session_data(user_id, day_str, sessions_index):
+    return sessions_index.get((user_id, day_str))
 
-def get_daily_data(user_id, day_str, session_data):
+def get_daily_data(user_id, day_str, session_data, activities_index, summaries_index):
     first_join_time, last_leave_time, total_session_hours = process_session_data(session_data)
-    activities = get_activities(user_id, day_str)
+    # .get keeps the defaultdict from growing an entry per empty day
+    activities = activities_index.get((user_id, day_str), [])
     app_usage, most_active_app = process_activities(activities)
-    
-    # Get daily summary directly from collection
-    daily_summary = daily_summaries_collection.find_one({
-        "user_id": user_id,
-        "date": day_str
-    })
+    daily_summary = summaries_index.get((user_id, day_str))
     
     return create_daily_data(day_str, first_join_time, last_leave_time, total_session_hours, app_usage, most_active_app, daily_summary)
 
@@ -1677,12 +1904,6 @@ def process_session_data(session_data):
     
     return first_join_time, last_leave_time, total_session_hours
 
-def get_activities(user_id, day_str):
-    return list(activities_collection.find({
-        "user_id": user_id,
-        "date": day_str
-    }))
-
 def process_activities(activities):
     # Ensure app_usage is always a list, even if empty
     app_usage = [
@@ -1690,69 +1911,36 @@ def process_activities(activities):
         for a in activities
     ] if activities else []
     
-    # Handle empty app_usage case
-    if not app_usage:
-        most_active_app = None
-    else:
-        try:
-            most_active_app = max(app_usage, key=lambda x: x.get("total_time", 0), default=None)
-        except (ValueError, TypeError):
-            most_active_app = None
-            
+    # Activities arrive sorted by total_time, so the first is the most used
+    most_active_app = app_usage[0] if app_usage else None
+    
     return app_usage, most_active_app
 
 def create_daily_data(day_str, first_join_time, last_leave_time, total_session_hours, app_usage, most_active_app, daily_summary):
     try:
-        # Handle datetime objects properly
-        if first_join_time:
-            if isinstance(first_join_time, str):
-                first_activity = first_join_time
-            else:
-                first_activity = first_join_time.isoformat()
-        else:
-            first_activity = None
-            
-        if last_leave_time:
-            if isinstance(last_leave_time, str):
-                last_activity = last_leave_time
-            else:
-                last_activity = last_leave_time.isoformat()
-        else:
-            last_activity = None
+        # Datetimes are written as ISO 8601 by orjson when the response is
+        # encoded
+        first_activity = first_join_time or None
+        last_activity = last_leave_time or None
         
-        # Convert active time from minutes to hours
+        # Convert times from minutes to hours. app_usage and most_active_app
+        # come from process_activities, so every entry has both keys.
         active_time = 0
-        if daily_summary and "total_active_time" in daily_summary:
-            # Convert minutes to hours (divide by 60)
+        idle_time = 0
+        if daily_summary:
             active_time = round(daily_summary.get("total_active_time", 0) / 60, 2)
+            idle_time = round(daily_summary.get("total_idle_time", 0) / 60, 2)
         
-        # Ensure app_usage is a list
-        if not isinstance(app_usage, list):
-            app_usage = []
-        
-        # Convert app usage times from minutes to hours
-        normalized_app_usage = []
-        for app in app_usage:
-            if isinstance(app, dict) and "app_name" in app and "total_time" in app:
-                normalized_app_usage.append({
-                    "app_name": app["app_name"],
-                    "total_time": round(app["total_time"] / 60, 2)  # Convert minutes to hours
-                })
+        normalized_app_usage = [
+            {"app_name": app["app_name"], "total_time": round(app["total_time"] / 60, 2)}
+            for app in app_usage
+        ]
         
-        # Convert most active app time from minutes to hours
         most_used_app = None
         most_used_app_time = 0
-        if most_active_app and isinstance(most_active_app, dict):
-            if "app_name" in most_active_app:
-                most_used_app = most_active_app["app_name"]
-            if "total_time" in most_active_app:
-                most_used_app_time = round(most_active_app["total_time"] / 60, 2)
-        
-        # Convert idle time from minutes to hours if it exists
-        idle_time = 0
-        if daily_summary and "total_idle_time" in daily_summary:
-            # Convert minutes to hours (divide by 60)
-            idle_time = round(daily_summary.get("total_idle_time", 0) / 60, 2)
+        if most_active_app:
+            most_used_app = most_active_app["app_name"]
+            most_used_app_time = round(most_active_app["total_time"] / 60, 2)
         
         return {
             "date": day_str,
@@ -1791,6 +1979,9 @@ def list_screenshots():
         if not username or not date:
             return jsonify({'error': 'Username and date are required'}), 400
         
+        if not is_valid_date(date):
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
         # Generate cache key based on parameters
         cache_key = f"screenshots:{username}:{date}"
         if cache_key in cache["summaries"] and time.time() - cache["last_updated"].get(cache_key, 0) < CACHE_TTL:
@@ -1808,19 +1999,16 @@ def list_screenshots():
         screenshots = []
         if 'Contents' in response:
             for obj in response['Contents']:
-                if obj['Key'].endswith('.png'):
-                    url = f"https://{S3_BUCKET}.s3.{os.getenv('AWS_REGION', 'us-east-1')}.amazonaws.com/{obj['Key']}"
-                    # Generate thumbnail URL if available
-                    thumbnail_key = obj['Key'].replace('.png', '-thumb.png')
-                    thumbnail_url = f"https://{S3_BUCKET}.s3.{os.getenv('AWS_REGION', 'us-east-1')}.amazonaws.com/{thumbnail_key}"
-                    
+                key = obj['Key']
+                if key.endswith('.png'):
+                    last_modified = obj['LastModified'].isoformat()
                     screenshots.append({
-                        'url': url,
-                        'thumbnail_url': thumbnail_url,
-                        'key': obj['Key'],
-                        'timestamp': obj['LastModified'].isoformat(),
+                        'url': S3_URL_PREFIX + key,
+                        'thumbnail_url': S3_URL_PREFIX + key[:-4] + '-thumb.png',
+                        'key': key,
+                        'timestamp': last_modified,
                         'size': obj['Size'],
-                        'last_modified': obj['LastModified'].isoformat()
+                        'last_modified': last_modified
                     })
         
         result = {
@@ -1848,11 +2036,11 @@ def list_screenshots():
 def get_stats():
     """Get system statistics and metrics"""
     try:
-        # Get collection stats
-        users_count = users_collection.count_documents({})
-        sessions_count = sessions_collection.count_documents({})
-        activities_count = activities_collection.count_documents({})
-        summaries_count = daily_summaries_collection.count_documents({})
+        # Get collection stats from metadata; these totals needn't be exact
+        users_count = users_collection.estimated_document_count()
+        sessions_count = sessions_collection.estimated_document_count()
+        activities_count = activities_collection.estimated_document_count()
+        summaries_count = daily_summaries_collection.estimated_document_count()
         
         # Get active users (users with activity in the last 24 hours)
         yesterday = datetime.now(timezone.utc) - timedelta(days=1)
@@ -1895,66 +2083,69 @@ def get_stats():
         logger.error(f"❌ Error getting stats: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint for monitoring"""
-    health_data = {
-        "status": "healthy",
-        "components": {},
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
-    
-    # Check database connection
+# Each component's result is reused for HEALTH_CHECK_TTL seconds, so
+# frequent load balancer probes don't turn into Mongo and S3 traffic
+HEALTH_CHECK_TTL = 5.0
+_health_results = {}
+
+def _cached_check(name, check):
+    """Return check()'s result for a component, rerunning it once the cached one is stale"""
+    entry = _health_results.get(name)
+    now = time.monotonic()
+    if entry is None or now - entry[0] >= HEALTH_CHECK_TTL:
+        entry = (now, check())
+        _health_results[name] = entry
+    return entry[1]
+
+def _check_database():
     try:
         start_time = time.time()
         users_collection.find_one({})
         db_response_time = time.time() - start_time
-        health_data["components"]["database"] = {
+        return {
             "status": "connected",
             "response_time_ms": round(db_response_time * 1000, 2)
         }
     except Exception as e:
-        health_data["status"] = "unhealthy"
-        health_data["components"]["database"] = {
+        logger.error(f"❌ Database health check failed: {e}")
+        return {
             "status": "error",
             "error": str(e)
         }
-        logger.error(f"❌ Database health check failed: {e}")
-    
-    # Check S3 connection
+
+def _check_s3():
     try:
         start_time = time.time()
         s3_client.list_buckets()
         s3_response_time = time.time() - start_time
-        health_data["components"]["s3"] = {
+        return {
             "status": "connected",
             "response_time_ms": round(s3_response_time * 1000, 2)
         }
     except Exception as e:
-        health_data["status"] = "unhealthy"
-        health_data["components"]["s3"] = {
+        logger.error(f"❌ S3 health check failed: {e}")
+        return {
             "status": "error",
             "error": str(e)
         }
-        logger.error(f"❌ S3 health check failed: {e}")
-    
-    # Check memory usage
+
+def _check_memory():
     try:
         import psutil
         process = psutil.Process()
         memory_info = process.memory_info()
         memory_mb = memory_info.rss / 1024 / 1024
-        health_data["components"]["memory"] = {
+        return {
             "status": "ok" if memory_mb < 500 else "warning",
             "usage_mb": round(memory_mb, 2)
         }
     except Exception as e:
-        health_data["components"]["memory"] = {
+        return {
             "status": "unknown",
             "error": str(e)
         }
-    
-    # Check MongoDB connection pool
+
+def _check_db_pool():
     try:
         server_status = mongo_client.admin.command('serverStatus')
         conn_stats = server_status.get('connections', {})
@@ -1963,17 +2154,35 @@ def health_check():
         max_conns = current + available
         usage_percent = (current / max_conns * 100) if max_conns > 0 else 0
         
-        health_data["components"]["db_pool"] = {
+        return {
             "status": "ok" if usage_percent < 80 else "warning",
             "current": current,
             "available": available,
             "usage_percent": round(usage_percent, 1)
         }
     except Exception as e:
-        health_data["components"]["db_pool"] = {
+        return {
             "status": "unknown",
             "error": str(e)
         }
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint for monitoring"""
+    components = {
+        "database": _cached_check("database", _check_database),
+        "s3": _cached_check("s3", _check_s3),
+        "memory": _cached_check("memory", _check_memory),
+        "db_pool": _cached_check("db_pool", _check_db_pool)
+    }
+    
+    # Only a failed database or S3 check makes the service unhealthy
+    healthy = components["database"]["status"] != "error" and components["s3"]["status"] != "error"
+    health_data = {
+        "status": "healthy" if healthy else "unhealthy",
+        "components": components,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
     
     # Return appropriate status code
     status_code = 200 if health_data["status"] == "healthy" else 500
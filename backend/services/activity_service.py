@@ -4,42 +4,51 @@ Activity service for handling activity-related operations.
 import logging
 from datetime import datetime, timezone, timedelta
 from bson import ObjectId
-from mongodb import activities_collection, app_usage_collection, daily_summaries_collection, sessions_collection
+import mongodb
+from utils.helpers import day_bounds, parse_ymd, today_str
 
 logger = logging.getLogger(__name__)
 
+# Fields returned by the columnar activity listing, in column order
+ACTIVITY_COLUMNS = ("timestamp", "active_app", "active_apps", "idle_time")
+
 class ActivityService:
     """Service for handling activity-related operations"""
     
-    def record_activity(self, user_id, data):
-        """Record user activity"""
+    def record_activity(self, user_id, data, now=None):
+        """Record user activity; callers writing a batch can pass one shared now"""
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
+        
+        if now is None:
+            now = datetime.now(timezone.utc)
             
         activity_data = {
             "user_id": user_id,
             "active_apps": data.get("active_apps", []),
             "active_app": data.get("active_app"),
             "idle_time": data.get("idle_time", 0),
-            "timestamp": datetime.utcnow(),
-            "date": datetime.utcnow().date()
+            "timestamp": now,
+            "date": now.strftime("%Y-%m-%d")
         }
         
-        result = activities_collection.insert_one(activity_data)
+        result = mongodb.activities_collection.insert_one(activity_data)
         
         # Update app usage statistics
-        self._update_app_usage(user_id, data.get("active_app"))
+        self._update_app_usage(user_id, data.get("active_app"), now)
         
         return result.inserted_id
     
-    def _update_app_usage(self, user_id, app_name):
+    def _update_app_usage(self, user_id, app_name, now=None):
         """Update app usage statistics"""
         if not app_name:
             return
-            
-        today = datetime.utcnow().date()
         
-        app_usage_collection.update_one(
+        if now is None:
+            now = datetime.now(timezone.utc)
+        today = now.strftime("%Y-%m-%d")
+        
+        mongodb.app_usage_collection.update_one(
             {
                 "user_id": user_id,
                 "app_name": app_name,
@@ -47,13 +56,13 @@ class ActivityService:
             },
             {
                 "$inc": {"usage_count": 1},
-                "$setOnInsert": {"created_at": datetime.utcnow()}
+                "$setOnInsert": {"created_at": now}
             },
             upsert=True
         )
     
-    def get_user_activities(self, user_id, start_date=None, end_date=None, limit=100):
-        """Get activities for a specific user within a date range"""
+    def _activities_query(self, user_id, start_date, end_date):
+        """Build the activities filter for a user and optional YYYY-MM-DD range"""
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
@@ -61,15 +70,39 @@ class ActivityService:
         
         if start_date:
             if not end_date:
-                end_date = datetime.utcnow().date()
+                end_date = today_str()
+            # YYYY-MM-DD strings sort chronologically
             query["date"] = {"$gte": start_date, "$lte": end_date}
-            
-        return list(activities_collection.find(
-            query,
+        
+        return query
+    
+    def get_user_activities(self, user_id, start_date=None, end_date=None, limit=100):
+        """Get activities for a specific user within a date range"""
+        return list(mongodb.activities_collection.find(
+            self._activities_query(user_id, start_date, end_date),
             sort=[("timestamp", -1)],
             limit=limit
         ))
     
+    def get_user_activities_columnar(self, user_id, start_date=None, end_date=None, limit=100):
+        """Get activities as {"columns": [...], "rows": [[...], ...]}.
+
+        Only ACTIVITY_COLUMNS are fetched, and column names appear once
+        instead of in every row.
+        """
+        projection = dict.fromkeys(ACTIVITY_COLUMNS, 1)
+        projection["_id"] = 0
+        cursor = mongodb.activities_collection.find(
+            self._activities_query(user_id, start_date, end_date),
+            projection,
+            sort=[("timestamp", -1)],
+            limit=limit
+        )
+        return {
+            "columns": list(ACTIVITY_COLUMNS),
+            "rows": [[doc.get(column) for column in ACTIVITY_COLUMNS] for doc in cursor]
+        }
+    
     def get_app_usage(self, user_id, date=None):
         """Get app usage statistics for a user"""
         if isinstance(user_id, str):
@@ -80,7 +113,7 @@ class ActivityService:
         if date:
             query["date"] = date
             
-        return list(app_usage_collection.find(
+        return list(mongodb.app_usage_collection.find(
             query,
             sort=[("usage_count", -1)]
         ))
@@ -91,9 +124,9 @@ class ActivityService:
             user_id = ObjectId(user_id)
             
         if not date:
-            date = datetime.utcnow().date()
+            date = today_str()
             
-        return daily_summaries_collection.find_one({
+        return mongodb.daily_summaries_collection.find_one({
             "user_id": user_id,
             "date": date
         })
@@ -103,13 +136,13 @@ class ActivityService:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        today = datetime.utcnow().date()
+        now = datetime.now(timezone.utc)
         
-        daily_summaries_collection.update_one(
-            {"user_id": user_id, "date": today},
+        mongodb.daily_summaries_collection.update_one(
+            {"user_id": user_id, "date": now.strftime("%Y-%m-%d")},
             {
                 "$set": data,
-                "$setOnInsert": {"created_at": datetime.utcnow()}
+                "$setOnInsert": {"created_at": now}
             },
             upsert=True
         )
@@ -119,7 +152,7 @@ class ActivityService:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        result = daily_summaries_collection.update_one(
+        result = mongodb.daily_summaries_collection.update_one(
             {
                 "user_id": user_id,
                 "date": date
@@ -145,31 +178,30 @@ class ActivityService:
             day_str = current_date.strftime("%Y-%m-%d")
         
         # Get daily summary
-        daily_summary = daily_summaries_collection.find_one({
+        daily_summary = mongodb.daily_summaries_collection.find_one({
             "user_id": user["_id"],
             "date": day_str
         })
         
         # Get activities
-        activities = list(activities_collection.find({
+        activities = list(mongodb.activities_collection.find({
             "user_id": user["_id"],
             "date": day_str
-        }))
+        }, projection={"app_name": 1, "total_time": 1, "_id": 0}))
         
         # Get sessions
         if isinstance(current_date, str):
-            current_date = datetime.strptime(current_date, "%Y-%m-%d").date()
+            current_date = parse_ymd(current_date)
             
-        day_start = datetime.combine(current_date, datetime.min.time(), tzinfo=timezone.utc)
-        day_end = datetime.combine(current_date, datetime.max.time(), tzinfo=timezone.utc)
+        day_start, day_end = day_bounds(current_date)
         
-        first_join = sessions_collection.find_one({
+        first_join = mongodb.sessions_collection.find_one({
             "user_id": user["_id"],
             "event": "joined",
             "start_time": {"$gte": day_start, "$lte": day_end}
         }, sort=[("start_time", 1)])
         
-        last_leave = sessions_collection.find_one({
+        last_leave = mongodb.sessions_collection.find_one({
             "user_id": user["_id"],
             "event": "left",
             "stop_time": {"$gte": day_start, "$lte": day_end}
@@ -185,23 +217,25 @@ class ActivityService:
                 total_session_seconds = (last_leave_time - first_join_time).total_seconds()
                 total_session_hours = round(total_session_seconds / 3600, 2)
         
-        # Calculate total working hours (sum of all sessions)
-        sessions = list(sessions_collection.find({
-            "user_id": user["_id"],
-            "start_time": {"$gte": day_start, "$lte": day_end},
-            "stop_time": {"$ne": None}
-        }))
+        # Total and average session length, summed by MongoDB (durations in ms)
+        session_totals = next(mongodb.sessions_collection.aggregate([
+            {"$match": {
+                "user_id": user["_id"],
+                "start_time": {"$gte": day_start, "$lte": day_end},
+                "stop_time": {"$ne": None}
+            }},
+            {"$project": {"_id": 0, "duration": {"$subtract": ["$stop_time", "$start_time"]}}},
+            {"$match": {"duration": {"$gt": 0}}},
+            {"$group": {
+                "_id": None,
+                "total_duration": {"$sum": "$duration"},
+                "avg_duration": {"$avg": "$duration"}
+            }}
+        ]), None)
         
         total_working_hours = 0
-        for session in sessions:
-            if session.get("start_time") and session.get("stop_time"):
-                start_time = session["start_time"]
-                stop_time = session["stop_time"]
-                if stop_time > start_time:
-                    duration = (stop_time - start_time).total_seconds()
-                    total_working_hours += duration
-        
-        total_working_hours = round(total_working_hours / 3600, 2)
+        if session_totals:
+            total_working_hours = round(session_totals["total_duration"] / 3600000, 2)
         
         # Calculate metrics
         metrics = {
@@ -285,18 +319,9 @@ class ActivityService:
         metrics["productive_apps"] = productive_apps[:5]  # Top 5
         metrics["distracting_apps"] = distracting_apps[:5]  # Top 5
         
-        # Calculate average session length
-        session_durations = []
-        for session in sessions:
-            if session.get("start_time") and session.get("stop_time"):
-                start = session["start_time"]
-                stop = session["stop_time"]
-                if stop > start:
-                    duration = (stop - start).total_seconds() / 3600  # hours
-                    session_durations.append(duration)
-        
-        if session_durations:
-            metrics["avg_session_length"] = round(sum(session_durations) / len(session_durations), 2)
+        # Average session length in hours
+        if session_totals:
+            metrics["avg_session_length"] = round(session_totals["avg_duration"] / 3600000, 2)
         
         return metrics
 
@@ -4,10 +4,19 @@ S3 service for handling AWS S3 operations.
 import os
 import boto3
 import logging
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# Uploads are read from the caller's file object, switching to multipart
+# above 5 MB, and run on the request's own thread rather than a pool
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    use_threads=False
+)
+
 class S3Service:
     """Service for handling AWS S3 operations"""
     
@@ -21,18 +30,19 @@ class S3Service:
         )
         self.bucket_name = os.getenv('S3_BUCKET', 'km-wfh-monitoring-bucket')
     
-    def upload_file(self, file_data, object_key):
-        """Upload a file to S3 bucket"""
+    def upload_file(self, fileobj, object_key):
+        """Upload a file-like object to S3 bucket"""
         try:
-            self.s3_client.put_object(
-                Body=file_data,
-                Bucket=self.bucket_name,
-                Key=object_key,
-                ContentType='image/png'
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                object_key,
+                ExtraArgs={'ContentType': 'image/png'},
+                Config=_TRANSFER_CONFIG
             )
             logger.info(f"✅ Successfully uploaded file to S3: {object_key}")
             return True
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             logger.error(f"❌ Error uploading file to S3: {e}")
             return False
     
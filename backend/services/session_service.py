@@ -4,8 +4,8 @@ Service for managing user sessions
 import logging
 from datetime import datetime, timezone
 from bson import ObjectId
-from mongodb import sessions_collection, daily_summaries_collection
-from utils.helpers import ensure_timezone_aware, logger
+import mongodb
+from utils.helpers import day_bounds, ensure_timezone_aware, logger
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +22,10 @@ class SessionService:
             "channel": data.get("channel"),
             "screen_shared": data.get("screen_shared", False),
             "event": data.get("event"),
-            "timestamp": datetime.utcnow()
+            "timestamp": datetime.now(timezone.utc)
         }
         
-        result = sessions_collection.insert_one(session_data)
+        result = mongodb.sessions_collection.insert_one(session_data)
         logger.info(f"✅ Created new session for user {user_id}")
         
         return result.inserted_id
@@ -35,7 +35,7 @@ class SessionService:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        return list(sessions_collection.find(
+        return list(mongodb.sessions_collection.find(
             {"user_id": user_id},
             sort=[("timestamp", -1)],
             limit=limit
@@ -43,7 +43,7 @@ class SessionService:
     
     def get_recent_sessions(self, limit=100):
         """Get recent sessions across all users"""
-        return list(sessions_collection.find(
+        return list(mongodb.sessions_collection.find(
             sort=[("timestamp", -1)],
             limit=limit
         ))
@@ -88,7 +88,7 @@ class SessionService:
             user_id = ObjectId(user_id)
             
         # Find the most recent stop_streaming event
-        stop_event = sessions_collection.find_one(
+        stop_event = mongodb.sessions_collection.find_one(
             {"user_id": user_id, "event": "stopped_streaming"},
             sort=[("timestamp", -1)]
         )
@@ -97,7 +97,7 @@ class SessionService:
             return
         
         # Find the matching start_streaming event
-        start_event = sessions_collection.find_one(
+        start_event = mongodb.sessions_collection.find_one(
             {
                 "user_id": user_id,
                 "event": "started_streaming",
@@ -113,13 +113,13 @@ class SessionService:
         duration = (stop_event["timestamp"] - start_event["timestamp"]).total_seconds()
         
         # Update daily summary
-        today = datetime.utcnow().date()
+        now = datetime.now(timezone.utc)
         
-        daily_summaries_collection.update_one(
-            {"user_id": user_id, "date": today},
+        mongodb.daily_summaries_collection.update_one(
+            {"user_id": user_id, "date": now.strftime("%Y-%m-%d")},
             {
                 "$inc": {"total_screen_share_time": duration},
-                "$setOnInsert": {"created_at": datetime.utcnow()}
+                "$setOnInsert": {"created_at": now}
             },
             upsert=True
         )
@@ -152,10 +152,9 @@ class SessionService:
     def get_session_data(self, user_id, date):
         """Get session data for user on date"""
         try:
-            day_start = datetime.combine(date, datetime.min.time(), tzinfo=timezone.utc)
-            day_end = datetime.combine(date, datetime.max.time(), tzinfo=timezone.utc)
+            day_start, day_end = day_bounds(date)
             
-            first_join = sessions_collection.find_one(
+            first_join = mongodb.sessions_collection.find_one(
                 {
                     "user_id": user_id,
                     "event": "joined",
@@ -164,7 +163,7 @@ class SessionService:
                 sort=[("start_time", 1)]
             )
             
-            last_leave = sessions_collection.find_one(
+            last_leave = mongodb.sessions_collection.find_one(
                 {
                     "user_id": user_id,
                     "event": "left", 
@@ -193,12 +192,12 @@ class SessionService:
                 "event": "joined",
                 "timestamp": current_time
             }
-            result = sessions_collection.insert_one(session_data)
+            result = mongodb.sessions_collection.insert_one(session_data)
             logger.info(f"✅ Started new session for user {user_id}")
             return result.inserted_id
             
         else:  # stop
-            result = sessions_collection.update_one(
+            result = mongodb.sessions_collection.update_one(
                 {
                     "user_id": user_id,
                     "stop_time": None
@@ -2,9 +2,13 @@
 User service for handling user-related operations.
 """
 import logging
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from bson import ObjectId
-from mongodb import users_collection, sessions_collection
+from pymongo import ReturnDocument
+from config import CACHE_TTL
+import mongodb
+from utils.helpers import cache
 
 logger = logging.getLogger(__name__)
 
@@ -13,78 +17,127 @@ class UserService:
     
     def get_or_create_user(self, username):
         """Get user by username or create if not exists"""
-        user = users_collection.find_one({"username": username})
+        user = mongodb.users_collection.find_one({"username": username})
         
         if user:
             return user["_id"]
         
         # Create new user
-        result = users_collection.insert_one({
+        now = datetime.now(timezone.utc)
+        result = mongodb.users_collection.insert_one({
             "username": username,
-            "created_at": datetime.utcnow(),
-            "last_active": datetime.utcnow(),
+            "created_at": now,
+            "last_active": now,
             "is_active": True
         })
         
         logger.info(f"✅ Created new user: {username}")
         return result.inserted_id
     
+    def touch_user(self, username, now=None):
+        """Get or create a user and mark them active in one round-trip"""
+        if now is None:
+            now = datetime.now(timezone.utc)
+        
+        user = mongodb.users_collection.find_one_and_update(
+            {"username": username},
+            {
+                "$set": {"last_active": now},
+                "$setOnInsert": {"created_at": now, "is_active": True}
+            },
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        cached = cache["users"].get(f"user:{username}")
+        if cached is not None:
+            cached["last_active"] = now
+        return user["_id"]
+    
     def update_user(self, user_id, update_data):
         """Update user information"""
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        result = users_collection.update_one(
+        result = mongodb.users_collection.update_one(
             {"_id": user_id},
             {"$set": update_data}
         )
+        self._forget_user(user_id)
         
         return result.modified_count > 0
     
+    def _forget_user(self, user_id):
+        """Drop a user's cached username lookup after a write"""
+        for cache_key, user in list(cache["users"].items()):
+            if cache_key.startswith("user:") and user["_id"] == user_id:
+                cache["users"].pop(cache_key, None)
+    
+    def _patch_cached_user(self, user_id, fields):
+        """Apply a known $set to a user's cached document instead of dropping it"""
+        for cache_key, user in list(cache["users"].items()):
+            if cache_key.startswith("user:") and user["_id"] == user_id:
+                user.update(fields)
+    
     def get_user_by_id(self, user_id):
         """Get user by ID"""
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        return users_collection.find_one({"_id": user_id})
+        return mongodb.users_collection.find_one({"_id": user_id})
     
     def get_user_by_username(self, username):
-        """Get user by username"""
-        return users_collection.find_one({"username": username})
+        """Get user by username, reusing the lookup for CACHE_TTL seconds.
+
+        Most endpoints start with this query, so it is kept in the shared
+        cache. Misses aren't cached, so new users are found immediately.
+        """
+        cache_key = f"user:{username}"
+        if cache_key in cache["users"] and time.time() - cache["last_updated"].get(cache_key, 0) < CACHE_TTL:
+            return cache["users"][cache_key]
+        
+        user = mongodb.users_collection.find_one({"username": username})
+        if user:
+            cache["users"][cache_key] = user
+            cache["last_updated"][cache_key] = time.time()
+        return user
     
     def get_all_users(self):
         """Get all users"""
-        return list(users_collection.find())
+        return list(mongodb.users_collection.find())
     
     def get_users_paginated(self, skip=0, limit=100):
         """Get users with pagination"""
-        return list(users_collection.find().skip(skip).limit(limit))
+        return list(mongodb.users_collection.find().skip(skip).limit(limit))
     
     def get_user_count(self):
         """Get total number of users"""
-        return users_collection.count_documents({})
+        return mongodb.users_collection.count_documents({})
     
     def get_active_users(self):
         """Get all active users"""
-        return list(users_collection.find({"is_active": True}))
+        return list(mongodb.users_collection.find({"is_active": True}))
     
     def update_user_activity(self, user_id):
         """Update user's last active timestamp"""
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        users_collection.update_one(
+        fields = {"last_active": datetime.now(timezone.utc)}
+        mongodb.users_collection.update_one(
             {"_id": user_id},
-            {"$set": {"last_active": datetime.utcnow()}}
+            {"$set": fields}
         )
+        self._patch_cached_user(user_id, fields)
     
-    def get_latest_session(self, user_id):
-        """Get the latest session for a user"""
+    def get_latest_session(self, user_id, projection=None):
+        """Get the latest session for a user, optionally limited to the projected fields"""
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        return sessions_collection.find_one(
+        return mongodb.sessions_collection.find_one(
             {"user_id": user_id},
+            projection=projection,
             sort=[("timestamp", -1)]
         )
     
@@ -94,7 +147,7 @@ class UserService:
             user_id = ObjectId(user_id)
             
         # Get the most recent session for this user
-        latest_session = self.get_latest_session(user_id)
+        latest_session = self.get_latest_session(user_id, projection={"event": 1, "_id": 0})
         
         if not latest_session:
             return "offline"
@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import AsyncMock, MagicMock
 from fastapi.testclient import TestClient
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timezone
@@ -7,10 +8,10 @@ import asyncio
 from typing import AsyncGenerator, Generator
 
 from app.main import app
-from app.core.config import get_settings
-from app.services.mongodb import mongodb
+from app.core.config import Settings as settings
+from app.services import mongodb
+from app.routers import screenshots, session
 
-settings = get_settings()
 
 @pytest.fixture(scope="session")
 def event_loop() -> Generator:
@@ -22,15 +23,18 @@ def event_loop() -> Generator:
 async def test_client() -> AsyncGenerator:
     # Use test database
     test_db_name = "test_wfh_monitoring"
-    mongodb.client = AsyncIOMotorClient(settings.MONGO_URI)
-    mongodb.db = mongodb.client[test_db_name]
+    # Kept locally: app startup replaces mongodb.client with one bound to the
+    # TestClient's own event loop, which is closed by teardown
+    test_mongo = AsyncIOMotorClient(settings.MONGO_URI)
+    mongodb.client = test_mongo
+    mongodb.db = test_mongo[test_db_name]
     
     # Create test client
     with TestClient(app) as client:
         yield client
         
     # Cleanup test database
-    await mongodb.client.drop_database(test_db_name)
+    await test_mongo.drop_database(test_db_name)
 
 @pytest.fixture
 async def sample_user(test_client):
@@ -41,4 +45,40 @@ async def sample_user(test_client):
     
     result = await mongodb.db.users.insert_one(user_data)
     user_data["_id"] = result.inserted_id
-    return user_data
\ No newline at end of file
+    return user_data
+
+@pytest.fixture
+def make_cursor():
+    """Build a stand-in for a motor cursor whose to_list returns docs."""
+    def make(docs):
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.to_list = AsyncMock(return_value=docs)
+        return cursor
+    return make
+
+@pytest.fixture
+def fake_collections(monkeypatch):
+    """Mocked collections served by get_collections in the routers under test."""
+    collections = {
+        name: MagicMock()
+        for name in ("users", "sessions", "activities", "daily_summaries", "screenshots", "screenshot_folders")
+    }
+    for collection in collections.values():
+        collection.find_one = AsyncMock(return_value=None)
+        collection.find_one_and_update = AsyncMock(return_value=None)
+        collection.insert_one = AsyncMock()
+        collection.update_one = AsyncMock()
+        collection.bulk_write = AsyncMock()
+    
+    async def get_collections():
+        return collections
+    
+    monkeypatch.setattr(session, "get_collections", get_collections)
+    monkeypatch.setattr(screenshots, "get_collections", get_collections)
+    return collections
+
+@pytest.fixture
+def api_client(fake_collections):
+    # Not entered as a context manager, so startup (MongoDB, scheduler) is skipped
+    return TestClient(app)
@@ -0,0 +1,23 @@
+from app.core.cache import Cache
+
+def test_maxsize_evicts_oldest_write():
+    cache = Cache(ttl=60, maxsize=2)
+    cache.set("a", 1, "sessions")
+    cache.set("b", 2, "sessions")
+    cache.set("a", 3, "sessions")
+    cache.set("c", 4, "sessions")
+
+    assert cache.get("b", "sessions") is None
+    assert cache.get("a", "sessions") == 3
+    assert cache.get("c", "sessions") == 4
+    assert set(cache._cache["last_updated"]) == {"a", "c"}
+
+def test_expired_entry_is_dropped_on_read(monkeypatch):
+    cache = Cache(ttl=1)
+    cache.set("a", 1, "sessions")
+    now = cache._cache["last_updated"]["a"]
+    monkeypatch.setattr("app.core.cache.time.time", lambda: now + 2)
+
+    assert cache.get("a", "sessions") is None
+    assert "a" not in cache._cache["sessions"]
+    assert "a" not in cache._cache["last_updated"]
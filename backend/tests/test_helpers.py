@@ -0,0 +1,56 @@
+import gzip
+import json
+import pytest
+
+# The Flask blueprint helpers are only tested where Flask is installed
+flask = pytest.importorskip("flask")
+from utils.helpers import etag_response, gzip_response
+
+PAYLOAD = {"users": ["alice", "bob"]}
+
+@pytest.fixture
+def flask_client():
+    flask_app = flask.Flask(__name__)
+
+    @flask_app.route("/data")
+    @gzip_response
+    @etag_response
+    def data():
+        return flask.jsonify(PAYLOAD)
+
+    return flask_app.test_client()
+
+def test_gzip_weakens_etag_and_revalidates(flask_client):
+    first = flask_client.get("/data", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(first.data)) == PAYLOAD
+
+    # The tag describes the uncompressed body, so it is downgraded to weak
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    second = flask_client.get("/data", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b""
+    assert "Content-Encoding" not in second.headers
+
+def test_identity_response_keeps_strong_etag(flask_client):
+    first = flask_client.get("/data")
+    assert first.status_code == 200
+    assert "Content-Encoding" not in first.headers
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    second = flask_client.get("/data", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+
+def test_weak_tag_matches_uncompressed_request(flask_client):
+    # A tag picked up over gzip still revalidates a plain request
+    etag = flask_client.get("/data", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    assert flask_client.get("/data", headers={"If-None-Match": etag}).status_code == 304
+
+def test_stale_etag_returns_body(flask_client):
+    response = flask_client.get("/data", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.get_json() == PAYLOAD
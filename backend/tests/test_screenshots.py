@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+
+from app.routers import screenshots
+
+DAY = "2024-01-02"
+BODY = b'{"screenshots":[],"count":0}'
+
+@pytest.fixture
+def slow_listing(monkeypatch):
+    """Replace the listing query with one that blocks until released."""
+    release = asyncio.Event()
+    calls = []
+
+    async def fetch(username, date):
+        calls.append((username, date))
+        await release.wait()
+        return BODY
+
+    monkeypatch.setattr(screenshots, "_fetch_screenshot_listing", fetch)
+    yield release, calls
+    screenshots._today_listings.clear()
+    screenshots._past_listings.clear()
+    screenshots._inflight_listings.clear()
+
+async def test_concurrent_listings_share_one_query(slow_listing):
+    release, calls = slow_listing
+    requests = [
+        asyncio.create_task(screenshots.list_screenshots("alice", DAY, refresh=True))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    assert len(calls) == 1
+
+    release.set()
+    responses = await asyncio.gather(*requests)
+    assert [response.body for response in responses] == [BODY] * 3
+    assert f"alice/{DAY}" not in screenshots._inflight_listings
+
+async def test_cancelled_waiter_leaves_owner_running(slow_listing):
+    release, calls = slow_listing
+    owner = asyncio.create_task(screenshots.list_screenshots("alice", DAY, refresh=True))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(screenshots.list_screenshots("alice", DAY, refresh=True))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    release.set()
+    assert (await owner).body == BODY
+    assert len(calls) == 1
+
+async def test_cancelled_owner_cancels_waiters_and_clears_slot(slow_listing):
+    release, calls = slow_listing
+    owner = asyncio.create_task(screenshots.list_screenshots("alice", DAY, refresh=True))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(screenshots.list_screenshots("alice", DAY, refresh=True))
+    await asyncio.sleep(0)
+
+    owner.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert f"alice/{DAY}" not in screenshots._inflight_listings
+
+    # The next request runs its own query instead of awaiting the dead future
+    release.set()
+    assert (await screenshots.list_screenshots("alice", DAY, refresh=True)).body == BODY
+    assert len(calls) == 2
+
+async def test_invalid_date_is_rejected(slow_listing):
+    with pytest.raises(screenshots.HTTPException) as excinfo:
+        await screenshots.list_screenshots("alice", "2024-02-31")
+    assert excinfo.value.status_code == 400
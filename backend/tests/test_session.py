@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from bson import ObjectId
+from fastapi import status
+
+from app.routers import session
+
+NOW_ELAPSED = {"$toInt": {"$divide": [{"$subtract": ["$$NOW", "$start_time"]}, 1000]}}
+
+@pytest.fixture
+def user_id(fake_collections):
+    user_id = ObjectId()
+    fake_collections["users"].find_one_and_update.return_value = {"_id": user_id}
+    return user_id
+
+def test_left_computes_duration_on_server(api_client, fake_collections, user_id):
+    fake_collections["sessions"].find_one_and_update.return_value = {"_id": ObjectId()}
+
+    response = api_client.post("/api/session", json={"username": "alice", "event": "left"})
+    assert response.status_code == status.HTTP_200_OK
+
+    query, update = fake_collections["sessions"].find_one_and_update.await_args.args
+    assert query == {"user_id": user_id, "stop_time": None, "start_time": {"$ne": None}}
+    assert update == [{
+        "$set": {
+            "stop_time": "$$NOW",
+            "channel": None,
+            "event": "left",
+            "timestamp": "$$NOW",
+            "total_working_hours": NOW_ELAPSED
+        }
+    }]
+
+def test_left_uses_client_timestamp(api_client, fake_collections, user_id):
+    response = api_client.post("/api/session", json={
+        "username": "alice",
+        "event": "left",
+        "timestamp": "2024-01-02T10:00:00"
+    })
+    assert response.status_code == status.HTTP_200_OK
+
+    event_time = datetime(2024, 1, 2, 10, 0, tzinfo=timezone.utc)
+    _, update = fake_collections["sessions"].find_one_and_update.await_args.args
+    assert update[0]["$set"]["stop_time"] == event_time
+    assert update[0]["$set"]["total_working_hours"] == {
+        "$toInt": {"$divide": [{"$subtract": [event_time, "$start_time"]}, 1000]}
+    }
+
+def test_left_without_open_session(api_client, fake_collections, user_id):
+    # find_one_and_update matches nothing and returns None
+    response = api_client.post("/api/session", json={"username": "alice", "event": "left"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["event"] == "left"
+    fake_collections["sessions"].insert_one.assert_not_awaited()
+
+def test_stopped_streaming_adds_elapsed_time(api_client, fake_collections, user_id):
+    response = api_client.post("/api/session", json={"username": "alice", "event": "stopped_streaming"})
+    assert response.status_code == status.HTTP_200_OK
+
+    _, update = fake_collections["sessions"].find_one_and_update.await_args.args
+    assert update[0]["$set"]["screen_share_time"] == {
+        "$add": [{"$ifNull": ["$screen_share_time", 0]}, NOW_ELAPSED]
+    }
+    assert update[0]["$set"]["start_time"] is None
+
+def test_invalid_event(api_client, fake_collections):
+    response = api_client.post("/api/session", json={"username": "alice", "event": "paused"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+async def test_status_lookups_share_one_query(fake_collections, make_cursor):
+    alice_id, bob_id = ObjectId(), ObjectId()
+    fake_collections["users"].find.return_value = make_cursor([
+        {"_id": alice_id, "username": "alice"},
+        {"_id": bob_id, "username": "bob", "display_name": "Bob"}
+    ])
+    fake_collections["sessions"].aggregate.return_value = make_cursor([
+        {"_id": alice_id, "session": {
+            "event": "joined",
+            "channel": "general",
+            "timestamp": datetime(2024, 1, 2, 10, 0, tzinfo=timezone.utc)
+        }}
+    ])
+
+    alice, alice_again, bob, ghost = await asyncio.gather(
+        session._load_session_status("alice"),
+        session._load_session_status("alice"),
+        session._load_session_status("bob"),
+        session._load_session_status("ghost")
+    )
+
+    fake_collections["users"].find.assert_called_once()
+    fake_collections["sessions"].aggregate.assert_called_once()
+    usernames = fake_collections["users"].find.call_args.args[0]["username"]["$in"]
+    assert sorted(usernames) == ["alice", "bob", "ghost"]
+
+    assert alice is alice_again
+    assert alice["last_event"] == "joined"
+    assert alice["channel"] == "general"
+    assert bob["display_name"] == "Bob"
+    assert bob["last_event"] is None
+    assert ghost is None
+    assert not session._status_waiters
+    assert not session._status_batch
+
+    # The flush task drops itself from the reference set once done
+    await asyncio.sleep(session.STATUS_BATCH_WINDOW)
+    assert not session._status_flush_tasks
+
+async def test_status_lookups_after_flush_start_new_batch(fake_collections, make_cursor):
+    fake_collections["users"].find.return_value = make_cursor([])
+    fake_collections["sessions"].aggregate.return_value = make_cursor([])
+
+    assert await session._load_session_status("alice") is None
+    assert await session._load_session_status("alice") is None
+    assert fake_collections["users"].find.call_count == 2
+
+async def test_status_batch_failure_reaches_every_waiter(fake_collections, make_cursor):
+    cursor = make_cursor([])
+    cursor.to_list.side_effect = RuntimeError("database down")
+    fake_collections["users"].find.return_value = cursor
+
+    results = await asyncio.gather(
+        session._load_session_status("alice"),
+        session._load_session_status("bob"),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not session._status_waiters
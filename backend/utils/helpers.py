@@ -7,11 +7,12 @@ import time
 import logging
 import threading
 import gzip
+import hashlib
 import io
-from datetime import datetime, timezone
-from functools import wraps
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache, wraps
 from bson import ObjectId, json_util
-from flask import request, Response
+from flask import current_app, make_response, request, Response
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,8 @@ cache = {
     "users": {},
     "sessions": {},
     "summaries": {},
+    # Encoded JSON bodies: {"json": bytes, "gzip": bytes or None, "etag": str}
+    "responses": {},
     "last_updated": {}
 }
 
@@ -54,6 +57,38 @@ def ensure_timezone_aware(dt):
         return dt.replace(tzinfo=timezone.utc)
     return dt
 
+# Added to a day's midnight to get its last microsecond
+_DAY_END_OFFSET = timedelta(days=1, microseconds=-1)
+
+def parse_ymd(date_str):
+    """Parse a YYYY-MM-DD string into a date.
+
+    Uses the C ISO parser rather than strptime, but still only accepts the
+    dashed 10-character form. Raises ValueError for anything else.
+    """
+    if len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
+        raise ValueError(f"Invalid date: {date_str!r}")
+    return date.fromisoformat(date_str)
+
+_EPOCH_DATE = date(1970, 1, 1)
+
+@lru_cache(maxsize=1)
+def _day_str(day_number):
+    return (_EPOCH_DATE + timedelta(days=day_number)).strftime("%Y-%m-%d")
+
+def today_str():
+    """Today's UTC date as YYYY-MM-DD, formatted once per day"""
+    return _day_str(int(time.time() // 86400))
+
+@lru_cache(maxsize=32)
+def day_bounds(day):
+    """Return the first and last UTC datetimes of a date.
+
+    Cached, since a page asks for the same date once per user.
+    """
+    day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return day_start, day_start + _DAY_END_OFFSET
+
 def get_cached_data(cache_key, collection_key, query_func, ttl=60):
     """Get data from cache or execute query function if cache is stale"""
     current_time = time.time()
@@ -75,6 +110,44 @@ def get_cached_data(cache_key, collection_key, query_func, ttl=60):
     
     return data
 
+def cached_json_response(cache_key, query_func, ttl=60):
+    """Serve query_func's data as JSON, caching the encoded body.
+
+    The data is serialized once per ttl by the app's JSON provider and
+    gzipped at most once, so cache hits skip both steps. Gzipped responses
+    already carry Content-Encoding, which gzip_response leaves alone.
+    Responses carry an ETag of the body, so a client polling unchanged
+    data gets an empty 304 back.
+    """
+    current_time = time.time()
+    entry = cache["responses"].get(cache_key)
+    
+    if entry is None or current_time - cache["last_updated"].get(cache_key, 0) >= ttl:
+        logger.debug(f"🔍 Cache miss for responses:{cache_key}")
+        body = current_app.json.response(query_func()).get_data()
+        entry = {
+            "json": body,
+            "gzip": None,
+            "etag": hashlib.blake2b(body, digest_size=16).hexdigest()
+        }
+        cache["responses"][cache_key] = entry
+        cache["last_updated"][cache_key] = current_time
+    
+    if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+        if entry["gzip"] is None:
+            entry["gzip"] = gzip.compress(entry["json"])
+        response = Response(entry["gzip"], 200, {
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip"
+        })
+        # The gzipped bytes are a different representation of the same data
+        response.set_etag(entry["etag"] + "-gzip")
+    else:
+        response = Response(entry["json"], 200, {"Content-Type": "application/json"})
+        response.set_etag(entry["etag"])
+    response.vary.add("Accept-Encoding")
+    return response.make_conditional(request)
+
 # Performance monitoring decorator
 def monitor_performance(f):
     @wraps(f)
@@ -100,8 +173,11 @@ def gzip_response(f):
     def decorated_function(*args, **kwargs):
         response = f(*args, **kwargs)
         
-        # Check if client accepts gzip encoding
-        if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+        # Check if client accepts gzip encoding; bodies that are already
+        # encoded (e.g. from cached_json_response) and empty 304s are passed through
+        if ('gzip' in request.headers.get('Accept-Encoding', '').lower()
+                and 'Content-Encoding' not in response.headers
+                and response.status_code != 304):
             content = response.data
             
             gzip_buffer = io.BytesIO()
@@ -112,5 +188,29 @@ def gzip_response(f):
             response.headers['Content-Encoding'] = 'gzip'
             response.headers['Content-Length'] = len(response.data)
             
+            # The tag was computed over the uncompressed body
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+            
         return response
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+# Conditional GET support; apply below gzip_response so the tag is taken
+# over the uncompressed JSON
+def etag_response(f):
+    """Tag successful responses with a hash of their body and answer a
+    matching If-None-Match with an empty 304.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        
+        if response.status_code == 200:
+            response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest())
+            response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+            response.vary.add('Accept-Encoding')
+            response = response.make_conditional(request)
+            
+        return response
+    return decorated_function